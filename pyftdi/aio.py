@@ -0,0 +1,437 @@
+# Copyright (c) 2022, Emmanuel Blot <emmanuel.blot@free.fr>
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""asyncio support for PyFdti"""
+
+#pylint: disable-msg=too-many-arguments
+
+from asyncio import get_running_loop
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterable, Optional, Union
+from .ftdi import Ftdi
+from .i2c import I2cController, I2cPort
+from .spi import SpiController, SpiPort
+
+
+class AsyncIoWorker:
+    """Off-loop executor for blocking FTDI requests.
+
+       Each FTDI interface should be bound to its own worker, so that USB
+       requests to this interface are serialized, while requests to distinct
+       interfaces may run concurrently with no event loop stall.
+
+       The dedicated I/O thread, if any, is started on the first request,
+       and is stopped on :py:meth:`shutdown`, so that the worker may be used
+       again once the interface is reopened.
+
+       :param executor: an optional executor to run the blocking requests,
+                        default to a dedicated single I/O thread
+    """
+
+    def __init__(self, executor: Optional[Executor] = None):
+        self._own_executor = executor is None
+        self._executor = executor
+
+    @property
+    def executor(self) -> Executor:
+        """Return the executor which runs the blocking requests.
+
+           :return: the executor
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='pyftdi-aio')
+        return self._executor
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Execute a blocking call out of the event loop.
+
+           :param func: the blocking callable
+           :return: the callable return value
+        """
+        loop = get_running_loop()
+        return await loop.run_in_executor(self.executor,
+                                          partial(func, *args, **kwargs))
+
+    async def shutdown(self) -> None:
+        """Release the executor, if it is owned by this worker.
+
+           The executor thread is joined from the default executor of the
+           event loop, which is never blocked.
+        """
+        if not self._own_executor or self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        loop = get_running_loop()
+        await loop.run_in_executor(None, executor.shutdown)
+
+
+class AsyncFtdi:
+    """asyncio front-end for an FTDI interface.
+
+       All USB requests are executed in the I/O worker, so that the caller
+       event loop is never blocked.
+
+       :param ftdi: an optional Ftdi instance to wrap
+       :param executor: an optional executor to run the blocking requests,
+                        default to a dedicated single I/O thread
+    """
+
+    def __init__(self, ftdi: Optional[Ftdi] = None,
+                 executor: Optional[Executor] = None):
+        self._ftdi = ftdi or Ftdi()
+        self._worker = AsyncIoWorker(executor)
+
+    @property
+    def ftdi(self) -> Ftdi:
+        """Return the wrapped Ftdi instance.
+
+           :return: the Ftdi instance
+        """
+        return self._ftdi
+
+    async def open_from_url(self, url: str) -> None:
+        """Open a new interface to the specified FTDI device.
+
+           :param url: a FTDI URL selector
+        """
+        await self._worker.run(self._ftdi.open_from_url, url)
+
+    async def open_mpsse_from_url(self, url: str, **kwargs) -> float:
+        """Open a new interface to the specified FTDI device in MPSSE mode.
+
+           See :py:meth:`Ftdi.open_mpsse_from_url` for arguments.
+
+           :param url: a FTDI URL selector
+           :return: actual bus frequency in Hz
+        """
+        return await self._worker.run(self._ftdi.open_mpsse_from_url, url,
+                                      **kwargs)
+
+    async def open_bitbang_from_url(self, url: str, **kwargs) -> float:
+        """Open a new interface to the specified FTDI device in bitbang mode.
+
+           See :py:meth:`Ftdi.open_bitbang_from_url` for arguments.
+
+           :param url: a FTDI URL selector
+           :return: actual bitbang baudrate in bps
+        """
+        return await self._worker.run(self._ftdi.open_bitbang_from_url, url,
+                                      **kwargs)
+
+    async def close(self, freeze: bool = False) -> None:
+        """Close the FTDI interface, and release the I/O worker.
+
+           :param freeze: if set, FTDI port is not reset to its default
+                          state on close.
+        """
+        await self._worker.run(self._ftdi.close, freeze)
+        await self._worker.shutdown()
+
+    async def set_baudrate(self, baudrate: int,
+                           constrain: bool = True) -> int:
+        """Change the current UART or BitBang baudrate.
+
+           :param baudrate: the new baudrate for the UART
+           :param constrain: whether to validate baudrate is in RS232 range
+           :return: actual baudrate
+        """
+        return await self._worker.run(self._ftdi.set_baudrate, baudrate,
+                                      constrain)
+
+    async def set_frequency(self, frequency: float) -> float:
+        """Change the current MPSSE bus frequency.
+
+           :param frequency: the new frequency in Hz
+           :return: actual bus frequency in Hz
+        """
+        return await self._worker.run(self._ftdi.set_frequency, frequency)
+
+    async def poll_modem_status(self) -> int:
+        """Poll modem status information.
+
+           :return: the modem status, as a proprietary bitfield
+        """
+        return await self._worker.run(self._ftdi.poll_modem_status)
+
+    async def purge_buffers(self) -> None:
+        """Clear the buffers on the chip and the internal read buffer."""
+        await self._worker.run(self._ftdi.purge_buffers)
+
+    async def write_data(self, data: Union[bytes, bytearray]) -> int:
+        """Write data to the FTDI port.
+
+           :param data: the data to send
+           :return: count of written bytes
+        """
+        return await self._worker.run(self._ftdi.write_data, data)
+
+    async def read_data(self, size: int) -> bytes:
+        """Read data from the FTDI port.
+
+           :param size: the number of bytes to received from the device
+           :return: payload bytes
+        """
+        return await self._worker.run(self._ftdi.read_data, size)
+
+    async def read_data_bytes(self, size: int, attempt: int = 1) -> bytes:
+        """Read data from the FTDI port.
+
+           :param size: the number of bytes to received from the device
+           :param attempt: attempt cycle count
+           :return: payload bytes, as bytes
+        """
+        return await self._worker.run(self._ftdi.read_data_bytes, size,
+                                      attempt)
+
+    async def read_data_into(self, buf: Union[bytearray, memoryview],
+                             size: Optional[int] = None,
+                             attempt: int = 1) -> int:
+        """Read data from the FTDI port into a caller-provided buffer.
+
+           :param buf: the destination buffer
+           :param size: the number of bytes to receive from the device,
+                        default to the size of the destination buffer
+           :param attempt: attempt cycle count
+           :return: the count of received bytes
+        """
+        return await self._worker.run(self._ftdi.read_data_into, buf, size,
+                                      attempt)
+
+
+class AsyncSpiPort:
+    """asyncio front-end for a SPI port.
+
+       An AsyncSpiPort is never instanciated directly: use
+       :py:meth:`AsyncSpiController.get_port()` method to obtain a port.
+    """
+
+    def __init__(self, port: SpiPort, worker: AsyncIoWorker):
+        self._port = port
+        self._worker = worker
+
+    @property
+    def port(self) -> SpiPort:
+        """Return the wrapped, synchronous SPI port.
+
+           :return: the SPI port
+        """
+        return self._port
+
+    async def exchange(self,
+                       out: Union[bytes, bytearray, Iterable[int]] = b'',
+                       readlen: int = 0, start: bool = True,
+                       stop: bool = True, duplex: bool = False,
+                       droptail: int = 0) -> bytes:
+        """Perform an exchange or a transaction with the SPI slave.
+
+           See :py:meth:`SpiPort.exchange` for arguments.
+
+           :return: data read out from the slave
+        """
+        return await self._worker.run(self._port.exchange, out, readlen,
+                                      start, stop, duplex, droptail)
+
+    async def read(self, readlen: int = 0, start: bool = True,
+                   stop: bool = True, droptail: int = 0) -> bytes:
+        """Read out bytes from the slave.
+
+           See :py:meth:`SpiPort.read` for arguments.
+
+           :return: data read out from the slave
+        """
+        return await self._worker.run(self._port.read, readlen, start, stop,
+                                      droptail)
+
+    async def write(self, out: Union[bytes, bytearray, Iterable[int]],
+                    start: bool = True, stop: bool = True,
+                    droptail: int = 0) -> None:
+        """Write bytes to the slave.
+
+           See :py:meth:`SpiPort.write` for arguments.
+        """
+        await self._worker.run(self._port.write, out, start, stop, droptail)
+
+
+class AsyncSpiController:
+    """asyncio front-end for a SPI master.
+
+       See :py:class:`SpiController` for arguments.
+
+       :param executor: an optional executor to run the blocking requests,
+                        default to a dedicated single I/O thread
+    """
+
+    def __init__(self, cs_count: int = 1, turbo: bool = True,
+                 executor: Optional[Executor] = None):
+        self._controller = SpiController(cs_count, turbo)
+        self._worker = AsyncIoWorker(executor)
+
+    @property
+    def controller(self) -> SpiController:
+        """Return the wrapped, synchronous SPI controller.
+
+           :return: the SPI controller
+        """
+        return self._controller
+
+    async def configure(self, url: str, **kwargs) -> None:
+        """Configure the FTDI interface as a SPI master.
+
+           See :py:meth:`SpiController.configure` for arguments.
+
+           :param url: FTDI URL string, such as ``ftdi://ftdi:232h/1``
+        """
+        await self._worker.run(self._controller.configure, url, **kwargs)
+
+    async def close(self, freeze: bool = False) -> None:
+        """Close the FTDI interface, and release the I/O worker.
+
+           :param freeze: if set, FTDI port is not reset to its default
+                          state on close.
+        """
+        await self._worker.run(self._controller.close, freeze)
+        await self._worker.shutdown()
+
+    def get_port(self, cs: int, freq: Optional[float] = None,
+                 mode: int = 0) -> AsyncSpiPort:
+        """Obtain a SPI port to drive a SPI device selected by Chip Select.
+
+           :param cs: chip select slot, starting from 0
+           :param freq: SPI bus frequency for this slave in Hz
+           :param mode: SPI mode [0, 1, 2, 3]
+           :return: an asynchronous SPI port
+        """
+        return AsyncSpiPort(self._controller.get_port(cs, freq, mode),
+                            self._worker)
+
+
+class AsyncI2cPort:
+    """asyncio front-end for an I2c port.
+
+       An AsyncI2cPort is never instanciated directly: use
+       :py:meth:`AsyncI2cController.get_port()` method to obtain a port.
+    """
+
+    def __init__(self, port: I2cPort, worker: AsyncIoWorker):
+        self._port = port
+        self._worker = worker
+
+    @property
+    def port(self) -> I2cPort:
+        """Return the wrapped, synchronous I2c port.
+
+           :return: the I2c port
+        """
+        return self._port
+
+    async def read(self, readlen: int = 0, relax: bool = True,
+                   start: bool = True) -> bytes:
+        """Read one or more bytes from a remote slave.
+
+           See :py:meth:`I2cPort.read` for arguments.
+
+           :return: data read out from the slave
+        """
+        return await self._worker.run(self._port.read, readlen, relax, start)
+
+    async def write(self, out: Union[bytes, bytearray, Iterable[int]],
+                    relax: bool = True, start: bool = True) -> None:
+        """Write one or more bytes to a remote slave.
+
+           See :py:meth:`I2cPort.write` for arguments.
+        """
+        await self._worker.run(self._port.write, out, relax, start)
+
+    async def read_from(self, regaddr: int, readlen: int = 0,
+                        relax: bool = True, start: bool = True) -> bytes:
+        """Read one or more bytes from a remote slave register.
+
+           See :py:meth:`I2cPort.read_from` for arguments.
+
+           :return: data read out from the slave
+        """
+        return await self._worker.run(self._port.read_from, regaddr, readlen,
+                                      relax, start)
+
+    async def write_to(self, regaddr: int,
+                       out: Union[bytes, bytearray, Iterable[int]],
+                       relax: bool = True, start: bool = True) -> None:
+        """Write one or more bytes to a remote slave register.
+
+           See :py:meth:`I2cPort.write_to` for arguments.
+        """
+        await self._worker.run(self._port.write_to, regaddr, out, relax,
+                               start)
+
+    async def exchange(self,
+                       out: Union[bytes, bytearray, Iterable[int]] = b'',
+                       readlen: int = 0, relax: bool = True,
+                       start: bool = True) -> bytes:
+        """Perform an exchange or a transaction with the I2c slave.
+
+           See :py:meth:`I2cPort.exchange` for arguments.
+
+           :return: data read out from the slave
+        """
+        return await self._worker.run(self._port.exchange, out, readlen,
+                                      relax, start)
+
+    async def poll(self, write: bool = False, relax: bool = True,
+                   start: bool = True) -> bool:
+        """Poll a remote slave, expect ACK or NACK.
+
+           See :py:meth:`I2cPort.poll` for arguments.
+
+           :return: True if the slave acknowledged, False otherwise
+        """
+        return await self._worker.run(self._port.poll, write, relax, start)
+
+
+class AsyncI2cController:
+    """asyncio front-end for an I2c master.
+
+       :param executor: an optional executor to run the blocking requests,
+                        default to a dedicated single I/O thread
+    """
+
+    def __init__(self, executor: Optional[Executor] = None):
+        self._controller = I2cController()
+        self._worker = AsyncIoWorker(executor)
+
+    @property
+    def controller(self) -> I2cController:
+        """Return the wrapped, synchronous I2c controller.
+
+           :return: the I2c controller
+        """
+        return self._controller
+
+    async def configure(self, url: str, **kwargs) -> None:
+        """Configure the FTDI interface as a I2c master.
+
+           See :py:meth:`I2cController.configure` for arguments.
+
+           :param url: FTDI URL string, such as ``ftdi://ftdi:232h/1``
+        """
+        await self._worker.run(self._controller.configure, url, **kwargs)
+
+    async def close(self, freeze: bool = False) -> None:
+        """Close the FTDI interface, and release the I/O worker.
+
+           :param freeze: if set, FTDI port is not reset to its default
+                          state on close.
+        """
+        await self._worker.run(self._controller.close, freeze)
+        await self._worker.shutdown()
+
+    def get_port(self, address: int) -> AsyncI2cPort:
+        """Obtain an I2cPort to drive an I2c slave.
+
+           :param address: the address on the I2c bus
+           :return: an asynchronous I2cPort
+        """
+        return AsyncI2cPort(self._controller.get_port(address), self._worker)
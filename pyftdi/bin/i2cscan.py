@@ -17,7 +17,7 @@ from sys import modules, stderr
 from traceback import format_exc
 from pyftdi import FtdiLogger
 from pyftdi.ftdi import Ftdi
-from pyftdi.i2c import I2cController, I2cNackError
+from pyftdi.i2c import I2cController
 from pyftdi.misc import add_custom_devices
 
 
@@ -25,10 +25,10 @@ class I2cBusScanner:
     """Scan I2C bus to find slave.
 
        Emit the I2C address message, but no data. Detect any ACK on each valid
-       address.
+       address. All addresses are probed with a single USB round-trip.
     """
 
-    SMB_READ_RANGE = list(range(0x30, 0x38)) + list(range(0x50, 0x60))
+    SMB_READ_RANGE = I2cController.SMB_READ_RANGE
 
     HIGHEST_I2C_SLAVE_ADDRESS = 0x78
 
@@ -41,37 +41,15 @@ class I2cBusScanner:
                             mode.
         """
         i2c = I2cController()
-        slaves = []
         getLogger('pyftdi.i2c').setLevel(ERROR)
         try:
-            i2c.set_retry_count(1)
             i2c.configure(url)
-            for addr in range(cls.HIGHEST_I2C_SLAVE_ADDRESS+1):
-                port = i2c.get_port(addr)
-                if smb_mode:
-                    try:
-                        if addr in cls.SMB_READ_RANGE:
-                            port.read(0)
-                            slaves.append('R')
-                        else:
-                            port.write([])
-                            slaves.append('W')
-                    except I2cNackError:
-                        slaves.append('.')
-                else:
-                    try:
-                        port.read(0)
-                        slaves.append('R')
-                        continue
-                    except I2cNackError:
-                        pass
-                    try:
-                        port.write([])
-                        slaves.append('W')
-                    except I2cNackError:
-                        slaves.append('.')
+            found = i2c.scan(range(cls.HIGHEST_I2C_SLAVE_ADDRESS+1),
+                             'smb' if smb_mode else 'any')
         finally:
             i2c.terminate()
+        slaves = [found.get(addr, '.')
+                  for addr in range(cls.HIGHEST_I2C_SLAVE_ADDRESS+1)]
         columns = 16
         row = 0
         print('   %s' % ''.join(' %01X ' % col for col in range(columns)))
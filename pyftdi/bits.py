@@ -7,13 +7,36 @@
 """Bit field and sequence management."""
 
 from typing import Iterable, List, Optional, Tuple, Union
-from .misc import is_iterable, xor
+from .misc import is_iterable
 
 #pylint: disable-msg=invalid-name
 #pylint: disable-msg=unneeded-not
 #pylint: disable-msg=too-many-branches
 #pylint: disable-msg=too-many-arguments
 #pylint: disable-msg=duplicate-key
+#pylint: disable-msg=protected-access
+
+
+def _make_table(mapping: dict, default: int) -> bytes:
+    """Build a 256-entry bytes.translate table"""
+    return bytes(mapping.get(x, default) for x in range(256))
+
+
+# high-Z marker, as exposed in bit sequences
+_Z = 0xff
+# boolean bit value to binary digit, high-Z is reported as a 0 value
+_BOOL2CHR = _make_table({1: ord('1')}, ord('0'))
+# high-Z bit value to binary digit, used to build the high-Z mask
+_Z2CHR = _make_table({_Z: ord('1')}, ord('0'))
+# binary digit to boolean bit value
+_CHR2BOOL = _make_table({ord('1'): 1}, 0)
+# high-Z binary digit to high-Z bit value
+_CHR2Z = _make_table({ord('1'): _Z}, 0)
+# tri-state bit value to binary digit
+_ZSEQ2CHR = _make_table({1: ord('1'), _Z: ord('Z')}, ord('0'))
+# bit-reversed byte values
+_REVERSE_BITS = bytes(int('{:08b}'.format(x)[::-1], 2) for x in range(256))
+
 
 class BitSequenceError(Exception):
     """Bit sequence error"""
@@ -30,6 +53,10 @@ class BitSequence:
        Can be initialized with another bit sequence, a integral value,
        a sequence of bytes or an iterable of common boolean values.
 
+       Bits are packed into a Python integer, where the first bit of the
+       sequence is the least significant bit of the integer, so that slicing,
+       concatenation and conversions do not need to iterate over each bit.
+
        :param value:  initial value
        :param msb:    most significant bit first or not
        :param length: count of signficant bits in the bit sequence
@@ -37,30 +64,23 @@ class BitSequence:
        :param msby:   most significant byte first or not
     """
 
+    _SMAP = {'0': 0, '1': 1, False: 0, True: 1, 0: 0, 1: 1}
+
     def __init__(self, value: Union['BitSequence', str, int] = None,
                  msb: bool = False, length: int = 0,
                  bytes_: Optional[bytes] = None, msby: bool = True):
         """Instantiate a new bit sequence.
         """
-        self._seq = bytearray()
-        seq = self._seq
+        # packed bit values
+        self._int = 0
+        # packed high-Z bit flags, only used with tri-state sequences
+        self._z = 0
+        self._len = 0
         if value and bytes_:
             raise BitSequenceError("Cannot inialize with both a value and "
                                    "bytes")
         if bytes_:
-            provider = list(bytes_).__iter__() if msby else reversed(bytes_)
-            for byte in provider:
-                if isinstance(byte, str):
-                    byte = ord(byte)
-                elif byte > 0xff:
-                    raise BitSequenceError("Invalid byte value")
-                b = []
-                for _ in range(8):
-                    b.append(bool(byte & 0x1))
-                    byte >>= 1
-                if msb:
-                    b.reverse()
-                seq.extend(b)
+            self._init_from_bytes(bytes_, msb, msby)
         else:
             value = self._tomutable(value)
         if isinstance(value, int):
@@ -77,68 +97,80 @@ class BitSequence:
 
     def sequence(self) -> bytearray:
         """Return the internal representation as a new mutable sequence"""
-        return bytearray(self._seq)
+        if not self._len:
+            return bytearray()
+        seq = bytearray(format(self._int, '0%db' % self._len), 'ascii')
+        seq.reverse()
+        seq = seq.translate(_CHR2BOOL)
+        if self._z:
+            zseq = bytearray(format(self._z, '0%db' % self._len), 'ascii')
+            zseq.reverse()
+            # high-Z bits are always stored as zero value bits
+            zval = int.from_bytes(zseq.translate(_CHR2Z), 'big')
+            seq = bytearray((int.from_bytes(seq, 'big') | zval).to_bytes(
+                self._len, 'big'))
+        return seq
 
     def reverse(self) -> 'BitSequence':
         """In-place reverse"""
-        self._seq.reverse()
+        self._int = self._reverse_int(self._int, self._len)
+        if self._z:
+            self._z = self._reverse_int(self._z, self._len)
         return self
 
     def invert(self) -> 'BitSequence':
         """In-place invert sequence values"""
-        self._seq = bytearray([x ^ 1 for x in self._seq])
+        self._int ^= self._mask
         return self
 
     def append(self, seq) -> 'BitSequence':
         """Concatenate a new BitSequence"""
         if not isinstance(seq, BitSequence):
             seq = BitSequence(seq)
-        self._seq.extend(seq.sequence())
+        self._int |= seq._int << self._len
+        self._z |= seq._z << self._len
+        self._len += seq._len
         return self
 
     def lsr(self, count: int) -> None:
         """Left shift rotate"""
         count %= len(self)
-        self._seq[:] = self._seq[count:] + self._seq[:count]
+        self._int = self._rotate_int(self._int, count)
+        self._z = self._rotate_int(self._z, count)
 
     def rsr(self, count: int) -> None:
         """Right shift rotate"""
         count %= len(self)
-        self._seq[:] = self._seq[-count:] + self._seq[:-count]
+        self._int = self._rotate_int(self._int, self._len-count)
+        self._z = self._rotate_int(self._z, self._len-count)
 
     def tobit(self) -> bool:
         """Degenerate the sequence into a single bit, if possible"""
         if len(self) != 1:
             raise BitSequenceError("BitSequence should be a scalar")
-        return bool(self._seq[0])
+        return bool(self._int | self._z)
 
     def tobyte(self, msb: bool = False) -> int:
         """Convert the sequence into a single byte value, if possible"""
         if len(self) > 8:
             raise BitSequenceError("Cannot fit into a single byte")
-        byte = 0
-        pos = -1 if not msb else 0
-        # copy the sequence
-        seq = self._seq[:]
-        while seq:
-            byte <<= 1
-            byte |= seq.pop(pos)
-        return byte
+        if msb:
+            return self._reverse_int(self._int, self._len)
+        return self._int
 
     def tobytes(self, msb: bool = False, msby: bool = False) -> bytearray:
         """Convert the sequence into a sequence of byte values"""
-        blength = (len(self)+7) & (~0x7)
-        sequence = list(self._seq)
-        if not msb:
-            sequence.reverse()
-        bytes_ = bytearray()
-        for pos in range(0, blength, 8):
-            seq = sequence[pos:pos+8]
-            byte = 0
-            while seq:
-                byte <<= 1
-                byte |= seq.pop(0)
-            bytes_.append(byte)
+        value = self._int
+        if msb:
+            value = self._reverse_int(value, self._len)
+        # the first byte holds the most significant bits, any incomplete
+        # trailing byte holds the least significant, right-aligned bits
+        bcount, rem = divmod(self._len, 8)
+        if rem:
+            bytes_ = bytearray((value >> rem).to_bytes(bcount, 'big'))
+            bytes_.append(value & ((1 << rem)-1))
+        else:
+            bytes_ = bytearray(value.to_bytes(bcount, 'big'))
         if msby:
             bytes_.reverse()
         return bytes_
@@ -150,66 +182,140 @@ class BitSequence:
             # convert immutable sequence into a list so it can be popped out
             value = list(value)
         elif isinstance(value, str):
-            # convert immutable sequence into a list so it can be popped out
+            # binary strings are directly decoded, only remove the prefix
             if value.startswith('0b'):
-                value = list(value[2:])
-            else:
-                value = list(value)
+                value = value[2:]
         return value
 
+    @property
+    def _mask(self) -> int:
+        return (1 << self._len)-1
+
+    @staticmethod
+    def _reverse_int(value: int, length: int) -> int:
+        """Reverse the order of the length LSBs of an integer"""
+        if not length:
+            return 0
+        bcount = (length+7)//8
+        rev = value.to_bytes(bcount, 'little').translate(_REVERSE_BITS)
+        return int.from_bytes(rev, 'big') >> (8*bcount-length)
+
+    def _rotate_int(self, value: int, count: int) -> int:
+        """Rotate an integer toward its LSB, over the sequence length"""
+        return ((value >> count) | (value << (self._len-count))) & self._mask
+
+    def _clone(self, value: int, zmask: int, length: int) -> 'BitSequence':
+        """Create a new sequence of the same type from packed values"""
+        seq = self.__class__()
+        seq._int = value
+        seq._z = zmask
+        seq._len = length
+        return seq
+
+    def _init_from_bytes(self, bytes_: Iterable, msb: bool,
+                         msby: bool) -> None:
+        """Initialize from a sequence of bytes"""
+        try:
+            data = bytes(bytes_)
+        except (TypeError, ValueError):
+            data = bytearray()
+            for byte in bytes_:
+                if isinstance(byte, str):
+                    byte = ord(byte)
+                if byte > 0xff:
+                    raise BitSequenceError("Invalid byte value") from None
+                data.append(byte)
+        if msb:
+            data = data.translate(_REVERSE_BITS)
+        value = int.from_bytes(data, 'little' if msby else 'big')
+        self._int |= value << self._len
+        self._len += 8*len(data)
+
     def _init_from_integer(self, value: int, msb: bool, length: int) -> None:
         """Initialize from any integer value"""
-        bl = length or -1
-        seq = self._seq
-        while bl:
-            seq.append(bool(value & 1))
-            value >>= 1
-            if not value:
-                break
-            bl -= 1
+        if length:
+            # negative values are encoded as two's complement
+            count = length
+            value &= (1 << count)-1
+        elif value < 0:
+            raise BitSequenceError("Cannot initialize from a negative value "
+                                   "without a length")
+        else:
+            count = max(1, value.bit_length())
+        self._int |= value << self._len
+        self._len += count
         if msb:
-            seq.reverse()
+            self.reverse()
 
     def _init_from_iterable(self, iterable: Iterable, msb: bool) -> None:
         """Initialize from an iterable"""
-        smap = {'0': 0, '1': 1, False: 0, True: 1, 0: 0, 1: 1}
-        seq = self._seq
+        if isinstance(iterable, str) and not iterable.strip('01'):
+            # fast path for binary strings
+            if iterable:
+                self._int = int(iterable if msb else iterable[::-1], 2)
+            self._len = len(iterable)
+            return
+        smap = self._SMAP
         try:
             if msb:
-                seq.extend([smap[bit] for bit in reversed(iterable)])
+                seq = bytearray([smap[bit] for bit in reversed(iterable)])
             else:
-                seq.extend([smap[bit] for bit in iterable])
+                seq = bytearray([smap[bit] for bit in iterable])
         except KeyError as exc:
             raise BitSequenceError('Invalid binary character in initializer') \
                     from exc
+        self._init_from_seq(seq)
+
+    def _init_from_seq(self, seq: Union[bytes, bytearray]) -> None:
+        """Initialize from a sequence of bit values, one per byte"""
+        self._len = len(seq)
+        if not seq:
+            self._int = self._z = 0
+            return
+        rseq = bytes(reversed(seq))
+        self._int = int(rseq.translate(_BOOL2CHR), 2)
+        self._z = int(rseq.translate(_Z2CHR), 2) if _Z in rseq else 0
 
     def _init_from_sibling(self, value: 'BitSequence', msb: bool) -> None:
         """Initialize from a fellow object"""
-        self._seq = value.sequence()
+        self._int = value._int
+        self._z = value._z
+        self._len = value._len
         if msb:
-            self._seq.reverse()
+            self.reverse()
 
     def _update_length(self, length, msb):
         """If a specific length is specified, extend the sequence as
            expected"""
         if length and (len(self) < length):
-            extra = bytearray([False] * (length-len(self)))
             if msb:
-                extra.extend(self._seq)
-                self._seq = extra
-            else:
-                self._seq.extend(extra)
+                extra = length-len(self)
+                self._int <<= extra
+                self._z <<= extra
+            self._len = length
 
     def __iter__(self):
-        return self._seq.__iter__()
+        return self.sequence().__iter__()
 
     def __reversed__(self):
-        return self._seq.__reversed__()
+        return self.sequence().__reversed__()
 
     def __getitem__(self, index):
         if isinstance(index, slice):
-            return self.__class__(value=self._seq[index])
-        return self._seq[index]
+            start, stop, step = index.indices(self._len)
+            if step != 1:
+                return self.__class__(value=self.sequence()[index])
+            length = max(0, stop-start)
+            mask = (1 << length)-1
+            return self._clone((self._int >> start) & mask,
+                               (self._z >> start) & mask, length)
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError('BitSequence index out of range')
+        if (self._z >> index) & 1:
+            return _Z
+        return (self._int >> index) & 1
 
     def __setitem__(self, index, value):
         if isinstance(value, BitSequence):
@@ -218,18 +324,33 @@ class BitSequence:
                 raise BitSequenceError("Cannot set item with instance of a "
                                        "subclass")
         if isinstance(index, slice):
-            value = self.__class__(value, length=len(self._seq[index]))
-            self._seq[index] = value.sequence()
+            start, stop, step = index.indices(self._len)
+            length = len(range(start, stop, step))
+            value = self.__class__(value, length=length)
+            if step != 1 or len(value) != length:
+                seq = self.sequence()
+                seq[index] = value.sequence()
+                self._init_from_seq(seq)
+                return
+            mask = ((1 << length)-1) << start
+            self._int = (self._int & ~mask) | (value._int << start)
+            self._z = (self._z & ~mask) | (value._z << start)
         else:
             if not isinstance(value, BitSequence):
                 value = self.__class__(value)
-            val = value.tobit()
-            if index > len(self._seq):
+            value.tobit()
+            if index > len(self):
                 raise BitSequenceError("Cannot change the sequence size")
-            self._seq[index] = val
+            if index < 0:
+                index += self._len
+            if not 0 <= index < self._len:
+                raise IndexError('BitSequence index out of range')
+            mask = 1 << index
+            self._int = (self._int & ~mask) | (value._int << index)
+            self._z = (self._z & ~mask) | (value._z << index)
 
     def __len__(self):
-        return len(self._seq)
+        return self._len
 
     def __eq__(self, other):
         return self._cmp(other) == 0
@@ -254,14 +375,18 @@ class BitSequence:
         ld = len(self) - len(other)
         if ld:
             return ld
-        for n, (x, y) in enumerate(zip(self._seq, other.sequence()), start=1):
-            if xor(x, y):
-                return n
-        return 0
+        if not isinstance(other, BitSequence):
+            other = BitSequence(other)
+        # high-Z bits are considered as true values
+        diff = (self._int | self._z) ^ (other._int | other._z)
+        # position of the first different bit, starting from 1
+        return (diff & -diff).bit_length()
 
     def __repr__(self):
         # cannot use bin() as it truncates the MSB zero bits
-        return ''.join([b and '1' or '0' for b in reversed(self._seq)])
+        if not self._len:
+            return ''
+        return format(self._int, '0%db' % self._len)
 
     def __str__(self):
         chunks = []
@@ -276,60 +401,45 @@ class BitSequence:
         return '%d: %s' % (len(self), ' '.join(reversed(chunks)))
 
     def __int__(self):
-        value = 0
-        for b in reversed(self._seq):
-            value <<= 1
-            value |= b and 1
-        return value
+        return self._int
 
     def __and__(self, other):
         if not isinstance(other, self.__class__):
             raise BitSequenceError('Need a BitSequence to combine')
         if len(self) != len(other):
             raise BitSequenceError('Sequences must be the same size')
-        return self.__class__(value=list(map(lambda x, y: x and y,
-                                             self._seq, other.sequence())))
+        return self._clone(self._int & other._int, 0, self._len)
 
     def __or__(self, other):
         if not isinstance(other, self.__class__):
             raise BitSequenceError('Need a BitSequence to combine')
         if len(self) != len(other):
             raise BitSequenceError('Sequences must be the same size')
-        return self.__class__(value=list(map(lambda x, y: x or y,
-                                             self._seq, other.sequence())))
+        return self._clone(self._int | other._int, 0, self._len)
 
     def __add__(self, other):
-        return self.__class__(value=self._seq + other.sequence())
+        seq = self._clone(self._int, self._z, self._len)
+        return seq.append(other)
 
     def __ilshift__(self, count):
         count %= len(self)
-        seq = bytearray([0]*count)
-        seq.extend(self._seq[:-count])
-        self._seq = seq
+        self._int = (self._int << count) & self._mask
+        self._z = (self._z << count) & self._mask
         return self
 
     def __irshift__(self, count):
         count %= len(self)
-        seq = self._seq[count:]
-        seq.extend([0]*count)
-        self._seq = seq
+        self._int >>= count
+        self._z >>= count
         return self
 
     def inc(self) -> None:
         """Increment the sequence"""
-        for p, b in enumerate(self._seq):
-            b ^= True
-            self._seq[p] = b
-            if b:
-                break
+        self._int = (self._int+1) & self._mask
 
     def dec(self) -> None:
         """Decrement the sequence"""
-        for p, b in enumerate(self._seq):
-            b ^= True
-            self._seq[p] = b
-            if not b:
-                break
+        self._int = (self._int-1) & self._mask
 
     def invariant(self) -> bool:
         """Tells whether all bits of the sequence are of the same value.
@@ -337,15 +447,14 @@ class BitSequence:
            Return the value, or ValueError if the bits are not of the same
            value
         """
-        try:
-            ref = self._seq[0]
-        except IndexError as exc:
-            raise ValueError('Empty sequence') from exc
-        if len(self._seq) == 1:
-            return ref
-        for b in self._seq[1:]:
-            if b != ref:
+        if not self._len:
+            raise ValueError('Empty sequence')
+        ref = self[0]
+        if ref == _Z:
+            if self._z != self._mask:
                 raise ValueError('Bits do no match')
+        elif self._z or self._int != (self._mask if ref else 0):
+            raise ValueError('Bits do no match')
         return ref
 
 
@@ -359,16 +468,16 @@ class BitZSequence(BitSequence):
        :param length: count of signficant bits in the bit sequence
     """
 
-    __slots__ = ['_seq']
+    Z = _Z  # maximum byte value
 
-    Z = 0xff  # maximum byte value
+    _SMAP = {'0': 0, '1': 1, 'Z': _Z, False: 0, True: 1, None: _Z,
+             0: 0, 1: 1, _Z: _Z}
 
     def __init__(self, value=None, msb=False, length=0):
         BitSequence.__init__(self, value=value, msb=msb, length=length)
 
     def invert(self):
-        self._seq = [x in (None, BitZSequence.Z) and BitZSequence.Z or x ^ 1
-                     for x in self._seq]
+        self._int = (self._int ^ self._mask) & ~self._z
         return self
 
     def tobyte(self, msb=False):
@@ -386,34 +495,17 @@ class BitZSequence(BitSequence):
         ld = len(self) - len(other)
         if ld:
             return ld
-        for (x, y) in zip(self._seq, other.sequence()):
-            if BitZSequence.Z in (x, y):
-                continue
-            if x is not y:
-                return False
-        return True
-
-    def _init_from_iterable(self, iterable, msb):
-        """Initialize from an iterable"""
-        smap = {'0': 0, '1': 1, 'Z': BitZSequence.Z,
-                False: 0, True: 1, None: BitZSequence.Z,
-                0: 0, 1: 1, BitZSequence.Z: BitZSequence.Z}
-        seq = self._seq
-        try:
-            if msb:
-                seq.extend([smap[bit] for bit in reversed(iterable)])
-            else:
-                seq.extend([smap[bit] for bit in iterable])
-        except KeyError as exc:
-            raise BitSequenceError("Invalid binary character in initializer") \
-                    from exc
+        # only compare bits which are not in high-Z state
+        care = ~(self._z | other._z) & self._mask
+        return not (self._int ^ other._int) & care
 
     def __repr__(self):
-        smap = {False: '0', True: '1', BitZSequence.Z: 'Z'}
-        return ''.join([smap[b] for b in reversed(self._seq)])
+        seq = self.sequence()
+        seq.reverse()
+        return seq.translate(_ZSEQ2CHR).decode()
 
     def __int__(self):
-        if BitZSequence.Z in self._seq:
+        if self._z:
             raise BitSequenceError("High-Z BitSequence cannot be converted to "
                                    "an integral type")
         return BitSequence.__int__(self)
@@ -423,7 +515,8 @@ class BitZSequence(BitSequence):
         ld = len(self) - len(other)
         if ld:
             return ld
-        for n, (x, y) in enumerate(zip(self._seq, other.sequence()), start=1):
+        for n, (x, y) in enumerate(zip(self.sequence(), other.sequence()),
+                                   start=1):
             if x is not y:
                 return n
         return 0
@@ -434,14 +527,9 @@ class BitZSequence(BitSequence):
                                    'combine')
         if len(self) != len(other):
             raise BitSequenceError('Sequences must be the same size')
-
-        def andz(x, y):
-            """Compute the boolean AND operation for a tri-state boolean"""
-            if BitZSequence.Z in (x, y):
-                return BitZSequence.Z
-            return x and y
-        return self.__class__(
-            value=list(map(andz, self._seq, other.sequence())))
+        # any high-Z input bit yields a high-Z output bit
+        zmask = self._z | other._z
+        return self._clone(self._int & other._int & ~zmask, zmask, self._len)
 
     def __or__(self, other):
         if not isinstance(self, BitSequence):
@@ -449,14 +537,10 @@ class BitZSequence(BitSequence):
                                    'combine')
         if len(self) != len(other):
             raise BitSequenceError('Sequences must be the same size')
-
-        def orz(x, y):
-            """Compute the boolean OR operation for a tri-state boolean"""
-            if BitZSequence.Z in (x, y):
-                return BitZSequence.Z
-            return x or y
-        return self.__class__(value=list(map(orz, self._seq,
-                                             other.sequence())))
+        # any high-Z input bit yields a high-Z output bit
+        zmask = self._z | other._z
+        return self._clone((self._int | other._int) & ~zmask, zmask,
+                           self._len)
 
     def __rand__(self, other):
         return self.__and__(other)
@@ -8,18 +8,22 @@
 
 from binascii import hexlify
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from enum import IntEnum, unique
 from errno import ENODEV
 from logging import getLogger, DEBUG
+from queue import Empty, Full, Queue
 from struct import unpack as sunpack
 from sys import platform
-from typing import Callable, Optional, List, Sequence, TextIO, Tuple, Union
+from threading import Thread
+from typing import (Callable, Iterator, Optional, List, Sequence, TextIO,
+                    Tuple, Union)
 from usb.core import (Configuration as UsbConfiguration, Device as UsbDevice,
                       USBError)
 from usb.util import (build_request_type, release_interface, CTRL_IN, CTRL_OUT,
                       CTRL_TYPE_VENDOR, CTRL_RECIPIENT_DEVICE)
 from .misc import to_bool
-from .usbtools import UsbDeviceDescriptor, UsbTools
+from .usbtools import UsbDeviceDescriptor, UsbTools, _LibUsbBulkReader
 
 #pylint: disable-msg=invalid-name
 #pylint: disable-msg=too-many-arguments
@@ -328,6 +332,11 @@ class Ftdi:
         self._readbuffer = bytearray()
         self._readoffset = 0
         self._readbuffer_chunksize = 4 << 10  # 4KiB
+        self._rxbuffer = bytearray()
+        self._stream: Optional[Thread] = None
+        self._stream_q: Optional[Queue] = None
+        self._stream_resume = False
+        self._stream_error: Optional[Exception] = None
         self._writebuffer_chunksize = 4 << 10  # 4KiB
         self._max_packet_size = 0
         self._interface = None
@@ -360,6 +369,61 @@ class Ftdi:
         device.open_from_url(url)
         return device
 
+    @classmethod
+    def open_many(cls, urls: Sequence[str], mode: str = 'uart',
+                  max_workers: Optional[int] = None,
+                  **kwargs) -> List['Ftdi']:
+        """Create and open several Ftdi instances concurrently.
+
+           Opening a device involves many USB control requests, whose latency
+           adds up when many devices are opened one after another. Devices
+           are opened from a pool of threads, which only serialize requests
+           that target the same USB device.
+
+           If any device cannot be opened, all the devices are closed, and
+           the first error is raised.
+
+           :param urls: FTDI device selectors
+           :param mode: ``uart``, ``mpsse`` or ``bitbang``
+           :param max_workers: maximum count of devices to open in parallel,
+                               default to one thread per device
+           :param kwargs: extra arguments for the open method of the selected
+                          mode, i.e. :py:meth:`open_mpsse_from_url` or
+                          :py:meth:`open_bitbang_from_url`
+           :return: fresh, open Ftdi instances, in URL order
+        """
+        openers = {'uart': cls.open_from_url,
+                   'mpsse': cls.open_mpsse_from_url,
+                   'bitbang': cls.open_bitbang_from_url}
+        try:
+            opener = openers[mode]
+        except KeyError as exc:
+            raise ValueError('Unsupported mode: %s' % mode) from exc
+        if mode == 'uart' and kwargs:
+            raise ValueError('Unexpected arguments for UART mode')
+        devices = [cls() for _ in urls]
+        if not devices:
+            return devices
+        opened = False
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers or len(devices),
+                                    thread_name_prefix='Ftdi-Open') \
+                    as executor:
+                futures = [executor.submit(opener, device, url, **kwargs)
+                           for device, url in zip(devices, urls)]
+            for future in futures:
+                error = future.exception()
+                if error:
+                    raise error
+            opened = True
+            return devices
+        finally:
+            if not opened:
+                # a device that failed to open may still hold a USB device
+                # reference, close() is safe on partially open devices
+                for device in devices:
+                    device.close()
+
     @classmethod
     def list_devices(cls, url: Optional[str] = None) -> \
             List[Tuple[UsbDeviceDescriptor, int]]:
@@ -570,9 +634,11 @@ class Ftdi:
                           This feature should not be used except for very
                           specific needs.
         """
+        if self._stream:
+            self.stop_stream()
         if self._usb_dev:
             dev = self._usb_dev
-            if self._is_pyusb_handle_active():
+            if self._index is not None and self._is_pyusb_handle_active():
                 # Do not attempt to execute the following calls if the
                 # device has been closed: the ResourceManager may attempt
                 # to re-open the device that has been already closed, and
@@ -1226,6 +1292,7 @@ class Ftdi:
             if chunksize > 16384:
                 chunksize = 16384
         self._readbuffer_chunksize = chunksize
+        self._rxbuffer = bytearray(chunksize)
         self.log.debug('RX chunksize: %d', self._readbuffer_chunksize)
 
     def read_data_get_chunksize(self) -> int:
@@ -1823,17 +1890,17 @@ class Ftdi:
         # Packet size sanity check
         if not self._max_packet_size:
             raise FtdiError("max_packet_size is bogus")
-        packet_size = self._max_packet_size
         length = 1  # initial condition to enter the usb_read loop
         data = bytearray()
         # everything we want is still in the cache?
         if size <= len(self._readbuffer)-self._readoffset:
-            data = self._readbuffer[self._readoffset:self._readoffset+size]
+            data = bytearray(self._readbuffer[self._readoffset:
+                                              self._readoffset+size])
             self._readoffset += size
             return data
         # something still in the cache, but not enough to satisfy 'size'?
         if len(self._readbuffer)-self._readoffset != 0:
-            data = self._readbuffer[self._readoffset:]
+            data = bytearray(self._readbuffer[self._readoffset:])
             # end of readbuffer reached
             self._readoffset = len(self._readbuffer)
         # read from USB, filling in the local cache as it is empty
@@ -1861,22 +1928,8 @@ class Ftdi:
                         if self._latency_threshold:
                             self._adapt_latency(True)
                         # skip the status bytes
-                        chunks = (length+packet_size-1) // packet_size
-                        count = packet_size - 2
-                        # if you want to show status, use the following code:
-                        status = tempbuf[:2]
-                        if status[1] & self.ERROR_BITS[1]:
-                            self.log.error(
-                                'FTDI error: %02x:%02x %s',
-                                status[0], status[1], (' '.join(
-                                    self.decode_modem_status(status,
-                                                             True)).title()))
-                        self._readbuffer = bytearray()
+                        self._readbuffer = self._strip_status(tempbuf)
                         self._readoffset = 0
-                        srcoff = 2
-                        for _ in range(chunks):
-                            self._readbuffer += tempbuf[srcoff:srcoff+count]
-                            srcoff += packet_size
                         length = len(self._readbuffer)
                         break
                     # received buffer only contains the modem status bytes
@@ -1915,6 +1968,46 @@ class Ftdi:
         # never reached
         raise FtdiError("Internal error")
 
+    def read_data_view(self, size: int, attempt: int = 1) -> memoryview:
+        """Read data from the FTDI interface, without copying it.
+
+           This is a lower-overhead alternative to :py:meth:`read_data_bytes`
+           dedicated to streaming: the returned buffer is a view on the
+           internal receive buffer, where the modem status bytes have already
+           been stripped out.
+
+           At most one USB request is completed, so the returned view may be
+           shorter than the requested size, or even empty if no data has been
+           received within the attempt cycles.
+
+           The returned view is only valid till the next read request, its
+           content should be consumed or copied out before reading again.
+
+           :param size: the maximum number of bytes to received from the
+                        device
+           :param attempt: attempt cycle count
+           :return: payload bytes, as a memoryview
+        """
+        if not self._max_packet_size:
+            raise FtdiError("max_packet_size is bogus")
+        if self._readoffset >= len(self._readbuffer):
+            self._readbuffer = memoryview(b'')
+            self._readoffset = 0
+            for _ in range(attempt):
+                tempbuf = self._read()
+                if len(tempbuf) > 2:
+                    if self._latency_threshold:
+                        self._adapt_latency(True)
+                    self._readbuffer = self._strip_status(tempbuf)
+                    break
+            else:
+                if self._latency_threshold:
+                    self._adapt_latency(False)
+        view = memoryview(self._readbuffer)[self._readoffset:
+                                            self._readoffset+size]
+        self._readoffset += len(view)
+        return view
+
     def read_data(self, size: int) -> bytes:
         """Shortcut to received a bytes buffer instead of the array of bytes.
 
@@ -1926,6 +2019,169 @@ class Ftdi:
         """
         return bytes(self.read_data_bytes(size))
 
+    def read_data_into(self, buf: Union[bytearray, memoryview],
+                       size: Optional[int] = None, attempt: int = 1) -> int:
+        """Read data from the FTDI interface into a caller-provided buffer.
+
+           This is the allocation-free counterpart of
+           :py:meth:`read_data_bytes`: received payload is directly copied
+           into the destination buffer, which may be any writable object that
+           supports the buffer protocol, such as a bytearray, a memoryview or
+           a memory map.
+
+           As with :py:meth:`read_data_bytes`, fewer bytes than requested may
+           be received.
+
+           :param buf: the destination buffer
+           :param size: the number of bytes to receive from the device,
+                        default to the size of the destination buffer
+           :param attempt: attempt cycle count
+           :return: the count of received bytes
+        """
+        dst = memoryview(buf).cast('B')
+        if size is None:
+            size = len(dst)
+        elif size > len(dst):
+            raise ValueError('Destination buffer is too small')
+        pos = 0
+        while pos < size:
+            view = self.read_data_view(size-pos, attempt)
+            if not view:
+                break
+            dst[pos:pos+len(view)] = view
+            pos += len(view)
+        return pos
+
+    def readinto(self, buf: Union[bytearray, memoryview]) -> int:
+        """Read data from the FTDI interface into a caller-provided buffer.
+
+           Shortcut to :py:meth:`read_data_into`, which attempts to fill the
+           whole destination buffer.
+
+           :param buf: the destination buffer
+           :return: the count of received bytes
+        """
+        return self.read_data_into(buf)
+
+    def start_stream(self,
+                     callback: Optional[Callable[[bytes], None]] = None,
+                     depth: int = 16, transfers: int = 8) -> None:
+        """Start continuous reception from the FTDI interface.
+
+           A dedicated thread keeps several USB read requests in flight, so
+           that the host never leaves the bus idle while received data is
+           being processed, which would let the FTDI FIFO overflow at high
+           sample rates.
+
+           Received payload chunks, stripped from their status bytes, are
+           either handed to the callback, from the reader thread, or queued
+           up for :py:meth:`read_stream` and :py:meth:`iter_stream`. Once the
+           queue is full, the reader thread waits for the consumer. The
+           callback receives an empty chunk once the stream ends, either
+           because it has been stopped or because of a reception error.
+
+           Throughput depends on the USB request size, which may be increased
+           with :py:meth:`read_data_set_chunksize`, and on the count of USB
+           requests kept in flight.
+
+           .. note:: Several USB requests are only kept in flight with the
+              libusb 1.0 PyUSB backend, which supports asynchronous
+              transfers. With other backends, the reader thread issues
+              synchronous USB requests: the bus is then left idle while the
+              thread handles a request completion and submits the next one.
+
+           Any error that aborts the stream, including an exception raised
+           from the callback, is recorded, see :py:attr:`stream_error`, and
+           raised from :py:meth:`read_stream`.
+
+           No other read API should be used while streaming is active.
+
+           :param callback: optional callable which receives each payload
+                            chunk
+           :param depth: maximum count of payload chunks to queue up
+           :param transfers: count of USB requests to keep in flight
+        """
+        if not self.is_connected:
+            raise FtdiError('Device characteristics not yet known')
+        if self._stream:
+            raise FtdiError('Stream already started')
+        if transfers < 1:
+            raise ValueError('Invalid count of transfers')
+        self._readbuffer = bytearray()
+        self._readoffset = 0
+        self._stream_q = None if callback else Queue(depth)
+        self._stream_error = None
+        self._stream_resume = True
+        self._stream = Thread(target=self._stream_worker,
+                              args=(callback, transfers),
+                              name=f'Ftdi-Stream-{self._index}', daemon=True)
+        self._stream.start()
+
+    def stop_stream(self) -> None:
+        """Stop continuous reception from the FTDI interface.
+
+           Payload chunks which have not been consumed are discarded.
+        """
+        if not self._stream:
+            return
+        self._stream_resume = False
+        if self._stream_q:
+            # release the reader thread if it waits for the consumer
+            try:
+                while True:
+                    self._stream_q.get_nowait()
+            except Empty:
+                pass
+        self._stream.join()
+        self._stream = None
+        self._stream_q = None
+
+    @property
+    def stream_error(self) -> Optional[Exception]:
+        """Return the error that aborted the last stream, if any.
+
+           :return: the error, or None if the stream has not been aborted
+        """
+        return self._stream_error
+
+    def read_stream(self, timeout: Optional[float] = None) -> bytes:
+        """Retrieve the next payload chunk received in streaming mode.
+
+           :param timeout: maximum time to wait for a chunk, in seconds,
+                           or None to wait forever
+           :return: payload bytes, empty if no data have been received
+                    before the timeout or if the stream has been stopped
+        """
+        if not self._stream_q:
+            raise FtdiError('Stream not started')
+        try:
+            chunk = self._stream_q.get(timeout=timeout)
+        except Empty:
+            return b''
+        if chunk is None:
+            # end of stream marker, keep it for any subsequent call
+            self._stream_q.put(None)
+            if self._stream_error:
+                raise self._stream_error
+            return b''
+        return chunk
+
+    def iter_stream(self, timeout: Optional[float] = None) -> Iterator[bytes]:
+        """Iterate over payload chunks received in streaming mode.
+
+           Iteration ends when the stream is stopped or when no payload has
+           been received before the timeout.
+
+           :param timeout: maximum time to wait for each chunk, in seconds,
+                           or None to wait forever
+           :return: a payload chunk iterator
+        """
+        while True:
+            chunk = self.read_stream(timeout)
+            if not chunk:
+                return
+            yield chunk
+
     def get_cts(self) -> bool:
         """Read terminal status line: Clear To Send
 
@@ -2091,10 +2347,14 @@ class Ftdi:
         except USBError as ex:
             raise FtdiError('UsbError: %s' % str(ex)) from None
 
-    def _read(self) -> bytes:
+    def _read(self, reader: Optional[_LibUsbBulkReader] = None) -> bytes:
         try:
-            data = self._usb_dev.read(self._out_ep, self._readbuffer_chunksize,
-                                      self._usb_read_timeout)
+            if reader:
+                data = reader.read()
+            else:
+                data = self._usb_dev.read(self._out_ep,
+                                          self._readbuffer_chunksize,
+                                          self._usb_read_timeout)
         except USBError as ex:
             raise FtdiError('UsbError: %s' % str(ex)) from None
         if data:
@@ -2104,6 +2364,97 @@ class Ftdi:
                 self._tracer.receive(self._index, data[2:])
         return data
 
+    def _strip_status(self, tempbuf: bytes) -> memoryview:
+        """Remove the modem status bytes which prefix each packet of a USB
+           RX buffer.
+
+           Payload bytes are compacted into a pre-allocated buffer, which is
+           reused from one USB request to the next one, so that no
+           intermediate buffer is ever created. A single packet buffer does
+           not need to be compacted, and is never copied.
+
+           :param tempbuf: the raw buffer received from the USB device
+           :return: a view on the payload bytes, only valid till the next
+                    USB request
+        """
+        packet_size = self._max_packet_size
+        length = len(tempbuf)
+        status = tempbuf[:2]
+        if status[1] & self.ERROR_BITS[1]:
+            self.log.error(
+                'FTDI error: %02x:%02x %s', status[0], status[1],
+                (' '.join(self.decode_modem_status(status, True)).title()))
+        src = memoryview(tempbuf)
+        if length <= packet_size:
+            return src[2:]
+        if len(self._rxbuffer) < length:
+            self._rxbuffer = bytearray(length)
+        dst = memoryview(self._rxbuffer)
+        count = packet_size - 2
+        dstoff = 0
+        for srcoff in range(2, length, packet_size):
+            chunk = src[srcoff:srcoff+count]
+            dst[dstoff:dstoff+len(chunk)] = chunk
+            dstoff += len(chunk)
+        return dst[:dstoff]
+
+    def _stream_worker(self, callback: Optional[Callable[[bytes], None]],
+                       transfers: int) -> None:
+        """Background reception for the streaming mode."""
+        reader = None
+        try:
+            if transfers > 1:
+                try:
+                    reader = _LibUsbBulkReader.create(
+                        self._usb_dev, self._interface, self._out_ep,
+                        self._readbuffer_chunksize, transfers,
+                        self._usb_read_timeout)
+                except USBError as ex:
+                    raise FtdiError('UsbError: %s' % str(ex)) from None
+                if not reader:
+                    self.log.debug('Asynchronous transfers not supported, '
+                                   'fall back to synchronous requests')
+            while self._stream_resume:
+                tempbuf = self._read(reader)
+                if len(tempbuf) <= 2:
+                    continue
+                chunk = bytes(self._strip_status(tempbuf))
+                if callback:
+                    callback(chunk)
+                    continue
+                while self._stream_resume:
+                    try:
+                        self._stream_q.put(chunk, timeout=0.1)
+                        break
+                    except Full:
+                        continue
+        except Exception as exc:
+            #pylint: disable-msg=broad-except
+            # record any error, as it cannot be raised from this thread
+            self.log.error('Stream aborted: %s', exc)
+            self._stream_error = exc
+        finally:
+            if reader:
+                reader.close()
+            if callback:
+                # notify the end of stream with an empty chunk
+                try:
+                    callback(b'')
+                except Exception as exc:
+                    #pylint: disable-msg=broad-except
+                    self.log.error('Stream callback error: %s', exc)
+                    if not self._stream_error:
+                        self._stream_error = exc
+            # post an end of stream marker, unless the stream is stopped, as
+            # the queue is discarded anyway
+            while self._stream_q:
+                try:
+                    self._stream_q.put(None, timeout=0.1)
+                    break
+                except Full:
+                    if not self._stream_resume:
+                        break
+
     def _adapt_latency(self, payload_detected: bool) -> None:
         """Dynamic latency adaptation depending on the presence of a
            payload in a RX buffer.
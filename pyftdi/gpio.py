@@ -8,8 +8,13 @@
 
 #pylint: disable-msg=too-few-public-methods
 
-from struct import calcsize as scalc, unpack as sunpack
-from typing import Iterable, Optional, Tuple, Union
+from array import array
+from collections import deque
+from struct import unpack as sunpack
+from sys import byteorder
+from threading import Condition
+from time import monotonic, time
+from typing import BinaryIO, Iterable, NamedTuple, Optional, Tuple, Union
 from .ftdi import Ftdi, FtdiError
 from .misc import is_iterable
 
@@ -19,6 +24,39 @@ class GpioException(FtdiError):
     """
 
 
+GpioCaptureChunk = NamedTuple('GpioCaptureChunk',
+                              (('timestamp', float),
+                               ('frequency', float),
+                               ('position', int),
+                               ('data', bytes),
+                               ('overrun', bool)))
+"""GPIO samples received during a continuous capture.
+
+   * timestamp: host time, in seconds since the epoch, at which the chunk
+     has been received
+   * frequency: sampling frequency, in samples per second
+   * position: index of the first sample of the chunk in the capture
+   * data: 8-bit GPIO samples
+   * overrun: whether some samples have been lost before this chunk, either
+     because the FTDI FIFO has overflowed or because the chunk buffer was
+     full
+"""
+
+GpioCaptureStats = NamedTuple('GpioCaptureStats',
+                              (('samples', int),
+                               ('chunks', int),
+                               ('overruns', int),
+                               ('dropped', int)))
+"""Continuous capture statistics.
+
+   * samples: count of received samples
+   * chunks: count of received chunks
+   * overruns: count of detected FTDI FIFO overruns
+   * dropped: count of chunks discarded as they have not been retrieved
+     before the chunk buffer was full
+"""
+
+
 class GpioPort:
     """Duck-type GPIO port for GPIO all controllers.
     """
@@ -195,6 +233,15 @@ class GpioAsyncController(GpioBaseController):
        check if it matches the board requirements.
     """
 
+    def __init__(self):
+        super().__init__()
+        self._capture: Optional[_GpioAsyncCapture] = None
+
+    def close(self, freeze: bool = False) -> None:
+        if self._capture:
+            self.stop_capture()
+        super().close(freeze)
+
     def read(self, readlen: int = 1, peek: Optional[bool] = None,
              noflush: bool = False) -> Union[int, bytes]:
         """Read the GPIO input pin electrical level.
@@ -232,26 +279,29 @@ class GpioAsyncController(GpioBaseController):
         # at any time is likely to contain a mix of old and new values.
         # Anyway, flushing the FTDI-to-host buffer seems to be a proper
         # to get in sync with the buffer.
-        if noflush:
-            return self._ftdi.read_data(readlen)
-        loop = 10000
-        while loop:
-            loop -= 1
-            # do not attempt to do anything till the FTDI HW buffer has been
-            # emptied, i.e. previous write calls have been handled.
-            status = self._ftdi.poll_modem_status()
-            if status & Ftdi.MODEM_TEMT:
-                # TX buffer is now empty, any "write" GPIO rquest has completed
-                # so start reading GPIO samples from this very moment.
-                break
-        else:
-            # sanity check to avoid endless loop on errors
-            raise FtdiError('FTDI TX buffer error')
-        # now flush the FTDI-to-host buffer as it keeps being filled with data
-        self._ftdi.purge_tx_buffer()
-        # finally perform the actual read out
+        if not noflush:
+            self._sync_fifo()
         return self._ftdi.read_data(readlen)
 
+    def readinto(self, buf: Union[bytearray, memoryview],
+                 noflush: bool = False) -> int:
+        """Read GPIO samples from the HW FIFO into a caller-provided buffer.
+
+           This is the allocation-free counterpart of :py:meth:`read` for
+           long captures, see :py:meth:`read` for the HW FIFO management.
+
+           :param buf: the destination buffer, its size defines how many
+                       8-bit wide samples to retrieve.
+           :param noflush: whether to disable the RX buffer flush before
+                           reading out data
+           :return: the count of retrieved samples
+        """
+        if not self.is_connected:
+            raise GpioException('Not connected')
+        if not noflush:
+            self._sync_fifo()
+        return self._ftdi.read_data_into(buf)
+
     def write(self, out: Union[bytes, bytearray, int]) -> None:
         """Set the GPIO output pin electrical level, or output a sequence of
            bytes @ constant frequency to GPIO output pins.
@@ -274,6 +324,77 @@ class GpioAsyncController(GpioBaseController):
             out = bytes(out)
         self._ftdi.write_data(out)
 
+    def start_capture(self, depth: int = 256,
+                      output: Optional[BinaryIO] = None) -> None:
+        """Start a continuous capture of the GPIO input pins.
+
+           The GPIO samples are continuously retrieved from the HW FIFO at
+           the current :py:attr:`frequency` by a background thread, as
+           :py:data:`GpioCaptureChunk` entries annotated with the host time
+           at which they have been received.
+
+           As the FTDI device stops sampling once its HW FIFO is full, FIFO
+           overruns are detected whenever fewer samples than expected from
+           the elapsed time and the sampling frequency have been received.
+
+           No other read API should be used while the capture is active.
+
+           :param depth: maximum count of chunks to buffer. Once full, the
+                         oldest chunks are discarded.
+           :param output: optional binary file, to which all the samples are
+                          appended as they are received
+        """
+        if not self.is_connected:
+            raise GpioException('Not connected')
+        if self._capture:
+            raise GpioException('Capture already started')
+        self._sync_fifo()
+        self._capture = _GpioAsyncCapture(self, depth, output)
+        self._ftdi.start_stream(callback=self._capture.push)
+
+    def stop_capture(self) -> GpioCaptureStats:
+        """Stop the continuous capture.
+
+           Chunks which have not been retrieved are discarded. If the capture
+           has been aborted, e.g. on USB or output file error, the error is
+           raised.
+
+           :return: the capture statistics
+        """
+        capture = self._capture
+        if not capture:
+            raise GpioException('Capture not started')
+        self._capture = None
+        self._ftdi.stop_stream()
+        capture.close()
+        capture.check()
+        return capture.stats
+
+    def read_capture(self, timeout: Optional[float] = None) -> \
+            Optional[GpioCaptureChunk]:
+        """Retrieve the oldest chunk of a continuous capture.
+
+           :param timeout: maximum time to wait for a chunk, in seconds, or
+                           None to wait forever
+           :return: the next chunk, or None if no chunk has been received
+                    before the timeout
+           :raise: the error that has aborted the capture, once all the
+                   chunks received beforehand have been retrieved
+        """
+        if not self._capture:
+            raise GpioException('Capture not started')
+        return self._capture.pop(timeout)
+
+    @property
+    def capture_stats(self) -> GpioCaptureStats:
+        """Report the statistics of the current continuous capture.
+
+           :return: the capture statistics
+        """
+        if not self._capture:
+            raise GpioException('Capture not started')
+        return self._capture.stats
+
     def set_frequency(self, frequency: Union[int, float]) -> None:
         """Set the frequency at which sequence of GPIO samples are read
            and written.
@@ -299,6 +420,25 @@ class GpioAsyncController(GpioBaseController):
         """
         self._frequency = float(self._ftdi.set_baudrate(int(frequency), False))
 
+    def _sync_fifo(self) -> None:
+        """Discard GPIO samples collected before the completion of any
+           pending write request."""
+        loop = 10000
+        while loop:
+            loop -= 1
+            # do not attempt to do anything till the FTDI HW buffer has been
+            # emptied, i.e. previous write calls have been handled.
+            status = self._ftdi.poll_modem_status()
+            if status & Ftdi.MODEM_TEMT:
+                # TX buffer is now empty, any "write" GPIO rquest has completed
+                # so start reading GPIO samples from this very moment.
+                break
+        else:
+            # sanity check to avoid endless loop on errors
+            raise FtdiError('FTDI TX buffer error')
+        # now flush the FTDI-to-host buffer as it keeps being filled with data
+        self._ftdi.purge_tx_buffer()
+
     def _configure(self, url: str, direction: int,
                    frequency: Union[int, float, None] = None, **kwargs) -> int:
         if 'initial' in kwargs:
@@ -336,6 +476,109 @@ class GpioAsyncController(GpioBaseController):
 GpioController = GpioAsyncController
 
 
+class _GpioAsyncCapture:
+    """Continuous capture state of a GpioAsyncController.
+
+       :param gpio: the capturing GPIO controller
+       :param depth: maximum count of chunks to buffer
+       :param output: optional binary file to store samples into
+    """
+
+    def __init__(self, gpio: GpioAsyncController, depth: int,
+                 output: Optional[BinaryIO]):
+        ftdi = gpio.ftdi
+        self._gpio = gpio
+        self._output = output
+        self._chunks = deque()
+        self._depth = depth
+        self._cond = Condition()
+        # the device may buffer up to a FIFO worth of samples, and a USB
+        # transfer may be in flight
+        self._slack = ftdi.fifo_sizes[1] + ftdi.read_data_get_chunksize()
+        self._frequency = gpio.frequency
+        self._origin = monotonic()
+        self._position = 0
+        self._chunk_count = 0
+        self._overruns = 0
+        self._dropped = 0
+        self._active = True
+        self._error: Optional[Exception] = None
+
+    @property
+    def stats(self) -> GpioCaptureStats:
+        with self._cond:
+            return GpioCaptureStats(self._position, self._chunk_count,
+                                    self._overruns, self._dropped)
+
+    def push(self, data: bytes) -> None:
+        """Handle a chunk of samples, from the Ftdi stream thread."""
+        if not data:
+            # end of stream
+            self.close()
+            return
+        timestamp = time()
+        tick = monotonic()
+        frequency = self._gpio.frequency
+        if self._output:
+            try:
+                self._output.write(data)
+            except Exception as exc:
+                #pylint: disable-msg=broad-except
+                # record the error for the consumer, and abort the stream
+                with self._cond:
+                    self._error = exc
+                raise
+        with self._cond:
+            if frequency != self._frequency:
+                # resynchronize on frequency changes
+                self._frequency = frequency
+                self._origin = tick - self._position / frequency
+            missing = (tick - self._origin) * frequency - self._position
+            overrun = False
+            if missing > self._slack:
+                overrun = True
+                self._overruns += 1
+                # samples are lost for good: resynchronize on received ones
+                self._origin = tick - (self._position + len(data)) / frequency
+            chunk = GpioCaptureChunk(timestamp, frequency, self._position,
+                                     data, overrun)
+            self._position += len(data)
+            self._chunk_count += 1
+            self._chunks.append(chunk)
+            if len(self._chunks) > self._depth:
+                self._chunks.popleft()
+                self._dropped += 1
+                # the consumer cannot retrieve the samples that precede the
+                # oldest chunk anymore
+                self._chunks[0] = self._chunks[0]._replace(overrun=True)
+            self._cond.notify_all()
+
+    def pop(self, timeout: Optional[float]) -> Optional[GpioCaptureChunk]:
+        """Retrieve the oldest chunk."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._chunks or
+                                       not self._active, timeout):
+                return None
+            if self._chunks:
+                return self._chunks.popleft()
+        self.check()
+        return None
+
+    def check(self) -> None:
+        """Raise the error that has aborted the capture, if any."""
+        with self._cond:
+            error = self._error
+        if not error:
+            error = self._gpio.ftdi.stream_error
+        if error:
+            raise error
+
+    def close(self) -> None:
+        with self._cond:
+            self._active = False
+            self._cond.notify_all()
+
+
 class GpioSyncController(GpioBaseController):
     """GPIO controller for an FTDI port, in bit-bang synchronous mode.
 
@@ -455,25 +698,88 @@ class GpioMpsseController(GpioBaseController):
             return self._ftdi.read_pins()
         return self._read_mpsse(readlen)
 
+    def capture(self, count: int) -> array:
+        """Sample the GPIO pins for an arbitrary count of cycles.
+
+           Sampling requests are pipelined, so that long captures run at the
+           best rate the MPSSE engine can sustain.
+
+           :param count: how many GPIO samples to retrieve
+           :return: an ``array('H')`` if :py:meth:`width` is wider than a
+                    byte, an ``array('B')`` otherwise
+        """
+        if not self.is_connected:
+            raise GpioException('Not connected')
+        if self._width > 8:
+            samples = array('H', bytes(2 * count))
+        else:
+            samples = array('B', bytes(count))
+        self._sample_mpsse(count, memoryview(samples).cast('B'))
+        if samples.itemsize > 1 and byteorder == 'big':
+            samples.byteswap()
+        return samples
+
+    def readinto(self, buf: Union[bytearray, memoryview]) -> int:
+        """Read GPIO samples from the MPSSE stream into a caller-provided
+           buffer.
+
+           Samples are stored as :py:meth:`width` bit wide values in host
+           byte order, as with :py:meth:`capture`, so an ``array('H')`` may
+           be used as a destination buffer with wide ports.
+
+           :param buf: the destination buffer, its size defines how many
+                       samples to retrieve.
+           :return: the count of retrieved samples
+        """
+        if not self.is_connected:
+            raise GpioException('Not connected')
+        dst = memoryview(buf).cast('B')
+        count = len(dst)
+        if self._width > 8:
+            count //= 2
+        self._read_mpsse(count, dst)
+        if self._width > 8 and byteorder == 'big':
+            size = 2 * count
+            lsbs = bytes(dst[0:size:2])
+            dst[0:size:2] = dst[1:size:2]
+            dst[1:size:2] = lsbs
+        return count
+
     def write(self, out: Union[bytes, bytearray, Iterable[int], int]) -> None:
         """Set the GPIO output pin electrical level, or output a sequence of
            bytes @ constant frequency to GPIO output pins.
 
+           Large sequences are best provided as objects that support the
+           buffer protocol, such as ``bytes`` or ``array('H')`` for wide
+           ports, or NumPy ``uint8``/``uint16`` arrays: the MPSSE command
+           stream is then encoded without iterating over the samples in
+           Python, and sent as chunks of at most
+           :py:const:`MPSSE_PAYLOAD_MAX_LENGTH` bytes.
+
            :param out: a bitfield of GPIO pins, or a sequence of them
         """
         if not self.is_connected:
             raise GpioException('Not connected')
-        if isinstance(out, (bytes, bytearray)):
-            pass
-        else:
-            if isinstance(out, int):
-                out = [out]
-            elif not is_iterable(out):
-                raise TypeError('Invalid output value')
-            for val in out:
-                if val > self._mask:
-                    raise GpioException("Invalid value")
-        self._write_mpsse(out)
+        if isinstance(out, int):
+            out = [out]
+        try:
+            samples = memoryview(out)
+        except TypeError:
+            if not is_iterable(out):
+                raise TypeError('Invalid output value') from None
+            try:
+                samples = memoryview(array('H', out))
+            except OverflowError as exc:
+                raise GpioException('Invalid value') from exc
+        if samples.format not in ('B', 'H') or samples.ndim != 1:
+            raise TypeError('Unsupported sample format: %s' % samples.format)
+        if not samples.c_contiguous:
+            samples = memoryview(samples.tobytes()).cast(samples.format)
+        if samples.itemsize > 1 and self._mask < 0xFFFF:
+            msb = samples.cast('B')[self._msb_offset::2]
+            if len(msb) and max(msb) > (self._mask >> 8):
+                raise GpioException('Invalid value')
+        self._write_mpsse(samples)
 
     def set_frequency(self, frequency: Union[int, float]) -> None:
         if not self.is_connected:
@@ -496,38 +802,87 @@ class GpioMpsseController(GpioBaseController):
         self._direction = direction & self._mask
         return frequency
 
-    def _read_mpsse(self, count: int) -> Tuple[int]:
-        if self._width > 8:
-            cmd = bytearray([Ftdi.GET_BITS_LOW, Ftdi.GET_BITS_HIGH] * count)
-            fmt = '<%dH' % count
+    def _read_mpsse(self, count: int,
+                    rxbuf: Optional[memoryview] = None) -> Tuple[int]:
+        sample_size = 2 if self._width > 8 else 1
+        size = count * sample_size
+        if rxbuf is None:
+            data = bytearray(size)
+            dst = memoryview(data)
         else:
-            cmd = bytearray([Ftdi.GET_BITS_LOW] * count)
-            fmt = None
-        cmd.append(Ftdi.SEND_IMMEDIATE)
-        if len(cmd) > self.MPSSE_PAYLOAD_MAX_LENGTH:
-            raise ValueError('Too many samples')
-        self._ftdi.write_data(cmd)
-        size = scalc(fmt) if fmt else count
-        data = self._ftdi.read_data_bytes(size, 4)
-        if len(data) != size:
-            raise FtdiError('Cannot read GPIO, recv %d out of %d bytes' %
-                            (len(data), size))
-        if fmt:
-            return sunpack(fmt, data)
-        return data
-
-    def _write_mpsse(self,
-                     out: Union[bytes, bytearray, Iterable[int], int]) -> None:
-        cmd = []
-        low_dir = self._direction & 0xFF
+            dst = rxbuf
+        self._sample_mpsse(count, dst)
+        if rxbuf is not None:
+            return rxbuf[:size]
+        if sample_size > 1:
+            return sunpack('<%dH' % count, data)
+        return bytes(data)
+
+    def _sample_mpsse(self, count: int, dst: memoryview) -> None:
+        """Sample the GPIO pins into a buffer.
+
+           Sampling requests are split into chunks whose replies fit in half
+           of the device RX FIFO, so that the next chunk can be queued up
+           while the reply of the current one is retrieved. This keeps the
+           MPSSE engine busy, without the risk of overflowing its RX FIFO.
+
+           :param count: the count of samples to retrieve
+           :param dst: the destination buffer
+        """
         if self._width > 8:
-            high_dir = (self._direction >> 8) & 0xFF
-            for data in out:
-                low_data = data & 0xFF
-                high_data = (data >> 8) & 0xFF
-                cmd.extend([Ftdi.SET_BITS_LOW, low_data, low_dir,
-                            Ftdi.SET_BITS_HIGH, high_data, high_dir])
+            request = bytes((Ftdi.GET_BITS_LOW, Ftdi.GET_BITS_HIGH))
         else:
-            for data in out:
-                cmd.extend([Ftdi.SET_BITS_LOW, data, low_dir])
-        self._ftdi.write_data(bytes(cmd))
+            request = bytes((Ftdi.GET_BITS_LOW, ))
+        sample_size = len(request)
+        chunk = max(1, self._ftdi.fifo_sizes[1] // (2 * sample_size))
+        chunk = min(chunk, (self.MPSSE_PAYLOAD_MAX_LENGTH - 1) // sample_size)
+        cmd = request * chunk + bytes((Ftdi.SEND_IMMEDIATE, ))
+        pending = []  # sizes of the requested replies, in bytes
+        reqcount = 0
+        pos = 0
+        while reqcount < count or pending:
+            while reqcount < count and len(pending) < 2:
+                length = min(chunk, count - reqcount)
+                if length < chunk:
+                    cmd = (request * length +
+                           bytes((Ftdi.SEND_IMMEDIATE, )))
+                self._ftdi.write_data(cmd)
+                pending.append(length * sample_size)
+                reqcount += length
+            size = pending.pop(0)
+            length = self._ftdi.read_data_into(dst[pos:pos+size], size, 4)
+            if length != size:
+                raise FtdiError('Cannot read GPIO, recv %d out of %d bytes' %
+                                (pos + length, count * sample_size))
+            pos += size
+
+    def _write_mpsse(self, samples: memoryview) -> None:
+        # encode the command stream with bytearray extended slice assignments,
+        # i.e. interleave the sample bytes with the MPSSE commands and the
+        # direction bytes without a Python loop over the samples
+        wide = self._width > 8
+        step = 6 if wide else 3
+        itemsize = samples.itemsize
+        data = samples.cast('B')
+        low = 1 - self._msb_offset if itemsize > 1 else 0
+        low_dir = self._direction & 0xFF
+        high_dir = (self._direction >> 8) & 0xFF
+        chunk = self.MPSSE_PAYLOAD_MAX_LENGTH // step
+        for pos in range(0, len(samples), chunk):
+            count = min(chunk, len(samples)-pos)
+            block = data[pos*itemsize:(pos+count)*itemsize]
+            cmd = bytearray(step*count)
+            cmd[0::step] = bytes((Ftdi.SET_BITS_LOW,))*count
+            cmd[1::step] = block[low::itemsize]
+            cmd[2::step] = bytes((low_dir,))*count
+            if wide:
+                cmd[3::step] = bytes((Ftdi.SET_BITS_HIGH,))*count
+                if itemsize > 1:
+                    cmd[4::step] = block[self._msb_offset::itemsize]
+                cmd[5::step] = bytes((high_dir,))*count
+            self._ftdi.write_data(cmd)
+
+    @property
+    def _msb_offset(self) -> int:
+        """Offset of the most significant byte of 16-bit native samples."""
+        return 0 if byteorder == 'big' else 1
@@ -19,7 +19,8 @@ from collections import namedtuple
 from logging import getLogger
 from struct import calcsize as scalc, pack as spack, unpack as sunpack
 from threading import Lock
-from typing import Any, Iterable, Mapping, Optional, Tuple, Union
+from typing import (Any, Dict, Iterable, List, Mapping, Optional, Tuple,
+                    Union)
 from usb.core import Device as UsbDevice
 from .ftdi import Ftdi, FtdiFeatureError
 from .misc import to_bool
@@ -164,6 +165,42 @@ class I2cPort:
             self._address+self._shift if start else None, out,
             readlen, relax=relax)
 
+    def read_from_regs(self, requests: Iterable[Tuple[int, int]]) \
+            -> List[bytes]:
+        """Read from several slave registers with a single USB round-trip.
+
+           Each request is executed as a complete I2C transaction, i.e. the
+           I2C bus is relaxed (STOP) after each of them.
+
+           :param requests: a sequence of (register address, count of bytes
+                            to read out) pairs
+           :return: data read out from each register, in request order
+           :raise I2cNackError: if the slave does not acknowledge one of the
+                                transactions
+        """
+        return self._controller.exchange_batch(
+            self._address+self._shift,
+            [(self._make_buffer(regaddr), readlen)
+             for regaddr, readlen in requests])
+
+    def write_to_regs(self,
+                      requests: Iterable[Tuple[int, Union[bytes, bytearray,
+                                                          Iterable[int]]]]) \
+            -> None:
+        """Write to several slave registers with a single USB round-trip.
+
+           Each request is executed as a complete I2C transaction, i.e. the
+           I2C bus is relaxed (STOP) after each of them.
+
+           :param requests: a sequence of (register address, byte buffer to
+                            send) pairs
+           :raise I2cNackError: if the slave does not acknowledge one of the
+                                transactions
+        """
+        self._controller.exchange_batch(
+            self._address+self._shift,
+            [(self._make_buffer(regaddr, out), 0) for regaddr, out in requests])
+
     def poll(self, write: bool = False,
              relax: bool = True, start: bool = True) -> bool:
         """Poll a remote slave, expect ACK or NACK.
@@ -185,6 +222,9 @@ class I2cPort:
 
            If relax is set, this method releases the I2C bus however it leaves.
 
+           See the ``pollbatch`` option of :py:meth:`I2cController.configure`
+           to emit several poll cycles with a single USB request.
+
            :param width: count of bytes to poll for the condition check,
                 that is the size of the condition register
            :param mask: binary mask to apply on the condition register
@@ -359,6 +399,8 @@ class I2cController:
     SCL_FB_BIT = 0x80  #AD7
     PAYLOAD_MAX_LENGTH = 0xFF00  # 16 bits max (- spare for control)
     HIGHEST_I2C_ADDRESS = 0x7F
+    SMB_READ_RANGE = list(range(0x30, 0x38)) + list(range(0x50, 0x60))
+    SCAN_MODES = ('smb', 'read', 'write', 'any')
     DEFAULT_BUS_FREQUENCY = 100000.0
     HIGH_BUS_FREQUENCY = 400000.0
     RETRY_COUNT = 3
@@ -384,12 +426,13 @@ class I2cController:
         self._slaves = {}
         self._retry_count = self.RETRY_COUNT
         self._frequency = 0.0
-        self._immediate = (Ftdi.SEND_IMMEDIATE,)
-        self._read_bit = (Ftdi.READ_BITS_PVE_MSB, 0)
-        self._read_byte = (Ftdi.READ_BYTES_PVE_MSB, 0, 0)
-        self._write_byte = (Ftdi.WRITE_BYTES_NVE_MSB, 0, 0)
-        self._nack = (Ftdi.WRITE_BITS_NVE_MSB, 0, self.HIGH)
-        self._ack = (Ftdi.WRITE_BITS_NVE_MSB, 0, self.LOW)
+        self._immediate = bytes((Ftdi.SEND_IMMEDIATE,))
+        self._read_bit = bytes((Ftdi.READ_BITS_PVE_MSB, 0))
+        self._read_byte = bytes((Ftdi.READ_BYTES_PVE_MSB, 0, 0))
+        self._write_byte = bytes((Ftdi.WRITE_BYTES_NVE_MSB, 0, 0))
+        self._nack = bytes((Ftdi.WRITE_BITS_NVE_MSB, 0, self.HIGH))
+        self._ack = bytes((Ftdi.WRITE_BITS_NVE_MSB, 0, self.LOW))
+        self._templates: Dict[str, bytes] = {}
         self._ck_delay = 1
         self._fake_tristate = False
         self._tx_size = 1
@@ -398,6 +441,9 @@ class I2cController:
         self._ck_su_sto = 0
         self._ck_idle = 0
         self._read_optim = True
+        self._write_pipeline = False
+        self._poll_batch = False
+        self._poll_cycles: Dict[Optional[int], int] = {}
         self._disable_3phase_clock = False
 
     def set_retry_count(self, count: int) -> None:
@@ -432,6 +478,16 @@ class I2cController:
            * ``frequency`` float value the I2C bus frequency in Hz
            * ``clockstretching`` boolean value to enable clockstreching.
              xD7 (GPIO7) pin should be connected back to xD0 (SCK)
+           * ``pipeline`` boolean value to enable pipelined writes: all the
+             bytes of a write request are sent at once, and all the slave
+             ACK bits are read back with a single USB request. The slave
+             may receive some extra bytes after it has NACKed a byte.
+           * ``pollbatch`` boolean value to enable batched condition polling:
+             several poll cycles are sent at once, and all the slave replies
+             are read back with a single USB request. The count of poll
+             cycles is adapted to the count of cycles the slave required to
+             fulfill the condition on the previous poll, so the slave may be
+             polled a few extra times once the condition is fulfilled.
            * ``debug`` to increase log verbosity, using MPSSE tracer
         """
         if 'frequency' in kwargs:
@@ -471,6 +527,12 @@ class I2cController:
         if 'rdoptim' in kwargs:
             self._read_optim = to_bool(kwargs['rdoptim'])
             del kwargs['rdoptim']
+        if 'pipeline' in kwargs:
+            self._write_pipeline = to_bool(kwargs['pipeline'])
+            del kwargs['pipeline']
+        if 'pollbatch' in kwargs:
+            self._poll_batch = to_bool(kwargs['pollbatch'])
+            del kwargs['pollbatch']
         with self._lock:
             self._ck_hd_sta = self._compute_delay_cycles(timings.t_hd_sta)
             self._ck_su_sto = self._compute_delay_cycles(timings.t_su_sto)
@@ -478,6 +540,7 @@ class I2cController:
             ck_buf = self._compute_delay_cycles(timings.t_buf)
             self._ck_idle = max(ck_su_sta, ck_buf)
             self._ck_delay = ck_buf
+            self._templates.clear()
             if clkstrch:
                 self._i2c_mask = self.I2C_MASK_CS
             else:
@@ -510,6 +573,7 @@ class I2cController:
                 # SDA line is temporary move to high-z to enable ACK/NACK
                 # read back from slave
                 self._fake_tristate = True
+                self._templates.clear()
             self._wide_port = self._ftdi.has_wide_port
             if not self._wide_port:
                 self._set_gpio_direction(8, io_out & 0xFF, io_dir & 0xFF)
@@ -795,6 +859,47 @@ class I2cController:
                     if do_epilog:
                         self._do_epilog()
 
+    def exchange_batch(self, address: int,
+                       transactions: Iterable[Tuple[Union[bytes, bytearray,
+                                                          Iterable[int]],
+                                                    int]]) -> List[bytes]:
+        """Execute a sequence of transactions with a remote slave, with as
+           few USB round-trips as possible.
+
+           Each transaction sends a byte sequence to the slave, optionally
+           followed with a read request, and always ends up relaxing the bus
+           (STOP). All transactions are encoded into a single MPSSE command
+           sequence, as long as the slave replies fit into the FTDI FIFO.
+
+           :param address: the address on the I2C bus
+           :param transactions: a sequence of (byte buffer to send, count of
+                                bytes to read out) pairs
+           :return: data read out from the slave, one entry per transaction
+           :raise I2cIOError: if device is not configured or input parameters
+                              are invalid
+           :raise I2cNackError: if the slave does not acknowledge one of the
+                                transactions
+
+           Address is a logical slave address (0x7f max)
+        """
+        if not self.configured:
+            raise I2cIOError("FTDI controller not initialized")
+        if address is None:
+            raise I2cIOError('Slave address is required')
+        self.validate_address(address)
+        i2caddress = (address << 1) & self.HIGH
+        requests = [(bytearray(out), readlen) for out, readlen in transactions]
+        retries = self._retry_count
+        with self._lock:
+            while True:
+                try:
+                    return self._do_batch(i2caddress, requests)
+                except I2cNackError:
+                    retries -= 1
+                    if not retries:
+                        raise
+                    self.log.warning('Retry batch')
+
     def poll(self, address: int, write: bool = False,
              relax: bool = True) -> bool:
         """Poll a remote slave, expect ACK or NACK.
@@ -855,20 +960,12 @@ class I2cController:
         do_epilog = True
         with self._lock:
             try:
-                retry = 0
-                while retry < count:
-                    retry += 1
-                    size = scalc(fmt)
-                    self._do_prolog(i2caddress)
-                    data = self._do_read(size)
-                    self.log.debug("Poll data: %s", hexlify(data).decode())
-                    cond, = sunpack(fmt, data)
-                    if (cond & mask) == value:
-                        self.log.debug('Poll condition matched')
-                        break
-                    data = None
-                    self.log.debug('Poll condition not fulfilled: %x/%x',
-                                   cond & mask, value)
+                if self._poll_batch:
+                    data = self._do_poll_batch(i2caddress, fmt, mask, value,
+                                               count)
+                else:
+                    data = self._do_poll_loop(i2caddress, fmt, mask, value,
+                                              count)
                 do_epilog = relax
                 if not data:
                     self.log.warning('Poll condition failed')
@@ -880,6 +977,71 @@ class I2cController:
                 if do_epilog:
                     self._do_epilog()
 
+    def scan(self, addresses: Optional[Iterable[int]] = None,
+             mode: str = 'smb') -> Dict[int, str]:
+        """Probe several slaves, with as few USB round-trips as possible.
+
+           Each probe emits a START condition and a slave address, samples
+           the slave ACK, then emits a STOP condition, with no data. All
+           probes are encoded into a single MPSSE command sequence, as long
+           as the ACK replies fit into the FTDI FIFO.
+
+           :param addresses: the addresses on the I2C bus to probe, default
+                             to all valid addresses
+           :param mode: ``read`` or ``write`` to probe with read or write
+                        requests, ``smb`` to probe SMBus read-only address
+                        ranges with read requests and other addresses with
+                        write requests, ``any`` to probe with a read request,
+                        then with a write request
+           :return: the acknowledging slave addresses, with the kind of
+                    acknowledged request, i.e. ``R`` or ``W``
+           :raise I2cIOError: if device is not configured or input parameters
+                              are invalid
+        """
+        if not self.configured:
+            raise I2cIOError("FTDI controller not initialized")
+        if mode not in self.SCAN_MODES:
+            raise ValueError('Invalid scan mode: %s' % mode)
+        if addresses is None:
+            addresses = range(self.HIGHEST_I2C_ADDRESS+1)
+        probes = []
+        for address in addresses:
+            self.validate_address(address)
+            smb_read = address in self.SMB_READ_RANGE
+            if mode in ('read', 'any') or (mode == 'smb' and smb_read):
+                probes.append((address, 'R'))
+            if mode in ('write', 'any') or (mode == 'smb' and not smb_read):
+                probes.append((address, 'W'))
+        prolog = bytearray(self._idle * self._ck_delay)
+        prolog.extend(self._start)
+        prolog.extend(self._write_byte)
+        sample_ack = self._sample_ack
+        stop = self._stop
+        # maximum RX size to fit in FTDI FIFO, minus 2 status bytes
+        chunk_size = self._rx_size-2
+        slaves = {}
+        with self._lock:
+            for pos in range(0, len(probes), chunk_size):
+                chunk = probes[pos:pos+chunk_size]
+                cmd = bytearray()
+                for address, kind in chunk:
+                    i2caddress = (address << 1) & self.HIGH
+                    if kind == 'R':
+                        i2caddress |= self.BIT0
+                    cmd.extend(prolog)
+                    cmd.append(i2caddress)
+                    cmd.extend(sample_ack)
+                    cmd.extend(stop)
+                cmd.extend(self._immediate)
+                self._ftdi.write_data(cmd)
+                acks = self._ftdi.read_data_bytes(len(chunk), 4)
+                if len(acks) != len(chunk):
+                    raise I2cIOError('No answer from FTDI')
+                for (address, kind), ack in zip(chunk, acks):
+                    if not ack & self.BIT0:
+                        slaves.setdefault(address, kind)
+        return slaves
+
     def flush(self) -> None:
         """Flush the HW FIFOs.
         """
@@ -918,6 +1080,7 @@ class I2cController:
             data |= value
             self._write_raw(data, use_high)
             self._gpio_low = data & 0xFF & ~self._i2c_mask
+            self._templates.clear()
 
     def set_gpio_direction(self, pins: int, direction: int) -> None:
         """Change the direction of the GPIO pins.
@@ -940,48 +1103,102 @@ class I2cController:
         self._gpio_dir &= ~pins
         self._gpio_dir |= (pins & direction)
         self._gpio_mask = gpio_mask & pins
+        self._templates.clear()
 
     @property
-    def _data_lo(self) -> Tuple[int]:
-        return (Ftdi.SET_BITS_LOW,
-                self.SCL_BIT | self._gpio_low,
-                self.I2C_DIR | (self._gpio_dir & 0xFF))
+    def _data_lo(self) -> bytes:
+        return self._get_templates()['data_lo']
 
     @property
-    def _clk_lo_data_hi(self) -> Tuple[int]:
-        return (Ftdi.SET_BITS_LOW,
-                self.SDA_O_BIT | self._gpio_low,
-                self.I2C_DIR | (self._gpio_dir & 0xFF))
+    def _clk_lo_data_hi(self) -> bytes:
+        return self._get_templates()['clk_lo_data_hi']
 
     @property
-    def _clk_lo_data_input(self) -> Tuple[int]:
-        return (Ftdi.SET_BITS_LOW,
-                self.LOW | self._gpio_low,
-                self.SCL_BIT | (self._gpio_dir & 0xFF))
+    def _clk_lo_data_input(self) -> bytes:
+        return self._get_templates()['clk_lo_data_input']
 
     @property
-    def _clk_lo_data_lo(self) -> Tuple[int]:
-        return (Ftdi.SET_BITS_LOW,
-                self._gpio_low,
-                self.I2C_DIR | (self._gpio_dir & 0xFF))
+    def _clk_lo_data_lo(self) -> bytes:
+        return self._get_templates()['clk_lo_data_lo']
 
     @property
-    def _idle(self) -> Tuple[int]:
-        return (Ftdi.SET_BITS_LOW,
-                self.I2C_DIR | self._gpio_low,
-                self.I2C_DIR | (self._gpio_dir & 0xFF))
+    def _idle(self) -> bytes:
+        return self._get_templates()['idle']
 
     @property
-    def _start(self) -> Tuple[int]:
-        return self._data_lo * self._ck_hd_sta + \
-               self._clk_lo_data_lo * self._ck_hd_sta
+    def _sample_ack(self) -> bytes:
+        return self._get_templates()['sample_ack']
 
     @property
-    def _stop(self) -> Tuple[int]:
-        return self._clk_lo_data_hi * self._ck_hd_sta + \
-               self._clk_lo_data_lo * self._ck_hd_sta + \
-               self._data_lo * self._ck_su_sto + \
-               self._idle * self._ck_idle
+    def _read_sequences(self) -> Tuple[bytes, bytes]:
+        templates = self._get_templates()
+        return templates['read_not_last'], templates['read_last']
+
+    @property
+    def _start(self) -> bytes:
+        return self._get_templates()['start']
+
+    @property
+    def _stop(self) -> bytes:
+        return self._get_templates()['stop']
+
+    def _get_templates(self) -> Dict[str, bytes]:
+        # command sequences only depend on the bus timings and on the GPIO
+        # configuration, which are far less often updated than used: build
+        # them once, and only rebuild them once the cache has been cleared.
+        if not self._templates:
+            self._templates.update(self._build_templates())
+        return self._templates
+
+    def _build_templates(self) -> Dict[str, bytes]:
+        gpio_dir = self._gpio_dir & 0xFF
+        data_lo = bytes((Ftdi.SET_BITS_LOW,
+                         self.SCL_BIT | self._gpio_low,
+                         self.I2C_DIR | gpio_dir))
+        clk_lo_data_hi = bytes((Ftdi.SET_BITS_LOW,
+                                self.SDA_O_BIT | self._gpio_low,
+                                self.I2C_DIR | gpio_dir))
+        clk_lo_data_input = bytes((Ftdi.SET_BITS_LOW,
+                                   self.LOW | self._gpio_low,
+                                   self.SCL_BIT | gpio_dir))
+        clk_lo_data_lo = bytes((Ftdi.SET_BITS_LOW,
+                                self._gpio_low,
+                                self.I2C_DIR | gpio_dir))
+        idle = bytes((Ftdi.SET_BITS_LOW,
+                      self.I2C_DIR | self._gpio_low,
+                      self.I2C_DIR | gpio_dir))
+        start = (data_lo * self._ck_hd_sta +
+                 clk_lo_data_lo * self._ck_hd_sta)
+        stop = (clk_lo_data_hi * self._ck_hd_sta +
+                clk_lo_data_lo * self._ck_hd_sta +
+                data_lo * self._ck_su_sto +
+                idle * self._ck_idle)
+        if self._fake_tristate:
+            # SCL low, SDA high-Z (input), read SDA (ack from slave),
+            # then leave SCL low, restore SDA as output
+            sample_ack = clk_lo_data_input + self._read_bit + clk_lo_data_hi
+            read_byte = clk_lo_data_input + self._read_byte + clk_lo_data_hi
+            read_not_last = (read_byte + self._ack +
+                             clk_lo_data_lo * self._ck_delay)
+            read_last = (read_byte + self._nack +
+                         clk_lo_data_hi * self._ck_delay)
+        else:
+            # SCL low, SDA high-Z, read SDA (ack from slave)
+            sample_ack = clk_lo_data_hi + self._read_bit
+            read_not_last = (self._read_byte + self._ack +
+                             clk_lo_data_hi * self._ck_delay)
+            read_last = (self._read_byte + self._nack +
+                         clk_lo_data_hi * self._ck_delay)
+        return {'data_lo': data_lo,
+                'clk_lo_data_hi': clk_lo_data_hi,
+                'clk_lo_data_input': clk_lo_data_input,
+                'clk_lo_data_lo': clk_lo_data_lo,
+                'idle': idle,
+                'start': start,
+                'stop': stop,
+                'sample_ack': sample_ack,
+                'read_not_last': read_not_last,
+                'read_last': read_last}
 
     def _compute_delay_cycles(self, value: Union[int, float]) -> int:
         # approx ceiling without relying on math module
@@ -1043,18 +1260,7 @@ class I2cController:
 
     def _send_check_ack(self, cmd: bytearray):
         # note: cmd is modified
-        if self._fake_tristate:
-            # SCL low, SDA high-Z (input)
-            cmd.extend(self._clk_lo_data_input)
-            # read SDA (ack from slave)
-            cmd.extend(self._read_bit)
-            # leave SCL low, restore SDA as output
-            cmd.extend(self._clk_lo_data_hi)
-        else:
-            # SCL low, SDA high-Z
-            cmd.extend(self._clk_lo_data_hi)
-            # read SDA (ack from slave)
-            cmd.extend(self._read_bit)
+        cmd.extend(self._sample_ack)
         cmd.extend(self._immediate)
         self._ftdi.write_data(cmd)
         ack = self._ftdi.read_data_bytes(1, 4)
@@ -1072,19 +1278,7 @@ class I2cController:
             self._ftdi.write_data(cmd)
             self._ftdi.read_data_bytes(0, 4)
             return bytearray()
-        if self._fake_tristate:
-            read_byte = (self._clk_lo_data_input +
-                         self._read_byte +
-                         self._clk_lo_data_hi)
-            read_not_last = (read_byte + self._ack +
-                             self._clk_lo_data_lo * self._ck_delay)
-            read_last = (read_byte + self._nack +
-                         self._clk_lo_data_hi * self._ck_delay)
-        else:
-            read_not_last = (self._read_byte + self._ack +
-                             self._clk_lo_data_hi * self._ck_delay)
-            read_last = (self._read_byte + self._nack +
-                         self._clk_lo_data_hi * self._ck_delay)
+        read_not_last, read_last = self._read_sequences
         # maximum RX size to fit in FTDI FIFO, minus 2 status bytes
         chunk_size = self._rx_size-2
         cmd_size = len(read_last)
@@ -1149,7 +1343,163 @@ class I2cController:
             return
         self.log.debug('- write %d byte(s): %s',
                        len(out), hexlify(out).decode())
+        if self._write_pipeline:
+            self._do_write_pipelined(out)
+            return
         for byte in out:
             cmd = bytearray(self._write_byte)
             cmd.append(byte)
             self._send_check_ack(cmd)
+
+    def _do_write_pipelined(self, out: bytearray):
+        sample_ack = self._sample_ack
+        # maximum count of ACK bits to fit in FTDI FIFO, minus 2 status bytes
+        chunk_size = self._rx_size-2
+        for offset in range(0, len(out), chunk_size):
+            chunk = out[offset:offset+chunk_size]
+            cmd = bytearray()
+            for byte in chunk:
+                cmd.extend(self._write_byte)
+                cmd.append(byte)
+                cmd.extend(sample_ack)
+            cmd.extend(self._immediate)
+            self._ftdi.write_data(cmd)
+            acks = self._ftdi.read_data_bytes(len(chunk), 4)
+            if len(acks) != len(chunk):
+                raise I2cIOError('No answer from FTDI')
+            for pos, ack in enumerate(acks):
+                if ack & self.BIT0:
+                    raise I2cNackError('NACK from slave @ byte %d' %
+                                       (offset+pos))
+
+    def _do_poll_loop(self, i2caddress: Optional[int], fmt: str, mask: int,
+                      value: int, count: int) -> Optional[bytes]:
+        size = scalc(fmt)
+        for _ in range(count):
+            self._do_prolog(i2caddress)
+            data = self._do_read(size)
+            self.log.debug("Poll data: %s", hexlify(data).decode())
+            cond, = sunpack(fmt, data)
+            if (cond & mask) == value:
+                self.log.debug('Poll condition matched')
+                return data
+            self.log.debug('Poll condition not fulfilled: %x/%x',
+                           cond & mask, value)
+        return None
+
+    def _do_poll_batch(self, i2caddress: Optional[int], fmt: str, mask: int,
+                       value: int, count: int) -> Optional[bytes]:
+        size = scalc(fmt)
+        read_not_last, read_last = self._read_sequences
+        cycle = bytearray()
+        if i2caddress is not None:
+            cycle.extend(self._idle * self._ck_delay)
+            cycle.extend(self._start)
+            cycle.extend(self._write_byte)
+            cycle.append(i2caddress)
+            cycle.extend(self._sample_ack)
+            replen = 1 + size
+        else:
+            replen = size
+        cycle.extend(read_not_last * (size-1))
+        cycle.extend(read_last)
+        # maximum RX size to fit in FTDI FIFO, minus 2 status bytes, and
+        # maximum count of cycles to fit in the FTDI TX FIFO, minus one byte
+        # for the last 'send immediate' command
+        max_batch = max(1, min((self._rx_size-2) // replen,
+                               (self._tx_size-1) // len(cycle)))
+        # start with the count of cycles the last poll required, plus some
+        # margin, so that most polls complete with a single USB request
+        last = self._poll_cycles.get(i2caddress, 0)
+        batch = last + last//4 + 1
+        done = 0
+        while done < count:
+            batch = min(batch, max_batch, count-done)
+            cmd = bytearray(cycle * batch)
+            cmd.extend(self._immediate)
+            self._ftdi.write_data(cmd)
+            data = self._ftdi.read_data_bytes(batch*replen, 4)
+            if len(data) != batch*replen:
+                raise I2cIOError('No answer from FTDI')
+            for pos in range(0, len(data), replen):
+                reply = data[pos:pos+replen]
+                if i2caddress is not None:
+                    if reply[0] & self.BIT0:
+                        raise I2cNackError('NACK from slave')
+                    reply = reply[1:]
+                done += 1
+                cond, = sunpack(fmt, reply)
+                if (cond & mask) == value:
+                    self.log.debug('Poll condition matched after %d cycles',
+                                   done)
+                    self._poll_cycles[i2caddress] = done
+                    return reply
+            self.log.debug('Poll condition not fulfilled: %x/%x, %d cycles',
+                           cond & mask, value, done)
+            batch *= 2
+        self._poll_cycles[i2caddress] = done
+        return None
+
+    def _do_batch(self, i2caddress: int,
+                  requests: List[Tuple[bytearray, int]]) -> List[bytes]:
+        prolog = bytearray(self._idle * self._ck_delay)
+        prolog.extend(self._start)
+        prolog.extend(self._write_byte)
+        sample_ack = self._sample_ack
+        read_not_last, read_last = self._read_sequences
+        stop = self._stop
+        # maximum RX size to fit in FTDI FIFO, minus 2 status bytes
+        chunk_size = self._rx_size-2
+        results = []
+        cmd = bytearray()
+        layout = []
+        pending = 0
+        for out, readlen in requests:
+            size = 1 + len(out) + (1 + readlen if readlen else 0)
+            if size > chunk_size:
+                raise I2cIOError('Transaction is too large')
+            if pending + size > chunk_size:
+                results.extend(self._flush_batch(cmd, layout, pending))
+                cmd = bytearray()
+                layout = []
+                pending = 0
+            cmd.extend(prolog)
+            cmd.append(i2caddress)
+            cmd.extend(sample_ack)
+            for byte in out:
+                cmd.extend(self._write_byte)
+                cmd.append(byte)
+                cmd.extend(sample_ack)
+            if readlen:
+                cmd.extend(prolog)
+                cmd.append(i2caddress | self.BIT0)
+                cmd.extend(sample_ack)
+                cmd.extend(read_not_last * (readlen-1))
+                cmd.extend(read_last)
+            cmd.extend(stop)
+            layout.append((len(out), readlen))
+            pending += size
+        if layout:
+            results.extend(self._flush_batch(cmd, layout, pending))
+        return results
+
+    def _flush_batch(self, cmd: bytearray, layout: List[Tuple[int, int]],
+                     size: int) -> List[bytes]:
+        cmd.extend(self._immediate)
+        self._ftdi.write_data(cmd)
+        data = self._ftdi.read_data_bytes(size, 4)
+        if len(data) != size:
+            raise I2cIOError('No answer from FTDI')
+        results = []
+        offset = 0
+        for pos, (outlen, readlen) in enumerate(layout):
+            acks = data[offset:offset+1+outlen]
+            offset += 1+outlen
+            if readlen:
+                acks.append(data[offset])
+                offset += 1
+            if any(ack & self.BIT0 for ack in acks):
+                raise I2cNackError('NACK from slave @ transaction %d' % pos)
+            results.append(data[offset:offset+readlen])
+            offset += readlen
+        return results
@@ -10,7 +10,7 @@
 #pylint: disable-msg=missing-function-docstring
 
 from time import sleep
-from typing import List, Tuple, Union
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
 from .ftdi import Ftdi
 from .bits import BitSequence
 
@@ -110,35 +110,53 @@ class JtagStateMachine:
 
            :return: the list of states, including source and target states.
         """
-        if source is None:
-            source = self.state()
-        if isinstance(source, str):
-            source = self[source]
-        if isinstance(target, str):
-            target = self[target]
+        source, target = self._get_states(source, target)
+        path, _ = JTAG_TRANSITIONS[(source.name, target.name)]
+        return [self[name] for name in path]
+
+    def find_events(self, target: Union[JtagState, str],
+                    source: Union[JtagState, str, None] = None) \
+                    -> BitSequence:
+        """Find the shortest TMS event sequence to move from source state to
+           target state. If source state is not specified, used the current
+           state.
 
-        def next_path(state, target, path):
-            # this test match the target, path is valid
-            if state == target:
-                return path+[state]
-            # candidate paths
-            paths = []
-            for x in state.exits:
-                # next state is self (loop around), kill the path
-                if x == state:
-                    continue
-                # next state already in upstream (loop back), kill the path
-                if x in path:
-                    continue
-                # try the current path
-                npath = next_path(x, target, path + [state])
-                # downstream is a valid path, store it
-                if npath:
-                    paths.append(npath)
-            # keep the shortest path
-            return min([(len(l), l) for l in paths],
-                       key=lambda x: x[0])[1] if paths else []
-        return next_path(source, target, [])
+           The returned sequence is shared with any other caller, and should
+           not be altered.
+
+           :return: the TMS event sequence, which is empty if source and
+                    target states are the same
+        """
+        source, target = self._get_states(source, target)
+        return JTAG_TRANSITIONS[(source.name, target.name)][1]
+
+    @classmethod
+    def build_transitions(cls) -> Dict[Tuple[str, str],
+                                       Tuple[Tuple[str, ...], BitSequence]]:
+        """Compute the shortest paths between any pair of TAP states.
+
+           :return: a map of (source, target) state names to the shortest
+                    state name sequence, including source and target states,
+                    and its TMS event sequence
+        """
+        machine = cls()
+        transitions = {}
+        for source in machine.states.values():
+            # breadth-first search, exploring the TMS low exit first, so that
+            # the selected path is the same as with an exhaustive search
+            paths = {source: [source]}
+            queue = [source]
+            while queue:
+                state = queue.pop(0)
+                for xstate in state.exits:
+                    if xstate not in paths:
+                        paths[xstate] = paths[state] + [xstate]
+                        queue.append(xstate)
+            for target, path in paths.items():
+                transitions[(source.name, target.name)] = \
+                    (tuple(state.name for state in path),
+                     cls.get_events(path))
+        return transitions
 
     @classmethod
     def get_events(cls, path):
@@ -158,6 +176,62 @@ class JtagStateMachine:
         for event in events:
             self._current = self._current.getx(event)
 
+    def _get_states(self, source: Union[JtagState, str, None],
+                    target: Union[JtagState, str]) \
+            -> Tuple[JtagState, JtagState]:
+        if source is None:
+            source = self.state()
+        if isinstance(source, str):
+            source = self[source]
+        if isinstance(target, str):
+            target = self[target]
+        return source, target
+
+
+JTAG_TRANSITIONS = JtagStateMachine.build_transitions()
+"""Shortest paths and TMS event sequences between any pair of TAP states,
+   indexed by (source, target) state names."""
+
+
+class JtagFuture:
+    """Deferred result of a JTAG read.
+
+       The captured bits are retrieved along with those of all the other
+       pending reads, either when the result is first requested, or when the
+       JTAG controller is flushed.
+
+       :param controller: the JTAG controller that executes the read
+    """
+
+    def __init__(self, controller: 'JtagController'):
+        self._controller = controller
+        self._result: Optional[BitSequence] = None
+
+    def done(self) -> bool:
+        """Tell whether the captured bits have been retrieved.
+
+           :return: True if the result is available
+        """
+        return self._result is not None
+
+    def result(self) -> BitSequence:
+        """Return the captured bits, flushing the controller if required.
+
+           :return: the captured bits
+        """
+        if self._result is None:
+            self._controller.flush()
+            if self._result is None:
+                raise JtagError('Deferred read has been discarded')
+        return self._result
+
+    def set_result(self, result: BitSequence) -> None:
+        """Resolve the deferred read.
+
+           :param result: the captured bits
+        """
+        self._result = result
+
 
 class JtagController:
     """JTAG master of an FTDI device"""
@@ -169,6 +243,7 @@ class JtagController:
     TRST_BIT = 0x10  # FTDI output, not available on 2232 JTAG debugger
     JTAG_MASK = 0x1f
     FTDI_PIPE_LEN = 512
+    MPSSE_PAYLOAD_MAX_LENGTH = 0x10000  # 16 bits max
 
     # Private API
     def __init__(self, trst: bool = False, frequency: float = 3.0E6):
@@ -185,6 +260,9 @@ class JtagController:
                           (self._trst and JtagController.TRST_BIT or 0))
         self._last = None  # Last deferred TDO bit
         self._write_buff = bytearray()
+        # deferred reads, with the layout of their replies
+        self._pending: List[Tuple[JtagFuture, int, int, int]] = []
+        self._pending_size = 0
 
     # Public API
     def configure(self, url: str) -> None:
@@ -206,9 +284,11 @@ class JtagController:
         """
         if self._ftdi.is_connected:
             self._ftdi.close(freeze)
+        self._discard_pending()
 
     def purge(self) -> None:
         self._ftdi.purge_buffers()
+        self._discard_pending()
 
     def reset(self, sync: bool = False) -> None:
         """Reset the attached TAP controller.
@@ -242,9 +322,48 @@ class JtagController:
             self._ftdi.write_data(self._write_buff)
             self._write_buff = bytearray()
 
+    def flush(self) -> None:
+        """Send the pending commands, and resolve all the deferred reads
+           with a single USB read request.
+        """
+        self.sync()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        size, self._pending_size = self._pending_size, 0
+        data = self._ftdi.read_data_bytes(size, 4)
+        if len(data) != size:
+            raise JtagError('Unable to read data from FTDI')
+        pos = 0
+        for future, byte_count, bit_count, tms_count in pending:
+            bs = BitSequence()
+            if byte_count:
+                bs.append(BitSequence(bytes_=data[pos:pos+byte_count],
+                                      length=8*byte_count))
+                pos += byte_count
+            if bit_count:
+                # need to shift bits as they are shifted in from the MSB in
+                # FTDI
+                bs.append(BitSequence(data[pos] >> (8-bit_count),
+                                      length=bit_count))
+                pos += 1
+            if tms_count:
+                # only the first bit is clocked out of the shifted register
+                bs.append(BitSequence((data[pos] >> (8-tms_count)) & 0x1,
+                                      length=1))
+                pos += 1
+            future.set_result(bs)
+
     def write_tms(self, tms: BitSequence,
-                  should_read: bool=False) -> None:
-        """Change the TAP controller state"""
+                  should_read: bool=False, flush: bool = True) -> None:
+        """Change the TAP controller state.
+
+           :param tms: the TMS events
+           :param should_read: whether to capture TDO while TMS is clocked
+           :param flush: whether to send the pending commands right away
+                         when TDO is captured, rather than leaving the caller
+                         to :py:meth:`sync` them along with other commands
+        """
         if not isinstance(tms, BitSequence):
             raise JtagError('Expect a BitSequence')
         length = len(tms)
@@ -262,7 +381,7 @@ class JtagController:
         else:
             cmd = bytearray((Ftdi.WRITE_BITS_TMS_NVE, length-1, out.tobyte()))
         self._stack_cmd(cmd)
-        if should_read:
+        if should_read and flush:
             self.sync()
 
     def read(self, length: int) -> BitSequence:
@@ -315,7 +434,7 @@ class JtagController:
             blen = byte_count-1
             # print("RW OUT %s" % out[:pos])
             cmd = bytearray((Ftdi.RW_BYTES_PVE_NVE_LSB,
-                             blen, (blen >> 8) & 0xff))
+                             blen & 0xff, (blen >> 8) & 0xff))
             cmd.extend(out[:pos].tobytes(msby=True))
             self._stack_cmd(cmd)
             # print("push %d bytes" % byte_count)
@@ -327,9 +446,45 @@ class JtagController:
             # print("push %d bits" % bit_count)
         return len(out)
 
+    def queue_read(self, length: int) -> 'JtagFuture':
+        """Read out a sequence of bits from TDO, without waiting for the
+           captured bits.
+
+           :param length: the count of bits to read out
+           :return: the deferred captured bits
+        """
+        byte_count = length//8
+        bit_count = length-8*byte_count
+        # as with immediate reads, each command should fit into the FTDI fifo
+        for pos in range(0, byte_count, JtagController.FTDI_PIPE_LEN):
+            alen = min(byte_count-pos, JtagController.FTDI_PIPE_LEN)-1
+            cmd = bytearray((Ftdi.READ_BYTES_NVE_LSB, alen & 0xff,
+                             (alen >> 8) & 0xff))
+            self._stack_cmd(cmd)
+        if bit_count:
+            cmd = bytearray((Ftdi.READ_BITS_NVE_LSB, bit_count-1))
+            self._stack_cmd(cmd)
+        return self._queue_reply(byte_count, bit_count, 0)
+
+    def queue_from_buffer(self, length: int,
+                          tms_count: int = 0) -> 'JtagFuture':
+        """Retrieve the specified number of bits from the FTDI read buffer,
+           without waiting for the captured bits.
+
+           :param length: the count of bits captured with
+                          :py:meth:`write_with_read`
+           :param tms_count: the length of the following TMS sequence
+                             captured with :py:meth:`write_tms`, if any, whose
+                             first bit is appended to the captured bits
+           :return: the deferred captured bits
+        """
+        byte_count = length//8
+        bit_count = length-8*byte_count
+        return self._queue_reply(byte_count, bit_count, tms_count)
+
     def read_from_buffer(self, length) -> BitSequence:
         """Read the specified number of bits from the FTDI read buffer."""
-        self.sync()
+        self.flush()
         bs = BitSequence()
         byte_count = length//8
         pos = 8*byte_count
@@ -356,6 +511,53 @@ class JtagController:
             raise ValueError("Internal error")
         return bs
 
+    def shift_bytes(self, data: Union[bytes, bytearray, memoryview],
+                    read: bool = False) -> Optional[bytearray]:
+        """Shift a raw byte buffer through TDI, each byte LSB first.
+
+           Bytes are streamed with byte-wide MPSSE commands, without any
+           BitSequence conversion. When TDO is captured, commands are
+           pipelined so that the device always has a pending request to
+           execute while the host retrieves the previous reply.
+
+           The TAP controller is left in its current shift state.
+
+           :param data: the bytes to shift out
+           :param read: whether to capture TDO
+           :return: the captured TDO bytes if read is set, None otherwise
+        """
+        self.flush()
+        data = memoryview(data).cast('B')
+        if not read:
+            for pos in range(0, len(data), self.MPSSE_PAYLOAD_MAX_LENGTH):
+                chunk = data[pos:pos+self.MPSSE_PAYLOAD_MAX_LENGTH]
+                olen = len(chunk)-1
+                cmd = bytearray((Ftdi.WRITE_BYTES_NVE_LSB, olen & 0xff,
+                                 (olen >> 8) & 0xff))
+                cmd.extend(chunk)
+                self._ftdi.write_data(cmd)
+            return None
+        # two requests may be in flight: each reply should fit in half of the
+        # FTDI RX FIFO, so that the MPSSE engine never stalls
+        chunk_size = max(1, self._ftdi.fifo_sizes[1]//2)
+        tdo = bytearray(len(data))
+        tdo_view = memoryview(tdo)
+        pending = []
+        for pos in range(0, len(data), chunk_size):
+            chunk = data[pos:pos+chunk_size]
+            olen = len(chunk)-1
+            cmd = bytearray((Ftdi.RW_BYTES_PVE_NVE_LSB, olen & 0xff,
+                             (olen >> 8) & 0xff))
+            cmd.extend(chunk)
+            cmd.append(Ftdi.SEND_IMMEDIATE)
+            self._ftdi.write_data(cmd)
+            pending.append((pos, len(chunk)))
+            if len(pending) > 1:
+                self._read_shifted(tdo_view, *pending.pop(0))
+        for pos, size in pending:
+            self._read_shifted(tdo_view, pos, size)
+        return tdo
+
     @property
     def ftdi(self) -> Ftdi:
         """Return the Ftdi instance.
@@ -364,6 +566,26 @@ class JtagController:
         """
         return self._ftdi
 
+    def _read_shifted(self, buf: memoryview, pos: int, size: int) -> None:
+        if self._ftdi.read_data_into(buf[pos:pos+size], attempt=4) != size:
+            raise JtagError('Unable to read data from FTDI')
+
+    def _queue_reply(self, byte_count: int, bit_count: int,
+                     tms_count: int) -> 'JtagFuture':
+        size = byte_count + int(bool(bit_count)) + int(bool(tms_count))
+        # keep the pending replies within the FTDI RX FIFO
+        if self._pending and \
+                self._pending_size+size > self._ftdi.fifo_sizes[1]//2:
+            self.flush()
+        future = JtagFuture(self)
+        self._pending.append((future, byte_count, bit_count, tms_count))
+        self._pending_size += size
+        return future
+
+    def _discard_pending(self) -> None:
+        self._pending.clear()
+        self._pending_size = 0
+
     def _stack_cmd(self, cmd: Union[bytes, bytearray]):
         if not isinstance(cmd, (bytes, bytearray)):
             raise TypeError('Expect bytes or bytearray')
@@ -380,7 +602,7 @@ class JtagController:
             raise JtagError("Cannot fit into FTDI fifo")
         cmd = bytearray((Ftdi.READ_BITS_NVE_LSB, length-1))
         self._stack_cmd(cmd)
-        self.sync()
+        self.flush()
         data = self._ftdi.read_data_bytes(1, 4)
         # need to shift bits as they are shifted in from the MSB in FTDI
         byte = data[0] >> 8-length
@@ -404,7 +626,7 @@ class JtagController:
         cmd = bytearray((Ftdi.READ_BYTES_NVE_LSB, alen & 0xff,
                          (alen >> 8) & 0xff))
         self._stack_cmd(cmd)
-        self.sync()
+        self.flush()
         data = self._ftdi.read_data_bytes(length, 4)
         bs = BitSequence(bytes_=data, length=8*length)
         # print("READ BYTES %s" % bs)
@@ -436,6 +658,7 @@ class JtagEngine:
         self._ctrl = JtagController(trst, frequency)
         self._sm = JtagStateMachine()
         self._seq = bytearray()
+        self._deferred = False
 
     @property
     def state_machine(self):
@@ -484,10 +707,10 @@ class JtagEngine:
 
     def change_state(self, statename) -> None:
         """Advance the TAP controller to the defined state"""
-        # find the state machine path to move to the new instruction
-        path = self._sm.find_path(statename)
-        # convert the path into an event sequence
-        events = self._sm.get_events(path)
+        # find the precomputed event sequence to move to the new state
+        events = self._sm.find_events(statename)
+        if not events:
+            return
         # update the remote device tap controller
         self._ctrl.write_tms(events)
         # update the current state machine's state
@@ -513,13 +736,50 @@ class JtagEngine:
         self._ctrl.write(data)
         self.change_state('update_dr')
 
-    def read_dr(self, length: int) -> BitSequence:
+    def read_dr(self, length: int) -> Union[BitSequence, JtagFuture]:
         """Read the data register from the TAP controller"""
         self.change_state('shift_dr')
-        data = self._ctrl.read(length)
+        if self._deferred:
+            data = self._ctrl.queue_read(length)
+        else:
+            data = self._ctrl.read(length)
         self.change_state('update_dr')
         return data
 
+    def shift_dr_bytes(self, data: Union[bytes, bytearray, memoryview],
+                       read: bool = False) -> Optional[bytes]:
+        """Shift a byte buffer into the data register, then update it.
+
+           Bytes are shifted in order, each byte LSB first. This is the fast
+           path to shift large buffers, such as FPGA bitstreams or flash
+           images, as data bypass any BitSequence conversion.
+
+           :param data: the bytes to shift into the data register
+           :param read: whether to capture the bits shifted out
+           :return: the bytes shifted out of the data register if read is set,
+                    None otherwise
+        """
+        data = memoryview(data).cast('B')
+        if not data:
+            raise JtagError('Nothing to shift')
+        self.change_state('shift_dr')
+        tdo = self._ctrl.shift_bytes(data[:-1], read)
+        # the very last bit is shifted along with the TMS exit sequence
+        last = BitSequence(data[-1], length=8)
+        if not read:
+            self._ctrl.write(last, use_last=True)
+            self.change_state('update_dr')
+            return None
+        bits_out = self._ctrl.write_with_read(last, use_last=True)
+        events = BitSequence('11')
+        self.write_tms(events, should_read=True)
+        self._sm.handle_events(events)
+        bs = self._ctrl.read_from_buffer(bits_out)
+        last_bits = self._ctrl.read_from_buffer(2)
+        bs.append(BitSequence((last_bits.tobyte() & 0x1), length=1))
+        tdo.append(bs.tobyte())
+        return bytes(tdo)
+
     def capture_dr(self) -> None:
         """Capture the current data register from the TAP controller"""
         self.change_state('capture_dr')
@@ -527,7 +787,31 @@ class JtagEngine:
     def sync(self) -> None:
         self._ctrl.sync()
 
-    def shift_register(self, out: BitSequence) -> BitSequence:
+    def set_deferred(self, enable: bool) -> None:
+        """Enable or disable deferred reads.
+
+           When deferred reads are enabled, :py:meth:`read_dr`,
+           :py:meth:`shift_register` and :py:meth:`shift_and_update_register`
+           do not wait for the captured bits, but return a
+           :py:class:`JtagFuture`. JTAG commands keep being accumulated, so
+           that many reads are resolved with a single USB round-trip, either
+           on the first :py:meth:`JtagFuture.result` call or on
+           :py:meth:`flush`.
+
+           Disabling deferred reads resolves all the pending reads.
+
+           :param enable: whether to defer reads
+        """
+        self._deferred = enable
+        if not enable:
+            self._ctrl.flush()
+
+    def flush(self) -> None:
+        """Send the pending commands and resolve all the deferred reads."""
+        self._ctrl.flush()
+
+    def shift_register(self, out: BitSequence) \
+            -> Union[BitSequence, JtagFuture]:
         if not self._sm.state_of('shift'):
             raise JtagError("Invalid state: %s" % self._sm.state())
         if self._sm.state_of('capture'):
@@ -536,13 +820,16 @@ class JtagEngine:
             self._sm.handle_events(bs)
 
         bits_out = self._ctrl.write_with_read(out)
+        if self._deferred:
+            return self._ctrl.queue_from_buffer(bits_out)
         bs = self._ctrl.read_from_buffer(bits_out)
         if len(bs) != len(out):
             raise ValueError("Internal error")
 
         return bs
 
-    def shift_and_update_register(self, out: BitSequence) -> BitSequence:
+    def shift_and_update_register(self, out: BitSequence) \
+            -> Union[BitSequence, JtagFuture]:
         """Shift a BitSequence into the current register and retrieve the
            register output, advancing the state to update_*r"""
         if not self._sm.state_of('shift'):
@@ -557,6 +844,10 @@ class JtagEngine:
 
         # Advance the state from shift to update
         events = BitSequence('11')
+        if self._deferred:
+            self._ctrl.write_tms(events, should_read=True, flush=False)
+            self._sm.handle_events(events)
+            return self._ctrl.queue_from_buffer(bits_out, len(events))
         self.write_tms(events, should_read=True)
         # (write_tms calls sync())
         # update the current state machine's state
@@ -574,6 +865,263 @@ class JtagEngine:
 
         return bs
 
+    def scan_planner(self, chain: 'JtagChain') -> 'JtagScanPlanner':
+        """Create a planner to batch IR and DR scans on a multi-device
+           JTAG chain.
+
+           :param chain: the JTAG chain model
+           :return: a new scan planner
+        """
+        return JtagScanPlanner(self, chain)
+
+
+class JtagChain:
+    """Model of a JTAG scan chain made of several devices.
+
+       Devices are indexed from the one closest to TDO to the one closest to
+       TDI, which is the order of the bits shifted in and out of the chain:
+       the first bits of a scan target device 0.
+
+       :param ir_lengths: the instruction register length of each device
+    """
+
+    def __init__(self, ir_lengths: Iterable[int]):
+        self._ir_lengths = tuple(ir_lengths)
+        if not self._ir_lengths or min(self._ir_lengths) < 1:
+            raise ValueError('Invalid IR lengths')
+
+    def __len__(self) -> int:
+        return len(self._ir_lengths)
+
+    @property
+    def ir_lengths(self) -> Tuple[int, ...]:
+        """Return the instruction register length of each device.
+
+           :return: the IR lengths, in bits
+        """
+        return self._ir_lengths
+
+    @property
+    def ir_length(self) -> int:
+        """Return the instruction register length of the whole chain.
+
+           :return: the sum of the device IR lengths, in bits
+        """
+        return sum(self._ir_lengths)
+
+    def bypass(self, device: int) -> BitSequence:
+        """Return the BYPASS instruction of a device.
+
+           :param device: the device index
+           :return: the BYPASS instruction, i.e. all ones
+        """
+        length = self._ir_lengths[device]
+        return BitSequence((1 << length)-1, length=length)
+
+    def build_ir(self, instructions: Mapping[int, BitSequence]) \
+            -> BitSequence:
+        """Build the bit stream to shift into the chain IR.
+
+           :param instructions: the instruction to load, per device index.
+                                Other devices are set in BYPASS mode.
+           :return: the bit stream for the whole chain
+        """
+        stream = BitSequence()
+        for device, length in enumerate(self._ir_lengths):
+            instruction = instructions.get(device)
+            if instruction is None:
+                stream.append(self.bypass(device))
+                continue
+            if len(instruction) != length:
+                raise JtagError('Invalid IR length for device %d: %d' %
+                                (device, len(instruction)))
+            stream.append(instruction)
+        return stream
+
+
+class JtagScanPlanner:
+    """Queue IR and DR scans on the devices of a JTAG chain, and execute
+       them as a single MPSSE command stream.
+
+       Consecutive operations of the same kind on different devices are
+       merged into a single scan, other devices being padded: they are set
+       in BYPASS mode for IR scans, and the data last shifted into their
+       current data register are shifted in again for DR scans. The update
+       of a padded device therefore latches the same data again, e.g. the
+       boundary scan cells of a device in EXTEST mode keep driving the same
+       output levels. As a consequence, once the instruction of a device is
+       changed to another one than BYPASS, a DR scan should be queued for
+       this device before it can be padded.
+
+       The TAP controller moves straight from one update state to the next
+       shift state, and the TDO replies are retrieved as deferred reads,
+       once all the commands have been sent (see
+       :py:meth:`JtagEngine.set_deferred`).
+
+       Example:
+
+       >>> planner = engine.scan_planner(JtagChain((4, 6, 8)))
+       >>> planner.ir(0, BitSequence(0b0001, length=4))
+       >>> planner.ir(2, BitSequence(0x02, length=8))
+       >>> idx = planner.dr(0, BitSequence(length=32), read=True)
+       >>> planner.dr(2, BitSequence(0xa5, length=8))
+       >>> idcode = planner.execute()[idx]
+
+       A planner is never instantiated directly: use
+       :py:meth:`JtagEngine.scan_planner` instead.
+
+       :param engine: the JTAG engine to use
+       :param chain: the JTAG chain model
+    """
+
+    def __init__(self, engine: 'JtagEngine', chain: JtagChain):
+        self._engine = engine
+        self._chain = chain
+        self._ops: List[Tuple[str, int, BitSequence, bool]] = []
+        # data last shifted into the data register selected in each device,
+        # if known
+        self._dr_data: List[Optional[BitSequence]] = [None] * len(chain)
+
+    @property
+    def chain(self) -> JtagChain:
+        """Return the JTAG chain model.
+
+           :return: the chain
+        """
+        return self._chain
+
+    def ir(self, device: int, instruction: BitSequence) -> int:
+        """Queue an instruction register scan.
+
+           :param device: the device index
+           :param instruction: the instruction to load
+           :return: the index of the operation
+        """
+        self._check_device(device)
+        if len(instruction) != self._chain.ir_lengths[device]:
+            raise JtagError('Invalid IR length for device %d: %d' %
+                            (device, len(instruction)))
+        self._ops.append(('ir', device, instruction, False))
+        return len(self._ops)-1
+
+    def dr(self, device: int, data: BitSequence, read: bool = False) -> int:
+        """Queue a data register scan.
+
+           :param device: the device index
+           :param data: the bits to shift into the data register
+           :param read: whether to capture the bits shifted out of the data
+                        register
+           :return: the index of the operation, to retrieve the captured bits
+                    from the results
+        """
+        self._check_device(device)
+        if not data:
+            raise JtagError('Nothing to shift')
+        self._ops.append(('dr', device, data, read))
+        return len(self._ops)-1
+
+    def read_dr(self, device: int, length: int) -> int:
+        """Queue a data register read out, shifting zeros in.
+
+           :param device: the device index
+           :param length: the count of bits to read out
+           :return: the index of the operation, to retrieve the captured bits
+                    from the results
+        """
+        return self.dr(device, BitSequence(length=length), True)
+
+    def execute(self) -> List[Optional[BitSequence]]:
+        """Execute the queued operations.
+
+           The TAP controller is left in the update state of the last scan.
+
+           :return: the captured bits of each operation, or None for the
+                    operations that do not capture data
+        """
+        ops, self._ops = self._ops, []
+        results: List[Optional[BitSequence]] = [None] * len(ops)
+        scans = self._plan(ops)
+        if not scans:
+            return results
+        ctrl = self._engine.controller
+        stm = self._engine.state_machine
+        pending: List[Tuple[List[Tuple[int, int, int]], JtagFuture]] = []
+        events = stm.find_events('shift_%s' % scans[0][0])
+        if events:
+            ctrl.write_tms(events)
+            stm.handle_events(events)
+        for pos, (kind, out, reads) in enumerate(scans):
+            # exit to the update state, then move on to the next scan within
+            # the same TMS command
+            tms = [True, True]
+            if pos+1 < len(scans):
+                tms.extend(stm.find_events('shift_%s' % scans[pos+1][0],
+                                           'update_%s' % kind))
+            events = BitSequence(tms)
+            if reads:
+                if len(out) > 1:
+                    ctrl.write_with_read(out, use_last=True)
+                else:
+                    ctrl.write(out, use_last=True)
+                ctrl.write_tms(events, should_read=True, flush=False)
+                pending.append((reads, ctrl.queue_from_buffer(len(out)-1,
+                                                              len(events))))
+            else:
+                ctrl.write(out, use_last=True)
+                ctrl.write_tms(events)
+            stm.handle_events(events)
+        ctrl.flush()
+        for reads, future in pending:
+            bs = future.result()
+            for idx, offset, count in reads:
+                results[idx] = bs[offset:offset+count]
+        return results
+
+    def _check_device(self, device: int) -> None:
+        if not 0 <= device < len(self._chain):
+            raise JtagError('No such device in chain: %d' % device)
+
+    def _plan(self, ops: List[Tuple[str, int, BitSequence, bool]]) \
+            -> List[Tuple[str, BitSequence, List[Tuple[int, int, int]]]]:
+        groups: List[Tuple[str, Dict[int, int]]] = []
+        for idx, (kind, device, _, _) in enumerate(ops):
+            if not groups or groups[-1][0] != kind or \
+                    device in groups[-1][1]:
+                groups.append((kind, {}))
+            groups[-1][1][device] = idx
+        scans = []
+        for kind, devices in groups:
+            reads = []
+            if kind == 'ir':
+                instructions = {dev: ops[idx][2]
+                                for dev, idx in devices.items()}
+                stream = self._chain.build_ir(instructions)
+                for dev in range(len(self._chain)):
+                    instruction = instructions.get(dev)
+                    if instruction is None or \
+                            instruction == self._chain.bypass(dev):
+                        self._dr_data[dev] = BitSequence(length=1)
+                    else:
+                        self._dr_data[dev] = None
+            else:
+                stream = BitSequence()
+                for dev in range(len(self._chain)):
+                    if dev in devices:
+                        _, _, data, read = ops[devices[dev]]
+                        if read:
+                            reads.append((devices[dev], len(stream),
+                                          len(data)))
+                        self._dr_data[dev] = BitSequence(data)
+                        stream.append(data)
+                        continue
+                    data = self._dr_data[dev]
+                    if data is None:
+                        raise JtagError('Unknown DR content for device %d' %
+                                        dev)
+                    stream.append(data)
+            scans.append((kind, stream, reads))
+        return scans
+
 
 class JtagTool:
     """A helper class with facility functions"""
@@ -584,8 +1132,44 @@ class JtagTool:
     def idcode(self) -> None:
         idcode = self._engine.read_dr(32)
         self._engine.go_idle()
+        if isinstance(idcode, JtagFuture):
+            idcode = idcode.result()
         return int(idcode)
 
+    def idcodes(self, max_devices: int = 32) -> List[Optional[int]]:
+        """Read out the identification code of each device of the chain.
+
+           The TAP controllers are reset, so that each device selects either
+           its IDCODE register, whose first bit is always set, or its BYPASS
+           register, which is a single zero bit.
+
+           :param max_devices: the maximum count of devices in the chain
+           :return: the IDCODE of each device, starting from the device
+                    closest to TDO, or None for devices without IDCODE
+        """
+        self._engine.reset()
+        # ones are shifted in, which cannot be mistaken for a valid IDCODE
+        length = 32*(max_devices+1)
+        self._engine.change_state('shift_dr')
+        bits = self._engine.shift_and_update_register(
+            BitSequence((1 << length)-1, length=length))
+        self._engine.go_idle()
+        if isinstance(bits, JtagFuture):
+            bits = bits.result()
+        idcodes = []
+        pos = 0
+        while len(idcodes) <= max_devices:
+            if not bits[pos]:
+                idcodes.append(None)
+                pos += 1
+                continue
+            idcode = int(bits[pos:pos+32])
+            if idcode == 0xffffffff:
+                return idcodes
+            idcodes.append(idcode)
+            pos += 32
+        raise JtagError('Unable to detect the end of the chain')
+
     def preload(self, bsdl, data) -> None:
         instruction = bsdl.get_jtag_ir('preload')
         self._engine.write_ir(instruction)
@@ -597,6 +1181,8 @@ class JtagTool:
         self._engine.write_ir(instruction)
         data = self._engine.read_dr(bsdl.get_boundary_length())
         self._engine.go_idle()
+        if isinstance(data, JtagFuture):
+            data = data.result()
         return data
 
     def extest(self, bsdl) -> None:
@@ -606,6 +1192,8 @@ class JtagTool:
     def readback(self, bsdl):
         data = self._engine.read_dr(bsdl.get_boundary_length())
         self._engine.go_idle()
+        if isinstance(data, JtagFuture):
+            data = data.result()
         return data
 
     def detect_register_size(self) -> int:
@@ -632,6 +1220,8 @@ class JtagTool:
                 ok = False
                 self._engine.write(zero, False)
                 rcv = self._engine.shift_register(inj)
+                if isinstance(rcv, JtagFuture):
+                    rcv = rcv.result()
                 try:
                     tdo = rcv.invariant()
                 except ValueError:
@@ -11,6 +11,8 @@
 #pylint: disable-msg=missing-module-docstring
 
 from io import RawIOBase
+from socket import socketpair
+from threading import Condition
 from time import sleep, time as now
 from serial import SerialBase, SerialException, VERSION as pyserialver
 from pyftdi.ftdi import Ftdi
@@ -28,6 +30,9 @@ class FtdiSerial(SerialBase):
 
     PYSERIAL_VERSION = tuple([int(x) for x in pyserialver.split('.')])
 
+    RX_BUFFER_SIZE = 64 << 10
+    """Maximum count of received bytes buffered on the host side."""
+
     def open(self):
         """Open the initialized serial port"""
         if self.port is None:
@@ -38,6 +43,12 @@ class FtdiSerial(SerialBase):
             raise SerialException('Unable to open USB port %s: %s' %
                                   (self.portstr, str(ex))) from ex
         self.udev = device
+        self._rx_buf = bytearray()
+        self._rx_cond = Condition()
+        self._rx_pump = False
+        self._rx_abort = False
+        self._rx_ready = None
+        self._rx_signaled = False
         self._set_open_state(True)
         self._reconfigure_port()
 
@@ -45,30 +56,60 @@ class FtdiSerial(SerialBase):
         """Close the open port"""
         self._set_open_state(False)
         if self.udev:
+            self._stop_rx_pump()
             self.udev.close()
             self.udev = None
+            if self._rx_ready:
+                for sock in self._rx_ready:
+                    sock.close()
+                self._rx_ready = None
 
     def read(self, size=1):
         """Read size bytes from the serial port. If a timeout is set it may
            return less characters as requested. With no timeout it will block
            until the requested number of bytes is read."""
-        data = bytearray()
-        start = now()
-        while True:
-            buf = self.udev.read_data(size)
-            data.extend(buf)
-            size -= len(buf)
-            if size <= 0:
-                break
-            if self._timeout is not None:
-                if buf:
-                    break
-                ms = now()-start
-                if ms > self._timeout:
-                    break
-            sleep(0.01)
+        data = bytearray(size)
+        count = self.readinto(data)
+        del data[count:]
         return bytes(data)
 
+    def readinto(self, b):
+        """Read bytes from the serial port into a pre-allocated, writable
+           bytes-like object. If a timeout is set it may fill in less
+           characters as requested. With no timeout it will block until the
+           buffer is filled in.
+
+           :return: the count of read bytes"""
+        buf = memoryview(b).cast('B')
+        size = len(buf)
+        pos = 0
+        self._start_rx_pump()
+        timeout = self._timeout
+        expire = None if timeout is None else now() + timeout
+        with self._rx_cond:
+            while pos < size:
+                count = min(len(self._rx_buf), size-pos)
+                if count:
+                    buf[pos:pos+count] = self._rx_buf[:count]
+                    del self._rx_buf[:count]
+                    pos += count
+                    self._update_rx_ready()
+                    # the RX pump may wait for some room in the buffer
+                    self._rx_cond.notify_all()
+                    if timeout is not None:
+                        break
+                    continue
+                if self._rx_abort:
+                    raise SerialException('USB reception aborted')
+                if expire is None:
+                    self._rx_cond.wait()
+                    continue
+                remaining = expire - now()
+                if remaining <= 0:
+                    break
+                self._rx_cond.wait(remaining)
+        return pos
+
     def write(self, data):
         """Output the given string over the serial port."""
         return self.udev.write_data(data)
@@ -80,6 +121,10 @@ class FtdiSerial(SerialBase):
     def reset_input_buffer(self):
         """Clear input buffer, discarding all that is in the buffer."""
         self.udev.purge_rx_buffer()
+        with self._rx_cond:
+            self._rx_buf.clear()
+            self._update_rx_ready()
+            self._rx_cond.notify_all()
 
     def reset_output_buffer(self):
         """Clear output buffer, aborting the current output and
@@ -104,6 +149,33 @@ class FtdiSerial(SerialBase):
         """Set terminal status line: Data Terminal Ready"""
         self.udev.set_dtr(self._dtr_state)
 
+    def fileno(self):
+        """Return a file descriptor which becomes readable whenever received
+           data are available, so that the port can be used with select,
+           selectors or an asyncio event loop (``loop.add_reader``).
+
+           The descriptor only reports the readiness of the port: data should
+           be retrieved with :py:meth:`read`, never from the descriptor.
+           It also becomes readable if the reception is aborted, so that the
+           next read reports the error.
+
+           The descriptor is a socket, which unlike a pipe, can be selected
+           on any host, Windows included.
+
+           :return: the readiness file descriptor
+        """
+        if not self.is_open:
+            raise SerialException('Port is not open')
+        with self._rx_cond:
+            if not self._rx_ready:
+                self._rx_ready = socketpair()
+                for sock in self._rx_ready:
+                    sock.setblocking(False)
+                self._rx_signaled = False
+                self._update_rx_ready()
+        self._start_rx_pump()
+        return self._rx_ready[0].fileno()
+
     @property
     def ftdi(self) -> Ftdi:
         """Return the Ftdi instance.
@@ -147,8 +219,9 @@ class FtdiSerial(SerialBase):
     @property
     def in_waiting(self):
         """Return the number of characters currently in the input buffer."""
-        # not implemented
-        return 0
+        self._start_rx_pump()
+        with self._rx_cond:
+            return len(self._rx_buf)
 
     @property
     def out_waiting(self):
@@ -184,6 +257,75 @@ class FtdiSerial(SerialBase):
     def _set_open_state(self, open_):
         self.is_open = bool(open_)
 
+    def _start_rx_pump(self):
+        """Start the background reception on first use of the serial input
+           API, so that the Ftdi read API may still be used directly with
+           ports that never use the former.
+        """
+        if self._rx_pump:
+            return
+        if not self.is_open:
+            raise SerialException('Port is not open')
+        self._rx_pump = True
+        self._rx_abort = False
+        self.udev.start_stream(callback=self._rx_push)
+
+    def _stop_rx_pump(self):
+        if not self._rx_pump:
+            return
+        with self._rx_cond:
+            self._rx_pump = False
+            self._rx_cond.notify_all()
+        self.udev.stop_stream()
+        with self._rx_cond:
+            self._rx_buf.clear()
+            self._update_rx_ready()
+
+    def _rx_push(self, chunk):
+        """Store data received from the RX pump thread, and wake up the
+           readers. When the buffer is full, wait for the readers to consume
+           data, which in turn lets the FTDI FIFO fill up and the flow
+           control throttle the remote peer.
+        """
+        with self._rx_cond:
+            if not chunk:
+                # end of stream: unexpected unless the pump is being stopped
+                self._rx_abort = self._rx_pump
+                self._update_rx_ready()
+                self._rx_cond.notify_all()
+                return
+            pos = 0
+            while pos < len(chunk):
+                room = self.RX_BUFFER_SIZE - len(self._rx_buf)
+                if room <= 0:
+                    if not self._rx_pump:
+                        return
+                    self._rx_cond.wait(0.1)
+                    continue
+                self._rx_buf.extend(chunk[pos:pos+room])
+                pos += room
+                self._update_rx_ready()
+                self._rx_cond.notify_all()
+
+    def _update_rx_ready(self):
+        """Reflect the reception state into the readiness descriptor, if
+           any. The socket holds a single byte as long as the port has some
+           data to read. Should be called with the RX lock held.
+        """
+        if not self._rx_ready:
+            return
+        ready = bool(self._rx_buf) or self._rx_abort
+        if ready == self._rx_signaled:
+            return
+        if ready:
+            self._rx_ready[1].send(b'\x01')
+        else:
+            try:
+                self._rx_ready[0].recv(1)
+            except BlockingIOError:
+                pass
+        self._rx_signaled = ready
+
 
 # assemble Serial class with the platform specific implementation and the base
 # for file-like behavior.
@@ -17,7 +17,8 @@
 from logging import getLogger
 from struct import calcsize as scalc, pack as spack, unpack as sunpack
 from threading import Lock
-from typing import Any, Iterable, Mapping, Optional, Set, Union
+from typing import (Any, Iterable, Iterator, List, Mapping, Optional, Set,
+                    Tuple, Union)
 from usb.core import Device as UsbDevice
 from .ftdi import Ftdi, FtdiError
 
@@ -61,6 +62,10 @@ class SpiPort:
                  duplex: bool = False, droptail: int = 0) -> bytes:
         """Perform an exchange or a transaction with the SPI slave
 
+           Payloads larger than :py:const:`SpiController.PAYLOAD_MAX_LENGTH`
+           are transparently split into several MPSSE commands, while /CS
+           is kept asserted for the whole exchange.
+
            :param out: data to send to the SPI slave, may be empty to read out
                        data from the slave with no write.
            :param readlen: count of bytes to read out from the slave,
@@ -107,6 +112,28 @@ class SpiPort:
                                          self._cpol, self._cpha, False,
                                          droptail)
 
+    def readinto(self, buf: Union[bytearray, memoryview],
+                 start: bool = True, stop: bool = True,
+                 droptail: int = 0) -> int:
+        """Read out bytes from the slave into a caller-provided buffer
+
+           :param buf: the destination buffer, its size defines the count of
+                       bytes to read out from the slave
+           :param start: whether to start an SPI transaction, i.e.
+                        activate the /CS line for the slave. Use False to
+                        resume a previously started transaction
+           :param stop: whether to desactivete the /CS line for the slave.
+                       Use False if the transaction should complete with a
+                       further call to exchange()
+           :param droptail: ignore up to 7 last bits (for non-byte sized SPI
+                               accesses)
+           :return: the count of bytes read out from the slave
+        """
+        return self._controller.readinto(self._frequency, buf,
+                                         start and self._cs_prolog,
+                                         stop and self._cs_epilog,
+                                         self._cpol, self._cpha, droptail)
+
     def write(self, out: Union[bytes, bytearray, Iterable[int]],
               start: bool = True, stop: bool = True, droptail: int = 0) \
         -> None:
@@ -209,6 +236,14 @@ class SpiPort:
         """Return the current SPI bus block"""
         return self._frequency
 
+    @property
+    def controller(self) -> 'SpiController':
+        """Return the SPI controller which manages this port.
+
+           :return: the SPI controller
+        """
+        return self._controller
+
     @property
     def cs(self) -> int:
         """Return the /CS index.
@@ -324,6 +359,134 @@ class SpiGpioPort:
         self._controller.set_gpio_direction(pins, direction)
 
 
+class SpiBatch:
+    """Batch of SPI transactions.
+
+       All the transactions of a batch, which may target different SPI
+       slaves with different SPI modes, are encoded into a single MPSSE
+       command sequence. They are executed with a single USB write request
+       and a single USB read request, whose reply is split back per
+       transaction.
+
+       Changing the SPI bus frequency or the clock phase requires a device
+       round-trip: consecutive transactions sharing the same clock
+       configuration are executed at once, so slaves should be grouped by
+       clock configuration to get the best of batched transactions.
+
+       A batch is never instanciated directly: use
+       :py:meth:`SpiController.batch()` method to create a batch.
+
+       Example:
+
+       >>> with ctrl.batch() as batch:
+       ...     batch.exchange(spi0, [0x9f], 3)
+       ...     batch.read(spi1, 2)
+       >>> jedec, status = batch.results
+
+       Each queued transaction is a complete transaction, i.e. /CS is always
+       asserted before and released after each of them.
+
+       The total count of bytes read out from the transactions of a batch
+       sharing the same clock configuration is limited to
+       :py:const:`SpiController.PAYLOAD_MAX_LENGTH`.
+    """
+
+    def __init__(self, controller: 'SpiController'):
+        self._controller = controller
+        self._transactions: List[Tuple] = []
+        self._results: List[bytes] = []
+
+    def __enter__(self) -> 'SpiBatch':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not exc_type:
+            self.execute()
+
+    def __len__(self) -> int:
+        return len(self._transactions)
+
+    def exchange(self, port: SpiPort,
+                 out: Union[bytes, bytearray, Iterable[int]] = b'',
+                 readlen: int = 0, duplex: bool = False,
+                 droptail: int = 0) -> int:
+        """Queue an exchange with a SPI slave.
+
+           :param port: the SPI port of the slave
+           :param out: data to send to the SPI slave, may be empty to read out
+                       data from the slave with no write.
+           :param readlen: count of bytes to read out from the slave,
+                       may be zero to only write to the slave
+           :param duplex: perform a full-duplex exchange (vs. half-duplex),
+                          i.e. bits are clocked in and out at once.
+           :param droptail: ignore up to 7 last bits (for non-byte sized SPI
+                               accesses)
+           :return: the index of the transaction within the batch
+        """
+        #pylint: disable-msg=protected-access
+        if port._controller is not self._controller:
+            raise SpiIOError('SPI port is managed by another controller')
+        if not 0 <= droptail <= 7:
+            raise ValueError('Invalid skip bit count')
+        if duplex:
+            if readlen > len(out):
+                tmp = bytearray(out)
+                tmp.extend([0] * (readlen - len(out)))
+                out = tmp
+            elif not readlen:
+                readlen = len(out)
+        elif not isinstance(out, (bytes, bytearray)):
+            out = bytes(out)
+        self._transactions.append((port._frequency, out, readlen,
+                                   port._cs_prolog, port._cs_epilog,
+                                   port._cpol, port._cpha, duplex, droptail))
+        return len(self._transactions) - 1
+
+    def read(self, port: SpiPort, readlen: int, droptail: int = 0) -> int:
+        """Queue a read out of bytes from a SPI slave.
+
+           :param port: the SPI port of the slave
+           :param readlen: count of bytes to read out from the slave
+           :param droptail: ignore up to 7 last bits (for non-byte sized SPI
+                               accesses)
+           :return: the index of the transaction within the batch
+        """
+        return self.exchange(port, b'', readlen, droptail=droptail)
+
+    def write(self, port: SpiPort,
+              out: Union[bytes, bytearray, Iterable[int]],
+              droptail: int = 0) -> int:
+        """Queue a write of bytes to a SPI slave.
+
+           :param port: the SPI port of the slave
+           :param out: data to send to the SPI slave
+           :param droptail: ignore up to 7 last bits (for non-byte sized SPI
+                               accesses)
+           :return: the index of the transaction within the batch
+        """
+        return self.exchange(port, out, 0, droptail=droptail)
+
+    def execute(self) -> List[bytes]:
+        """Execute all the queued transactions, and empty the batch.
+
+           :return: the data read out from the slaves, one entry per
+                    transaction, in queuing order
+        """
+        transactions, self._transactions = self._transactions, []
+        #pylint: disable-msg=protected-access
+        self._results = self._controller._execute_batch(transactions)
+        return self._results
+
+    @property
+    def results(self) -> List[bytes]:
+        """Return the data read out from the last executed transactions.
+
+           :return: the data read out from the slaves, one entry per
+                    transaction, in queuing order
+        """
+        return self._results
+
+
 class SpiController:
     """SPI master.
 
@@ -339,6 +502,7 @@ class SpiController:
     CS_BIT = 0x08
     SPI_BITS = DI_BIT | DO_BIT | SCK_BIT
     PAYLOAD_MAX_LENGTH = 0xFF00  # 16 bits max (- spare for control)
+    PIPELINE_DEPTH = 2  # count of MPSSE sequences awaiting their reply
 
     def __init__(self, cs_count: int = 1, turbo: bool = True):
         self.log = getLogger('pyftdi.spi.ctrl')
@@ -643,6 +807,43 @@ class SpiController:
                                               cs_prolog, cs_epilog,
                                               cpol, cpha, droptail)
 
+    def readinto(self, frequency: float,
+                 buf: Union[bytearray, memoryview],
+                 cs_prolog: Optional[bytes] = None,
+                 cs_epilog: Optional[bytes] = None,
+                 cpol: bool = False, cpha: bool = False,
+                 droptail: int = 0) -> int:
+        """Read out bytes from the SPI slave into a caller-provided buffer.
+
+           :param buf: the destination buffer, its size defines the count of
+                       bytes to read out from the slave
+           :param cs_prolog: the prolog MPSSE command sequence to execute
+                             before the actual exchange.
+           :param cs_epilog: the epilog MPSSE command sequence to execute
+                             after the actual exchange.
+           :param cpol: SPI clock polarity, derived from the SPI mode
+           :param cpol: SPI clock phase, derived from the SPI mode
+           :param droptail: ignore up to 7 last bits (for non-byte sized SPI
+                             accesses)
+           :return: the count of bytes read out from the slave
+        """
+        if not 0 <= droptail <= 7:
+            raise ValueError('Invalid skip bit count')
+        rxbuf = memoryview(buf).cast('B')
+        with self._lock:
+            data = self._exchange_half_duplex(frequency, [], len(rxbuf),
+                                              cs_prolog, cs_epilog,
+                                              cpol, cpha, droptail, rxbuf)
+            return len(data)
+
+    def batch(self) -> SpiBatch:
+        """Create a new batch of SPI transactions, executed with a single USB
+           round-trip.
+
+           :return: an empty batch
+        """
+        return SpiBatch(self)
+
     def force_control(self, frequency: float, sequence: bytes) -> None:
         """Execution an arbitrary SPI control bit sequence.
            Use with extreme care, as it may lead to unexpected results. Regular
@@ -767,26 +968,215 @@ class SpiController:
     def _exchange_half_duplex(self, frequency: float,
                               out: Union[bytes, bytearray, Iterable[int]],
                               readlen: int, cs_prolog: bytes, cs_epilog: bytes,
+                              cpol: bool, cpha: bool, droptail: int,
+                              rxbuf: Optional[memoryview] = None) -> bytes:
+        if not self._ftdi.is_connected:
+            raise SpiIOError("FTDI controller not initialized")
+        sequences = self._iter_half_duplex(frequency, out, readlen,
+                                           cs_prolog, cs_epilog,
+                                           cpol, cpha, droptail)
+        data = self._exchange_sequences(sequences, readlen, rxbuf)
+        if droptail and data:
+            data[-1] = 0xff & (data[-1] << droptail)
+        return data
+
+    def _exchange_full_duplex(self, frequency: float,
+                              out: Union[bytes, bytearray, Iterable[int]],
+                              cs_prolog: bytes, cs_epilog: bytes,
                               cpol: bool, cpha: bool,
                               droptail: int) -> bytes:
         if not self._ftdi.is_connected:
             raise SpiIOError("FTDI controller not initialized")
-        if len(out) > SpiController.PAYLOAD_MAX_LENGTH:
-            raise SpiIOError("Output payload is too large")
+        sequences = self._iter_full_duplex(frequency, out,
+                                           cs_prolog, cs_epilog,
+                                           cpol, cpha, droptail)
+        data = self._exchange_sequences(sequences, len(out))
+        if droptail and data:
+            data[-1] = 0xff & (data[-1] << droptail)
+        return data
+
+    def _iter_half_duplex(self, frequency: float,
+                          out: Union[bytes, bytearray, Iterable[int]],
+                          readlen: int, cs_prolog: bytes, cs_epilog: bytes,
+                          cpol: bool, cpha: bool, droptail: int) \
+            -> Iterator[Tuple[bytearray, bytearray, int]]:
+        """Split a half-duplex exchange into MPSSE command sequences that do
+           not exceed :py:const:`PAYLOAD_MAX_LENGTH`.
+
+           /CS is only asserted with the first sequence and released with the
+           last one, so the slave sees a single transaction.
+
+           :return: an iterator on (command, epilog, reply length) tuples
+        """
+        chunk = SpiController.PAYLOAD_MAX_LENGTH
+        wcount = (len(out)+chunk-1)//chunk
+        rcount = (readlen+chunk-1)//chunk
+        total = wcount + rcount
+        for idx in range(total):
+            if idx < wcount:
+                pos = idx*chunk
+                wout, rlen = out[pos:pos+chunk], 0
+                last = idx == wcount-1
+            else:
+                pos = (idx-wcount)*chunk
+                wout, rlen = b'', min(chunk, readlen-pos)
+                last = idx == total-1
+            cmd, epilog = self._build_half_duplex(
+                frequency, wout, rlen,
+                cs_prolog if idx == 0 else None,
+                cs_epilog if idx == total-1 else None,
+                cpol, cpha, droptail if last else 0)
+            yield cmd, epilog, rlen
+
+    def _iter_full_duplex(self, frequency: float,
+                          out: Union[bytes, bytearray, Iterable[int]],
+                          cs_prolog: bytes, cs_epilog: bytes,
+                          cpol: bool, cpha: bool, droptail: int) \
+            -> Iterator[Tuple[bytearray, bytearray, int]]:
+        """Split a full-duplex exchange into MPSSE command sequences that do
+           not exceed :py:const:`PAYLOAD_MAX_LENGTH`.
+
+           /CS is only asserted with the first sequence and released with the
+           last one, so the slave sees a single transaction.
+
+           :return: an iterator on (command, epilog, reply length) tuples
+        """
+        exlen = len(out)
+        chunk = SpiController.PAYLOAD_MAX_LENGTH
+        if exlen > chunk:
+            # the MPSSE engine stops consuming its TX FIFO whenever its RX
+            # FIFO is full: the replies to the queued sequences should fit
+            # into the RX FIFO, or the USB write of the next sequence would
+            # stall until the current reply is retrieved, i.e. never.
+            chunk = max(1, self._ftdi.fifo_sizes[1]//2)
+        for pos in range(0, exlen, chunk):
+            last = pos+chunk >= exlen
+            cmd, epilog = self._build_full_duplex(
+                frequency, out[pos:pos+chunk],
+                cs_prolog if pos == 0 else None,
+                cs_epilog if last else None,
+                cpol, cpha, droptail if last else 0)
+            yield cmd, epilog, min(chunk, exlen-pos)
+
+    def _exchange_sequences(self,
+                            sequences: Iterable[Tuple[bytearray, bytearray,
+                                                      int]],
+                            readlen: int,
+                            rxbuf: Optional[memoryview] = None) -> bytearray:
+        """Execute MPSSE command sequences and retrieve their replies.
+
+           The next sequence is always queued before the reply of the
+           current one is retrieved, so that the MPSSE engine is kept busy
+           while the host drains the USB IN pipe.
+
+           :param sequences: the (command, epilog, reply length) tuples
+           :param readlen: the total count of bytes to retrieve
+           :param rxbuf: optional destination buffer
+           :return: the retrieved bytes
+        """
+        if rxbuf is None:
+            data = bytearray(readlen)
+            rxbuf = memoryview(data)
+        else:
+            data = rxbuf[:readlen]
+        pending = []  # sizes of the requested replies, in bytes
+        pos = 0
+        for cmd, epilog, rxlen in sequences:
+            if rxlen:
+                cmd.extend(self._immediate)
+                while len(pending) >= self.PIPELINE_DEPTH:
+                    pos = self._read_sequence(rxbuf, pos, pending.pop(0),
+                                              readlen)
+                pending.append(rxlen)
+            if self._turbo:
+                if epilog:
+                    cmd.extend(epilog)
+                self._ftdi.write_data(cmd)
+            else:
+                self._ftdi.write_data(cmd)
+                if epilog:
+                    self._ftdi.write_data(epilog)
+        for rxlen in pending:
+            pos = self._read_sequence(rxbuf, pos, rxlen, readlen)
+        return data
+
+    def _read_sequence(self, rxbuf: memoryview, pos: int, size: int,
+                       readlen: int) -> int:
+        # USB read cycle may occur before the FTDI device has actually
+        # sent the data, so try to read more than once if no data is
+        # actually received
+        length = self._ftdi.read_data_into(rxbuf[pos:pos+size], size, 4)
+        if length != size:
+            raise SpiIOError('Cannot read SPI data, recv %d out of %d bytes'
+                             % (pos+length, readlen))
+        return pos+size
+
+    def _execute_batch(self, transactions: List[Tuple]) -> List[bytes]:
+        with self._lock:
+            return self._exchange_batch(transactions)
+
+    def _exchange_batch(self, transactions: List[Tuple]) -> List[bytes]:
+        cmd = bytearray()
+        data = bytearray()
+        pending = 0
+        readlens = []
+        for (frequency, out, readlen, cs_prolog, cs_epilog, cpol, cpha,
+             duplex, droptail) in transactions:
+            if self._need_clock_update(frequency, cpha):
+                # clock reconfiguration discards any pending reply, so the
+                # transactions queued so far should be completed first
+                self._flush_batch(cmd, pending, data)
+                cmd = bytearray()
+                pending = 0
+            if duplex:
+                seq, epilog = self._build_full_duplex(frequency, out,
+                                                      cs_prolog, cs_epilog,
+                                                      cpol, cpha, droptail)
+                rxlen = len(out)
+            else:
+                seq, epilog = self._build_half_duplex(frequency, out, readlen,
+                                                      cs_prolog, cs_epilog,
+                                                      cpol, cpha, droptail)
+                rxlen = readlen
+            if len(out) or rxlen:
+                cmd.extend(seq)
+                cmd.extend(epilog)
+            pending += rxlen
+            readlens.append(rxlen)
+        self._flush_batch(cmd, pending, data)
+        results = []
+        offset = 0
+        for rxlen, trans in zip(readlens, transactions):
+            buf = data[offset:offset+rxlen]
+            offset += rxlen
+            readlen, duplex, droptail = trans[2], trans[7], trans[8]
+            if droptail and buf:
+                buf[-1] = 0xff & (buf[-1] << droptail)
+            results.append(buf[:readlen] if duplex else buf)
+        return results
+
+    def _flush_batch(self, cmd: bytearray, readlen: int,
+                     data: bytearray) -> None:
         if readlen > SpiController.PAYLOAD_MAX_LENGTH:
             raise SpiIOError("Input payload is too large")
+        if readlen:
+            cmd.extend(self._immediate)
+        if cmd:
+            self._ftdi.write_data(cmd)
+        if readlen:
+            buf = self._ftdi.read_data_bytes(readlen, 4)
+            if len(buf) != readlen:
+                raise SpiIOError('Cannot read batch, recv %d out of %d bytes'
+                                 % (len(buf), readlen))
+            data.extend(buf)
+
+    def _need_clock_update(self, frequency: float, cpha: bool) -> bool:
         if cpha:
-            # to enable CPHA, we need to use a workaround with FTDI device,
-            # that is enable 3-phase clocking (which is usually dedicated to
-            # I2C support). This mode use use 3 clock period instead of 2,
-            # which implies the FTDI frequency should be fixed to match the
-            # requested one.
             frequency = (3*frequency)//2
-        if self._frequency != frequency:
-            self._ftdi.set_frequency(frequency)
-            # store the requested value, not the actual one (best effort),
-            # to avoid setting unavailable values on each call.
-            self._frequency = frequency
+        return self._frequency != frequency or self._clock_phase != cpha
+
+    def _build_cs_sequences(self, cs_prolog: bytes, cs_epilog: bytes) \
+            -> Tuple[bytearray, bytearray]:
         direction = self.direction & 0xFF  # low bits only
         cmd = bytearray()
         for ctrl in cs_prolog or []:
@@ -805,6 +1195,35 @@ class SpiController:
             if not self._turbo:
                 cs_high.append(Ftdi.SEND_IMMEDIATE)
             epilog.extend(cs_high)
+        return cmd, epilog
+
+    def _update_clock(self, frequency: float, cpha: bool) -> None:
+        if cpha:
+            # to enable CPHA, we need to use a workaround with FTDI device,
+            # that is enable 3-phase clocking (which is usually dedicated to
+            # I2C support). This mode use use 3 clock period instead of 2,
+            # which implies the FTDI frequency should be fixed to match the
+            # requested one.
+            frequency = (3*frequency)//2
+        if self._frequency != frequency:
+            self._ftdi.set_frequency(frequency)
+            # store the requested value, not the actual one (best effort),
+            # to avoid setting unavailable values on each call.
+            self._frequency = frequency
+
+    def _build_half_duplex(self, frequency: float,
+                           out: Union[bytes, bytearray, Iterable[int]],
+                           readlen: int, cs_prolog: bytes, cs_epilog: bytes,
+                           cpol: bool, cpha: bool, droptail: int) \
+            -> Tuple[bytearray, bytearray]:
+        if not self._ftdi.is_connected:
+            raise SpiIOError("FTDI controller not initialized")
+        if len(out) > SpiController.PAYLOAD_MAX_LENGTH:
+            raise SpiIOError("Output payload is too large")
+        if readlen > SpiController.PAYLOAD_MAX_LENGTH:
+            raise SpiIOError("Input payload is too large")
+        self._update_clock(frequency, cpha)
+        cmd, epilog = self._build_cs_sequences(cs_prolog, cs_epilog)
         writelen = len(out)
         if self._clock_phase != cpha:
             self._ftdi.enable_3phase_clock(cpha)
@@ -845,73 +1264,19 @@ class SpiController:
                         Ftdi.READ_BITS_PVE_MSB)
                 read_cmd = spack('<BB', rcmd, 7-droptail)
                 cmd.extend(read_cmd)
-            cmd.extend(self._immediate)
-            if self._turbo:
-                if epilog:
-                    cmd.extend(epilog)
-                self._ftdi.write_data(cmd)
-            else:
-                self._ftdi.write_data(cmd)
-                if epilog:
-                    self._ftdi.write_data(epilog)
-            # USB read cycle may occur before the FTDI device has actually
-            # sent the data, so try to read more than once if no data is
-            # actually received
-            data = self._ftdi.read_data_bytes(readlen, 4)
-            if droptail:
-                data[-1] = 0xff & (data[-1] << droptail)
-        else:
-            if writelen:
-                if self._turbo:
-                    if epilog:
-                        cmd.extend(epilog)
-                    self._ftdi.write_data(cmd)
-                else:
-                    self._ftdi.write_data(cmd)
-                    if epilog:
-                        self._ftdi.write_data(epilog)
-            data = bytearray()
-        return data
+        return cmd, epilog
 
-    def _exchange_full_duplex(self, frequency: float,
-                              out: Union[bytes, bytearray, Iterable[int]],
-                              cs_prolog: bytes, cs_epilog: bytes,
-                              cpol: bool, cpha: bool,
-                              droptail: int) -> bytes:
+    def _build_full_duplex(self, frequency: float,
+                           out: Union[bytes, bytearray, Iterable[int]],
+                           cs_prolog: bytes, cs_epilog: bytes,
+                           cpol: bool, cpha: bool, droptail: int) \
+            -> Tuple[bytearray, bytearray]:
         if not self._ftdi.is_connected:
             raise SpiIOError("FTDI controller not initialized")
         if len(out) > SpiController.PAYLOAD_MAX_LENGTH:
             raise SpiIOError("Output payload is too large")
-        if cpha:
-            # to enable CPHA, we need to use a workaround with FTDI device,
-            # that is enable 3-phase clocking (which is usually dedicated to
-            # I2C support). This mode use use 3 clock period instead of 2,
-            # which implies the FTDI frequency should be fixed to match the
-            # requested one.
-            frequency = (3*frequency)//2
-        if self._frequency != frequency:
-            self._ftdi.set_frequency(frequency)
-            # store the requested value, not the actual one (best effort),
-            # to avoid setting unavailable values on each call.
-            self._frequency = frequency
-        direction = self.direction & 0xFF  # low bits only
-        cmd = bytearray()
-        for ctrl in cs_prolog or []:
-            ctrl &= self._spi_mask
-            ctrl |= self._gpio_low
-            cmd.extend((Ftdi.SET_BITS_LOW, ctrl, direction))
-        epilog = bytearray()
-        if cs_epilog:
-            for ctrl in cs_epilog:
-                ctrl &= self._spi_mask
-                ctrl |= self._gpio_low
-                epilog.extend((Ftdi.SET_BITS_LOW, ctrl, direction))
-            # Restore idle state
-            cs_high = [Ftdi.SET_BITS_LOW, self._cs_bits | self._gpio_low,
-                       direction]
-            if not self._turbo:
-                cs_high.append(Ftdi.SEND_IMMEDIATE)
-            epilog.extend(cs_high)
+        self._update_clock(frequency, cpha)
+        cmd, epilog = self._build_cs_sequences(cs_prolog, cs_epilog)
         exlen = len(out)
         if self._clock_phase != cpha:
             self._ftdi.enable_3phase_clock(cpha)
@@ -934,22 +1299,7 @@ class SpiController:
                     Ftdi.RW_BITS_NVE_PVE_MSB)
             write_cmd = spack('<BBB', wcmd, 7-droptail, out[-1])
             cmd.extend(write_cmd)
-        cmd.extend(self._immediate)
-        if self._turbo:
-            if epilog:
-                cmd.extend(epilog)
-            self._ftdi.write_data(cmd)
-        else:
-            self._ftdi.write_data(cmd)
-            if epilog:
-                self._ftdi.write_data(epilog)
-        # USB read cycle may occur before the FTDI device has actually
-        # sent the data, so try to read more than once if no data is
-        # actually received
-        data = self._ftdi.read_data_bytes(exlen, 4)
-        if droptail:
-            data[-1] = 0xff & (data[-1] << droptail)
-        return data
+        return cmd, epilog
 
     def _flush(self) -> None:
         self._ftdi.write_data(self._immediate)
@@ -0,0 +1,366 @@
+# Copyright (c) 2022, Emmanuel Blot <emmanuel.blot@free.fr>
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""SPI NOR flash support for PyFdti"""
+
+#pylint: disable-msg=too-many-arguments
+#pylint: disable-msg=too-many-locals
+#pylint: disable-msg=too-many-instance-attributes
+
+from collections import OrderedDict
+from logging import getLogger
+from struct import pack as spack
+from time import sleep, time as now
+from typing import List, Optional, Tuple, Union
+from .spi import SpiIOError, SpiPort
+
+
+class SpiFlashError(SpiIOError):
+    """SPI flash device error"""
+
+
+class SpiNorFlash:
+    """Generic SPI NOR flash device, with JEDEC commands.
+
+       The flash content may be accessed as a read-only sequence of bytes,
+       and updated with :py:meth:`write`, which takes care of erasing the
+       sectors whenever required.
+
+       Example:
+
+       >>> ctrl = SpiController()
+       >>> ctrl.configure('ftdi://ftdi:232h/1')
+       >>> flash = SpiNorFlash(ctrl.get_port(0, freq=30E6))
+       >>> header = flash[:0x100]
+       >>> with open('image.bin', 'rb') as bfp:
+       ...     flash.write(0, bfp.read())
+
+       Recently read pages are kept in a cache, so that small, close reads
+       do not trigger one USB round-trip each. Large reads bypass the cache
+       and are streamed within a single SPI transaction.
+
+       :param port: the SPI port of the flash device
+       :param size: the flash device capacity in bytes, detected from the
+                    JEDEC identifier if not specified
+       :param page_size: the programming page size in bytes
+       :param sector_size: the erase sector size in bytes
+       :param cache_pages: how many pages may be kept in the read cache
+    """
+
+    CMD_WRITE_ENABLE = 0x06
+    CMD_READ_STATUS = 0x05
+    CMD_READ_JEDEC_ID = 0x9F
+    CMD_READ = 0x03
+    CMD_READ_4B = 0x13
+    CMD_PAGE_PROGRAM = 0x02
+    CMD_PAGE_PROGRAM_4B = 0x12
+    CMD_SECTOR_ERASE = 0x20
+    CMD_SECTOR_ERASE_4B = 0x21
+
+    STATUS_WIP = 0x01  # write in progress
+
+    WINDOW_SIZE = 64 << 10
+    """Size of the flash area that is read out at once to compare with the
+       new content."""
+
+    MIN_POLLS = 4
+    """Minimum count of status reads queued after each page program."""
+
+    PROGRAM_TIMEOUT = 0.1
+    ERASE_TIMEOUT = 2.0
+    POLL_DELAY = 0.001
+
+    def __init__(self, port: SpiPort, size: Optional[int] = None,
+                 page_size: int = 256, sector_size: int = 4096,
+                 cache_pages: int = 64):
+        if page_size <= 0 or sector_size % page_size:
+            raise ValueError('Sector size should be a multiple of page size')
+        self.log = getLogger('pyftdi.spiflash')
+        self._port = port
+        self._page_size = page_size
+        self._sector_size = sector_size
+        self._cache: 'OrderedDict[int, bytes]' = OrderedDict()
+        self._cache_pages = cache_pages
+        self._polls = self.MIN_POLLS
+        self._jedec_id = bytes(port.exchange([self.CMD_READ_JEDEC_ID], 3))
+        if size is None:
+            size = self._detect_size(self._jedec_id)
+        if size % sector_size:
+            raise ValueError('Size should be a multiple of sector size')
+        self._size = size
+        self._wide = size > (1 << 24)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[int, bytes]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._size)
+            if step != 1:
+                raise ValueError('Unsupported slice step')
+            return self.read(start, max(0, stop-start))
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('Flash index out of range')
+        return self.read(index, 1)[0]
+
+    @property
+    def jedec_id(self) -> bytes:
+        """Return the JEDEC identifier of the flash device.
+
+           :return: the manufacturer, memory type and capacity bytes
+        """
+        return self._jedec_id
+
+    @property
+    def size(self) -> int:
+        """Return the flash device capacity.
+
+           :return: the capacity in bytes
+        """
+        return self._size
+
+    @property
+    def page_size(self) -> int:
+        """Return the programming page size.
+
+           :return: the page size in bytes
+        """
+        return self._page_size
+
+    @property
+    def sector_size(self) -> int:
+        """Return the erase sector size.
+
+           :return: the sector size in bytes
+        """
+        return self._sector_size
+
+    def read(self, address: int, length: int) -> bytes:
+        """Read out bytes from the flash device.
+
+           :param address: the address of the first byte to read
+           :param length: the count of bytes to read
+           :return: the flash content
+        """
+        self._check_range(address, length)
+        if not length:
+            return b''
+        psize = self._page_size
+        first = address // psize
+        last = (address + length - 1) // psize
+        if last - first >= self._cache_pages:
+            return self._read(address, length)
+        missing = [page for page in range(first, last+1)
+                   if page not in self._cache]
+        if missing:
+            start = missing[0]
+            count = missing[-1] - start + 1
+            data = self._read(start*psize, count*psize)
+            for idx in range(count):
+                self._cache[start+idx] = data[idx*psize:(idx+1)*psize]
+        chunks = []
+        for page in range(first, last+1):
+            self._cache.move_to_end(page)
+            chunks.append(self._cache[page])
+        while len(self._cache) > self._cache_pages:
+            self._cache.popitem(last=False)
+        offset = address - first*psize
+        return b''.join(chunks)[offset:offset+length]
+
+    def readinto(self, address: int,
+                 buf: Union[bytearray, memoryview]) -> int:
+        """Read out bytes from the flash device into a caller-provided
+           buffer, bypassing the cache.
+
+           :param address: the address of the first byte to read
+           :param buf: the destination buffer, its size defines the count of
+                       bytes to read
+           :return: the count of read bytes
+        """
+        rxbuf = memoryview(buf).cast('B')
+        self._check_range(address, len(rxbuf))
+        if not rxbuf:
+            return 0
+        self._port.write(self._command(self._read_cmd, address), stop=False)
+        return self._port.readinto(rxbuf, start=False)
+
+    def write(self, address: int,
+              data: Union[bytes, bytearray, memoryview]) -> int:
+        """Write bytes to the flash device.
+
+           The current flash content is compared with the new one, so that
+           unchanged sectors are left untouched, and sectors are only erased
+           whenever some bits need to be set back to 1. Pages are programmed
+           by batches, the status polling being queued right after each page
+           program command, so that the next pages are sent without waiting
+           for a USB round-trip.
+
+           :param address: the address of the first byte to write
+           :param data: the bytes to write
+           :return: the count of updated sectors
+        """
+        data = memoryview(data).cast('B')
+        self._check_range(address, len(data))
+        end = address + len(data)
+        ssize = self._sector_size
+        psize = self._page_size
+        updated = 0
+        first = address - address % ssize
+        last = end + (-end % ssize)
+        for wstart in range(first, last, self.WINDOW_SIZE):
+            wend = min(wstart+self.WINDOW_SIZE, last)
+            current = self._read(wstart, wend-wstart)
+            pages: List[Tuple[int, bytes]] = []
+            for sstart in range(wstart, wend, ssize):
+                lo = max(address, sstart)
+                hi = min(end, sstart+ssize)
+                old = current[sstart-wstart:sstart-wstart+ssize]
+                new = b''.join((old[:lo-sstart],
+                                data[lo-address:hi-address],
+                                old[hi-sstart:]))
+                if new == old:
+                    continue
+                updated += 1
+                if int.from_bytes(new, 'big') & ~int.from_bytes(old, 'big'):
+                    # NOR programming can only clear bits
+                    self._erase_sector(sstart)
+                    old = b'\xff' * ssize
+                for pos in range(0, ssize, psize):
+                    page = new[pos:pos+psize]
+                    if page != old[pos:pos+psize]:
+                        pages.append((sstart+pos, page))
+            self._program(pages)
+        self._invalidate(first, last-first)
+        if updated:
+            self.log.debug('Updated %d sectors @ 0x%06x', updated, address)
+        return updated
+
+    def erase(self, address: int, length: int) -> None:
+        """Erase flash sectors.
+
+           :param address: the address of the first sector to erase
+           :param length: the count of bytes to erase
+        """
+        self._check_range(address, length)
+        if address % self._sector_size or length % self._sector_size:
+            raise ValueError('Erase area should be aligned on sectors')
+        for sstart in range(address, address+length, self._sector_size):
+            self._erase_sector(sstart)
+        self._invalidate(address, length)
+
+    def invalidate(self) -> None:
+        """Discard the read cache, i.e. if the flash device has been
+           modified behind this object.
+        """
+        self._cache.clear()
+
+    @property
+    def _read_cmd(self) -> int:
+        return self.CMD_READ_4B if self._wide else self.CMD_READ
+
+    @classmethod
+    def _detect_size(cls, jedec_id: bytes) -> int:
+        # most vendors encode the capacity as a power of 2
+        capacity = jedec_id[2]
+        if jedec_id in (b'\x00' * 3, b'\xff' * 3) or \
+                not 0x10 <= capacity <= 0x21:
+            raise SpiFlashError('Unable to detect flash device size, '
+                                'JEDEC ID: %s' % jedec_id.hex())
+        return 1 << capacity
+
+    def _check_range(self, address: int, length: int) -> None:
+        if address < 0 or length < 0 or address + length > self._size:
+            raise ValueError('Address out of range')
+
+    def _command(self, opcode: int, address: int) -> bytes:
+        if self._wide:
+            return spack('>BI', opcode, address)
+        return spack('>I', (opcode << 24) | address)
+
+    def _read(self, address: int, length: int) -> bytes:
+        return bytes(self._port.exchange(
+            self._command(self._read_cmd, address), length))
+
+    def _read_status(self) -> int:
+        return self._port.exchange([self.CMD_READ_STATUS], 1)[0]
+
+    def _wait_ready(self, timeout: float) -> None:
+        expire = now() + timeout
+        while self._read_status() & self.STATUS_WIP:
+            if now() > expire:
+                raise SpiFlashError('Flash device is stalled')
+            sleep(self.POLL_DELAY)
+
+    def _invalidate(self, address: int, length: int) -> None:
+        psize = self._page_size
+        for page in range(address//psize, (address+length+psize-1)//psize):
+            self._cache.pop(page, None)
+
+    def _erase_sector(self, address: int) -> None:
+        opcode = (self.CMD_SECTOR_ERASE_4B if self._wide else
+                  self.CMD_SECTOR_ERASE)
+        with self._port.controller.batch() as batch:
+            batch.write(self._port, bytes((self.CMD_WRITE_ENABLE, )))
+            batch.write(self._port, self._command(opcode, address))
+        self._wait_ready(self.ERASE_TIMEOUT)
+
+    def _program(self, pages: List[Tuple[int, bytes]]) -> None:
+        """Program flash pages.
+
+           Each page program command is followed with several status reads
+           within the same batch, so that the next page is only programmed
+           if the device has become ready in the meantime. As a busy device
+           ignores any other command, if the device is still busy after the
+           last status read, the next pages of the batch are discarded by
+           the device: they are programmed again with a larger count of
+           status reads. Note that programming a page twice with the same
+           content is harmless.
+
+           The count of status reads per page is bounded by half the FTDI
+           RX FIFO size, so that the replies of a batch never overflow the
+           FIFO. When the page program time exceeds what this count of
+           status reads spans, i.e. with a slow device or a fast SPI clock,
+           each batch only contains a single page, whose completion is then
+           polled with regular requests: programming then requires several
+           USB round-trips per page, as without pipelining.
+
+           :param pages: the (address, content) of the pages to program
+        """
+        controller = self._port.controller
+        # keep the status replies of a batch within the device RX FIFO
+        budget = max(1, controller.ftdi.fifo_sizes[1] // 2)
+        opcode = (self.CMD_PAGE_PROGRAM_4B if self._wide else
+                  self.CMD_PAGE_PROGRAM)
+        wren = bytes((self.CMD_WRITE_ENABLE, ))
+        rdsr = bytes((self.CMD_READ_STATUS, ))
+        pos = 0
+        while pos < len(pages):
+            polls = self._polls
+            group = pages[pos:pos+max(1, budget//polls)]
+            with controller.batch() as batch:
+                for address, data in group:
+                    batch.write(self._port, wren)
+                    batch.write(self._port,
+                                self._command(opcode, address) + data)
+                    for _ in range(polls):
+                        batch.exchange(self._port, rdsr, 1)
+            results = batch.results
+            latency = 0
+            for idx in range(len(group)):
+                statuses = results[idx*(polls+2)+2:(idx+1)*(polls+2)]
+                ready = [not status[0] & self.STATUS_WIP
+                         for status in statuses]
+                if not ready[-1]:
+                    break
+                latency = max(latency, ready.index(True))
+            pos += idx + 1
+            if not ready[-1]:
+                self._wait_ready(self.PROGRAM_TIMEOUT)
+                self._polls = min(budget, 2*polls)
+                self.log.debug('Page program status polls: %d', self._polls)
+            else:
+                self._polls = max(self.MIN_POLLS, latency+2)
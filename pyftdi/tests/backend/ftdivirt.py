@@ -289,6 +289,7 @@ class VirtFtdiPort:
         self._cbusp_active: int = 0  # physical (pins)
         self._resume: bool = True
         self._cmd_q = Fifo()
+        self._mpsse_stall = deque()  # MPSSE output pending on full FIFO
         self._last_txw_ts = 0
         for pin in range(self._width):
             self._pins.append(VirtualFtdiPin(self, pin))
@@ -404,6 +405,8 @@ class VirtFtdiPort:
                 while tx_fifo.q and pos < count:
                     buff[pos] = tx_fifo.q.popleft()
                     pos += 1
+                    if self._mpsse_stall:
+                        tx_fifo.q.append(self._mpsse_stall.popleft())
             return pos
         self.log.warning('Read buffer discarded, mode %s',
                          self.BitMode(self._bitmode).name)
@@ -472,6 +475,7 @@ class VirtFtdiPort:
             for fifo in self._fifos:
                 with fifo.lock:
                     fifo.q.clear()
+            self._mpsse_stall.clear()
             self.log.info('> ftdi reset is not fully implemented')
             self._gpio = 0
             self._direction = 0
@@ -482,6 +486,7 @@ class VirtFtdiPort:
             self.log.info('> ftdi %s: %d requests', reset, len(fifo.q))
             with fifo.lock:
                 fifo.q.clear()
+                self._mpsse_stall.clear()
             return
         if reset == 'purge_rx':
             fifo = self._fifos.rx
@@ -636,12 +641,18 @@ class VirtFtdiPort:
     def write_from_mpsse(self, mpsse: VirtMpsseEngine, buf: bytes) -> None:
         tx_fifo = self._fifos.tx
         with tx_fifo.lock:
-            free_count = tx_fifo.size - len(tx_fifo.q)
-            if free_count > 0:
+            # a real MPSSE engine stalls while its FIFO is full, so keep the
+            # bytes that do not fit, they are pushed as the host reads out
+            # the FIFO
+            if self._mpsse_stall:
+                free_count = 0
+            else:
+                free_count = max(0, tx_fifo.size - len(tx_fifo.q))
                 tx_fifo.q.extend(buf[:free_count])
+            self._mpsse_stall.extend(buf[free_count:])
         if free_count < len(buf):
-            self.log.warning('FIFO full (%d bytes), truncated buffer',
-                             len(tx_fifo.q))
+            self.log.debug('FIFO full (%d bytes), MPSSE stalled',
+                           len(tx_fifo.q))
         self._mpsse.receive(self._iface, buf)
 
     def _update_gpio(self, source: bool, gpio: int) -> None:
@@ -74,6 +74,42 @@ class VirtMpsseEngine(FtdiMpsseEngine):
         self._reply_q.append(buf)
         return True
 
+    def _decode_output_mpsse_bytes(self, caller, expect_rx=False):
+        if not super()._decode_output_mpsse_bytes(caller, expect_rx):
+            return False
+        if expect_rx:
+            self._reply_q.append(self._sample_input(self._expect_resp[-1]))
+        return True
+
+    def _decode_output_mpsse_bits(self, caller, expect_rx=False):
+        if not super()._decode_output_mpsse_bits(caller, expect_rx):
+            return False
+        if expect_rx:
+            self._reply_q.append(self._sample_input(self._expect_resp[-1]))
+        return True
+
+    def _decode_input_mpsse_byte_request(self):
+        if not super()._decode_input_mpsse_byte_request():
+            return False
+        self._reply_q.append(self._sample_input(self._expect_resp[-1]))
+        return True
+
+    def _decode_input_mpsse_bit_request(self):
+        if not super()._decode_input_mpsse_bit_request():
+            return False
+        self._reply_q.append(self._sample_input(self._expect_resp[-1]))
+        return True
+
+    def _sample_input(self, length: int) -> bytes:
+        """Sample the serial data input (DI) pin, as no clocked peripheral
+           is emulated.
+
+           :param length: positive byte count or negative bit count
+           :return: the sampled bytes
+        """
+        byte = 0xff if self._port.gpio & 0x04 else 0x00
+        return bytes([byte] * max(1, length))
+
     def _cmd_set_bits_low(self):
         buf = self._trace_tx[1:3]
         if not super()._cmd_set_bits_low():
@@ -444,7 +444,29 @@ class VirtBackend(IBackend):
         self.log.debug('> read h:%d ep:0x%02x if:%d, l:%d, to:%d',
                        dev_handle.handle, ep, intf, len(buff), timeout)
         ftdi = dev_handle.device.ftdi
-        return ftdi.read(dev_handle, ep, intf, buff, timeout)
+        packet_size = 0
+        for endpoint in dev_handle.device.configurations[0].\
+                interfaces[intf].endpoints:
+            if endpoint.bEndpointAddress == ep:
+                packet_size = endpoint.wMaxPacketSize
+                break
+        if not packet_size or len(buff) <= packet_size:
+            return ftdi.read(dev_handle, ep, intf, buff, timeout)
+        # as a real device, emit one USB packet after another, so that each
+        # of them starts with its own status header
+        pos = 0
+        while pos < len(buff):
+            packet = array('B', bytes(min(packet_size, len(buff)-pos)))
+            length = ftdi.read(dev_handle, ep, intf, packet, timeout)
+            if pos and length <= 2:
+                # do not append status-only packets
+                break
+            buff[pos:pos+length] = packet[:length]
+            pos += length
+            if length < len(packet):
+                # short packet ends the transfer
+                break
+        return pos
 
     def _ctrl_standard(self,
                        dev_handle: VirtDeviceHandle,
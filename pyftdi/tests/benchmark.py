@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+
+"""Host-side throughput and latency benchmarks.
+
+   Benchmarks run over the virtual USB backend, so no FTDI device is
+   required. As the virtual device executes MPSSE commands immediately, the
+   measured figures reflect the host CPU cost of the PyFtdi stack, not the
+   actual performance of a physical FTDI device.
+
+   Results are emitted as a JSON document, so that regressions can be
+   tracked between releases.
+"""
+
+# Copyright (c) 2022, Emmanuel Blot <emmanuel.blot@free.fr>
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+#pylint: disable-msg=missing-docstring
+#pylint: disable-msg=broad-except
+
+from argparse import ArgumentParser, FileType
+from datetime import datetime, timezone
+from json import dump as jdump
+from platform import machine, python_implementation, python_version, system
+from sys import exit as sys_exit, modules, stderr, stdout
+from time import perf_counter, process_time
+from traceback import format_exc
+from typing import Callable, Iterable, List, Mapping, Optional, Tuple
+from pyftdi import __version__ as pyftdi_version
+from pyftdi.bits import BitSequence
+from pyftdi.ftdi import Ftdi
+from pyftdi.gpio import GpioMpsseController
+from pyftdi.i2c import I2cController
+from pyftdi.jtag import JtagEngine
+from pyftdi.spi import SpiController
+from pyftdi.usbtools import UsbTools
+
+
+class LegacyI2cController(I2cController):
+    """I2C controller which rebuilds its MPSSE command sequences from tuples
+       on each access, as PyFtdi 0.54 did, the reference of the I2C command
+       template benchmark.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._immediate = (Ftdi.SEND_IMMEDIATE,)
+        self._read_bit = (Ftdi.READ_BITS_PVE_MSB, 0)
+        self._read_byte = (Ftdi.READ_BYTES_PVE_MSB, 0, 0)
+        self._write_byte = (Ftdi.WRITE_BYTES_NVE_MSB, 0, 0)
+        self._nack = (Ftdi.WRITE_BITS_NVE_MSB, 0, self.HIGH)
+        self._ack = (Ftdi.WRITE_BITS_NVE_MSB, 0, self.LOW)
+
+    @property
+    def _data_lo(self) -> Tuple[int]:
+        return (Ftdi.SET_BITS_LOW,
+                self.SCL_BIT | self._gpio_low,
+                self.I2C_DIR | (self._gpio_dir & 0xFF))
+
+    @property
+    def _clk_lo_data_hi(self) -> Tuple[int]:
+        return (Ftdi.SET_BITS_LOW,
+                self.SDA_O_BIT | self._gpio_low,
+                self.I2C_DIR | (self._gpio_dir & 0xFF))
+
+    @property
+    def _clk_lo_data_input(self) -> Tuple[int]:
+        return (Ftdi.SET_BITS_LOW,
+                self.LOW | self._gpio_low,
+                self.SCL_BIT | (self._gpio_dir & 0xFF))
+
+    @property
+    def _clk_lo_data_lo(self) -> Tuple[int]:
+        return (Ftdi.SET_BITS_LOW,
+                self._gpio_low,
+                self.I2C_DIR | (self._gpio_dir & 0xFF))
+
+    @property
+    def _idle(self) -> Tuple[int]:
+        return (Ftdi.SET_BITS_LOW,
+                self.I2C_DIR | self._gpio_low,
+                self.I2C_DIR | (self._gpio_dir & 0xFF))
+
+    @property
+    def _start(self) -> Tuple[int]:
+        return self._data_lo * self._ck_hd_sta + \
+               self._clk_lo_data_lo * self._ck_hd_sta
+
+    @property
+    def _stop(self) -> Tuple[int]:
+        return self._clk_lo_data_hi * self._ck_hd_sta + \
+               self._clk_lo_data_lo * self._ck_hd_sta + \
+               self._data_lo * self._ck_su_sto + \
+               self._idle * self._ck_idle
+
+    @property
+    def _sample_ack(self) -> Tuple[int]:
+        if self._fake_tristate:
+            return (self._clk_lo_data_input + self._read_bit +
+                    self._clk_lo_data_hi)
+        return self._clk_lo_data_hi + self._read_bit
+
+    @property
+    def _read_sequences(self) -> Tuple[Tuple[int], Tuple[int]]:
+        if self._fake_tristate:
+            read_byte = (self._clk_lo_data_input +
+                         self._read_byte +
+                         self._clk_lo_data_hi)
+            read_not_last = (read_byte + self._ack +
+                             self._clk_lo_data_lo * self._ck_delay)
+            read_last = (read_byte + self._nack +
+                         self._clk_lo_data_hi * self._ck_delay)
+        else:
+            read_not_last = (self._read_byte + self._ack +
+                             self._clk_lo_data_hi * self._ck_delay)
+            read_last = (self._read_byte + self._nack +
+                         self._clk_lo_data_hi * self._ck_delay)
+        return read_not_last, read_last
+
+
+class VirtualBenchmark:
+    """Run micro-benchmarks against a virtual FT232H device.
+
+       :param duration: minimum measurement duration for each data point,
+                        in seconds
+       :param sizes: payload sizes, in bytes
+    """
+
+    URL = 'ftdi:///1'
+    CONFIG = 'pyftdi/tests/resources/ft232h.yaml'
+    MIN_ITERATIONS = 3
+
+    def __init__(self, duration: float, sizes: Iterable[int]):
+        self._duration = duration
+        self._sizes = sorted(sizes)
+        self._loader = None
+
+    def start(self) -> None:
+        # Force PyUSB to use PyFtdi test framework for USB backends
+        UsbTools.BACKENDS = ('backend.usbvirt', )
+        backend = UsbTools.find_backend()
+        self._loader = backend.create_loader()()
+
+    def stop(self) -> None:
+        self._loader = None
+
+    @property
+    def benchmarks(self) -> List[str]:
+        return sorted(name[len('bench_'):] for name in dir(self)
+                      if name.startswith('bench_'))
+
+    def run(self, names: Optional[Iterable[str]] = None) -> List[Mapping]:
+        results = []
+        for name in names or self.benchmarks:
+            bench = getattr(self, f'bench_{name}')
+            # each benchmark runs with a pristine virtual device
+            with open(self.CONFIG, 'rb') as yfp:
+                self._loader.load(yfp)
+            try:
+                results.extend(bench())
+            except Exception as exc:
+                print(f'{name}: {exc}', file=stderr)
+                results.append({'name': name, 'error': format_exc()})
+            finally:
+                self._loader.unload()
+        return results
+
+    def bench_ftdi_write_data(self) -> List[Mapping]:
+        ftdi = Ftdi()
+        ftdi.open_mpsse_from_url(self.URL)
+        try:
+            def build(size):
+                cmd = bytearray((Ftdi.WRITE_BYTES_NVE_MSB,
+                                 (size-1) & 0xff, ((size-1) >> 8) & 0xff))
+                cmd.extend(bytes(size))
+                return lambda: ftdi.write_data(cmd)
+            return self._measure('ftdi.write_data', build)
+        finally:
+            ftdi.close()
+
+    def bench_ftdi_read_data_bytes(self) -> List[Mapping]:
+        ftdi = Ftdi()
+        ftdi.open_mpsse_from_url(self.URL)
+        try:
+            def build(size):
+                cmd = bytes((Ftdi.READ_BYTES_NVE_MSB,
+                             (size-1) & 0xff, ((size-1) >> 8) & 0xff,
+                             Ftdi.SEND_IMMEDIATE))
+                def request():
+                    ftdi.write_data(cmd)
+                    if len(ftdi.read_data_bytes(size, 4)) != size:
+                        raise IOError('Short read')
+                return request
+            return self._measure('ftdi.read_data_bytes', build)
+        finally:
+            ftdi.close()
+
+    def bench_spi_exchange(self) -> List[Mapping]:
+        spi = SpiController()
+        spi.configure(self.URL)
+        try:
+            port = spi.get_port(0, freq=6E6, mode=0)
+            def build(size):
+                out = bytes(size)
+                return lambda: port.exchange(out, size, duplex=True)
+            return self._measure('SpiPort.exchange', build)
+        finally:
+            spi.close()
+
+    def bench_i2c_read_from(self) -> List[Mapping]:
+        i2c = I2cController()
+        i2c.configure(self.URL)
+        try:
+            port = i2c.get_port(0x50)
+            def build(size):
+                return lambda: port.read_from(0x00, size)
+            return self._measure('I2cPort.read_from', build)
+        finally:
+            i2c.close()
+
+    def bench_i2c_commands(self) -> List[Mapping]:
+        # measure the I2C command assembly alone: USB requests are not
+        # emitted, and any reply is an ACK
+        results = []
+        for name, i2c in (('I2C commands (templates)', I2cController()),
+                          ('I2C commands (legacy)', LegacyI2cController())):
+            i2c.configure(self.URL)
+            ftdi = i2c.ftdi
+            ftdi.write_data = len
+            ftdi.read_data_bytes = \
+                lambda size, attempt=1, request_gen=None: bytes(size)
+            try:
+                port = i2c.get_port(0x50)
+                def build(size, port=port):
+                    def request():
+                        port.read_from(0x00, size)
+                        port.write_to(0x00, bytes(size))
+                    return request
+                results.extend(self._measure(name, build))
+            finally:
+                del ftdi.write_data
+                del ftdi.read_data_bytes
+                i2c.close()
+        return results
+
+    def bench_gpio_mpsse(self) -> List[Mapping]:
+        gpio = GpioMpsseController()
+        gpio.configure(self.URL, direction=0xF0, frequency=1E6)
+        results = []
+        try:
+            def build_write(size):
+                out = bytes(x & 0xF0 for x in range(size))
+                return lambda: gpio.write(out)
+            results.extend(self._measure('GpioMpsseController.write',
+                                         build_write))
+            def build_read(size):
+                return lambda: gpio.capture(size)
+            results.extend(self._measure('GpioMpsseController.capture',
+                                         build_read))
+        finally:
+            gpio.close()
+        return results
+
+    def bench_jtag_shift_register(self) -> List[Mapping]:
+        jtag = JtagEngine(frequency=1E6)
+        jtag.configure(self.URL)
+        try:
+            jtag.reset()
+            jtag.change_state('shift_dr')
+            def build(size):
+                out = BitSequence(bytes_=bytes(range(256))*(size//256+1),
+                                  length=8*size)[:8*size]
+                return lambda: jtag.shift_register(out)
+            return self._measure('JtagEngine.shift_register', build)
+        finally:
+            jtag.close()
+
+    def bench_jtag_scan(self) -> List[Mapping]:
+        jtag = JtagEngine(frequency=1E6)
+        jtag.configure(self.URL)
+        results = []
+        try:
+            jtag.reset()
+            # TAP state transitions only, which do not depend on the payload
+            # size, so only measure them once
+            def build_change(_):
+                def request():
+                    jtag.change_state('shift_ir')
+                    jtag.change_state('update_ir')
+                    jtag.change_state('shift_dr')
+                    jtag.change_state('update_dr')
+                return request
+            results.extend(self._measure('JtagEngine.change_state',
+                                         build_change, self._sizes[0]))
+            # short IR scan followed with a DR scan, as debug probes do
+            instruction = BitSequence(0x2, length=6)
+            def build_scan(size):
+                data = BitSequence(bytes_=bytes(size), length=8*size)
+                def request():
+                    jtag.write_ir(instruction)
+                    jtag.write_dr(data)
+                return request
+            results.extend(self._measure('JtagEngine.write_ir+write_dr',
+                                         build_scan))
+        finally:
+            jtag.close()
+        return results
+
+    def bench_jtag_read_dr(self) -> List[Mapping]:
+        jtag = JtagEngine(frequency=1E6)
+        jtag.configure(self.URL)
+        results = []
+        try:
+            jtag.reset()
+            # many short DR reads, as debug probes do: one 32-bit read per
+            # 4 payload bytes
+            def build(size):
+                def request():
+                    for _ in range(max(1, size//4)):
+                        jtag.read_dr(32)
+                return request
+            results.extend(self._measure('JtagEngine.read_dr', build))
+            def build_deferred(size):
+                def request():
+                    jtag.set_deferred(True)
+                    futures = [jtag.read_dr(32)
+                               for _ in range(max(1, size//4))]
+                    jtag.set_deferred(False)
+                    for future in futures:
+                        future.result()
+                return request
+            results.extend(self._measure('JtagEngine.read_dr(deferred)',
+                                         build_deferred))
+        finally:
+            jtag.close()
+        return results
+
+    def _measure(self, name: str,
+                 build: Callable[[int], Callable[[], None]],
+                 max_size: Optional[int] = None) -> List[Mapping]:
+        results = []
+        for size in self._sizes:
+            if max_size and size > max_size:
+                continue
+            func = build(size)
+            # warm up
+            func()
+            count = 0
+            wall_start = perf_counter()
+            cpu_start = process_time()
+            while True:
+                func()
+                count += 1
+                wall = perf_counter()-wall_start
+                if wall >= self._duration and count >= self.MIN_ITERATIONS:
+                    break
+            cpu = process_time()-cpu_start
+            results.append({'name': name,
+                            'size': size,
+                            'iterations': count,
+                            'ops_per_s': count/wall,
+                            'bytes_per_s': size*count/wall,
+                            'wall_us_per_op': 1E6*wall/count,
+                            'cpu_us_per_op': 1E6*cpu/count})
+        return results
+
+
+def main():
+    """Entry point."""
+    argparser = ArgumentParser(description=modules[__name__].__doc__)
+    argparser.add_argument('-o', '--output', type=FileType('wt'),
+                           default=stdout,
+                           help='JSON output file (default: stdout)')
+    argparser.add_argument('-t', '--duration', type=float, default=0.5,
+                           help='minimum duration of each measure, in seconds')
+    argparser.add_argument('-s', '--size', type=int, action='append',
+                           help='payload size, in bytes (may be repeated)')
+    argparser.add_argument('-b', '--bench', action='append',
+                           help='benchmark to execute (may be repeated)')
+    argparser.add_argument('-l', '--list', action='store_true',
+                           help='list available benchmarks and exit')
+    args = argparser.parse_args()
+
+    bench = VirtualBenchmark(args.duration, args.size or [1, 16, 256, 1024])
+    if args.list:
+        print('\n'.join(bench.benchmarks))
+        sys_exit(0)
+    if args.bench:
+        unknown = set(args.bench) - set(bench.benchmarks)
+        if unknown:
+            argparser.error(f'Unknown benchmark: {", ".join(sorted(unknown))}')
+    bench.start()
+    try:
+        results = bench.run(args.bench)
+    finally:
+        bench.stop()
+    report = {'pyftdi': pyftdi_version,
+              'python': f'{python_implementation()} {python_version()}',
+              'platform': f'{system()} {machine()}',
+              'date': datetime.now(timezone.utc).isoformat(),
+              'duration': args.duration,
+              'results': results}
+    jdump(report, args.output, indent=2)
+    args.output.write('\n')
+    sys_exit(int(any('error' in result for result in results)))
+
+
+if __name__ == '__main__':
+    # Useful environment variables:
+    #  FTDI_LOGLEVEL is not used, as logging would bias the measures
+    main()
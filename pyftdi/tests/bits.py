@@ -100,6 +100,11 @@ class BitSequenceTestCase(unittest.TestCase):
         self.assertEqual(int(BitSequence((0, 1, 0, 0), msb=True)), 4)
         self.assertEqual(int(BitSequence(4, length=8)), 4)
         self.assertEqual(int(BitSequence(int(4), msb=True, length=8)), 32)
+        self.assertEqual(str(BitSequence(-1, length=8)), '8: 11111111')
+        self.assertEqual(repr(BitSequence(-2, length=4)), '1110')
+        self.assertEqual(int(BitSequence(-5, length=16)), 0xfffb)
+        self.assertEqual(repr(BitSequence(-2, msb=True, length=4)), '0111')
+        self.assertEqual(int(BitSequence(0x1ff, length=8)), 0xff)
         self.assertEqual(int(BitSequence("0010")), 4)
         self.assertEqual(int(BitSequence("0100", msb=True)), 4)
         bs = BitSequence("0100", msb=True)
@@ -197,6 +202,22 @@ class BitSequenceTestCase(unittest.TestCase):
         b.rsr(3)
         self.assertEqual(str(b), '8: 10111010')
 
+    def test_large(self):
+        data = bytes(range(256))*40
+        bs = BitSequence(bytes_=data, msby=False)
+        self.assertEqual(len(bs), 8*len(data))
+        self.assertEqual(bs.tobytes(), bytearray(data))
+        self.assertEqual(int(bs), int.from_bytes(data, 'big'))
+        bs.reverse()
+        self.assertEqual(bs.tobytes(msb=True), bytearray(data))
+        bs.invert()
+        self.assertEqual(bs[:8].tobyte(), 0xff)
+        self.assertEqual(bs[8:16].tobyte(), 0x7f)
+        self.assertEqual(len(bs[1000:9000] + bs[:1000]), 9000)
+        bzs = BitZSequence('Z') + BitZSequence(bs)
+        self.assertEqual(bzs[0], BitZSequence.Z)
+        self.assertEqual(bzs[1:], bs)
+
     def test_concat(self):
         self.assertEqual(repr(self.bzs4+self.bzs5), '100Z0111Z1Z010ZZ0100')
         self.assertEqual(repr(self.bzs4+self.bs7),
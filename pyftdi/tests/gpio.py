@@ -12,14 +12,16 @@
 #pylint: disable-msg=global-statement
 
 import logging
+from array import array
 from collections import deque
 from os import environ
 from sys import modules, stdout
-from time import sleep
+from time import sleep, time
 from unittest import TestCase, TestSuite, SkipTest, makeSuite, main as ut_main
 from pyftdi import FtdiLogger
 from pyftdi.ftdi import Ftdi
 from pyftdi.gpio import (GpioAsyncController,
+                         GpioException,
                          GpioSyncController,
                          GpioMpsseController)
 from pyftdi.misc import to_bool
@@ -228,6 +230,80 @@ class GpioAsyncTestCase(FtdiTestCase):
                 self.assertEqual(msbs, last)
         gpio.close()
 
+    def test_gpio_capture(self):
+        """Check continuous capture.
+        """
+        if self.skip_loopback:
+            raise SkipTest('Skip loopback test on multiport device')
+        gpio = GpioAsyncController()
+        direction = 0xFF & ~((1 << 4) - 1) # 4 Out, 4 In
+        gpio.configure(self.url, direction=direction, frequency=20000)
+        gpio.write(0x50)
+        sleep(0.01)
+        start = time()
+        gpio.start_capture()
+        chunks = []
+        while time() < start + 0.5:
+            chunk = gpio.read_capture(0.5)
+            self.assertIsNotNone(chunk)
+            chunks.append(chunk)
+        stats = gpio.stop_capture()
+        # some chunks may have been received after the last read out
+        self.assertGreaterEqual(stats.chunks, len(chunks))
+        self.assertEqual(stats.dropped, 0)
+        position = 0
+        timestamp = start
+        for chunk in chunks:
+            self.assertEqual(chunk.frequency, gpio.frequency)
+            self.assertEqual(chunk.position, position)
+            self.assertGreaterEqual(chunk.timestamp, timestamp)
+            self.assertEqual(chunk.data.count(0x55), len(chunk.data))
+            position += len(chunk.data)
+            timestamp = chunk.timestamp
+        self.assertGreaterEqual(stats.samples, position)
+        self.assertGreater(position, 0)
+        self.assertRaises(GpioException, gpio.read_capture)
+        # a chunk buffer which is never read out overflows
+        gpio.start_capture(depth=2)
+        sleep(0.2)
+        chunk = gpio.read_capture(0)
+        self.assertTrue(chunk.overrun)
+        self.assertGreater(chunk.position, 0)
+        self.assertGreater(gpio.capture_stats.dropped, 0)
+        gpio.stop_capture()
+        # a consumer which stalls longer than the device FIFO can buffer
+        # samples loses samples
+        class StallingOutput:
+            def __init__(self, delay):
+                self.delays = [delay]
+            def write(self, data):
+                if self.delays:
+                    sleep(self.delays.pop())
+        fifo_time = gpio.ftdi.fifo_sizes[1] / gpio.frequency
+        gpio.start_capture(output=StallingOutput(fifo_time + 0.5))
+        chunks = []
+        start = time()
+        while time() < start + fifo_time + 1.0:
+            chunk = gpio.read_capture(1.0)
+            self.assertIsNotNone(chunk)
+            chunks.append(chunk)
+        stats = gpio.stop_capture()
+        self.assertEqual(stats.dropped, 0)
+        self.assertGreater(stats.overruns, 0)
+        self.assertFalse(chunks[0].overrun)
+        self.assertTrue(any(chunk.overrun for chunk in chunks[1:]))
+        # output errors abort the capture
+        class FailingOutput:
+            def write(self, data):
+                raise IOError('Disk full')
+        gpio.start_capture(output=FailingOutput())
+        with self.assertRaises(IOError):
+            while gpio.read_capture(1.0):
+                pass
+        self.assertRaises(IOError, gpio.stop_capture)
+        self.assertRaises(GpioException, gpio.read_capture)
+        gpio.close()
+
     def test_gpio_baudate(self):
         # this test requires an external device (logic analyser or scope) to
         # check the bitbang read and bitbang write signal (BB_RD, BB_WR) and
@@ -565,6 +641,65 @@ class GpioMpsseTestCase(FtdiTestCase):
         gpio_in.close()
         gpio_out.close()
 
+    def test_readinto_gpio(self):
+        """Check I/O sampling into a pre-allocated buffer.
+        """
+        gpio_in, gpio_out = GpioMpsseController(), GpioMpsseController()
+        gpio_in.configure(self.urls[0], direction=0x0000, frequency=10e6,
+                          debug=self.debug_mpsse)
+        gpio_out.configure(self.urls[1], direction=0xFFFF, frequency=10e6,
+                           debug=self.debug_mpsse)
+        samples = array('H', [0] * 4)
+        for out in range(3, 0x10000, 1031):
+            gpio_out.write(out)
+            self.assertEqual(gpio_in.readinto(samples), len(samples))
+            self.assertEqual(list(samples), [out] * len(samples))
+        gpio_in.close()
+        gpio_out.close()
+
+    def test_write_array_gpio(self):
+        """Check output of large waveforms.
+        """
+        gpio_in, gpio_out = GpioMpsseController(), GpioMpsseController()
+        gpio_in.configure(self.urls[0], direction=0x0000, frequency=10e6,
+                          debug=self.debug_mpsse)
+        gpio_out.configure(self.urls[1], direction=0xFFFF, frequency=10e6,
+                           debug=self.debug_mpsse)
+        # larger than a single MPSSE payload
+        outv = array('H', range(0, 0x10000, 5))
+        outv.append(0x1234)
+        gpio_out.write(outv)
+        self.assertEqual(gpio_in.read()[0], 0x1234)
+        gpio_out.write(outv[:-1][::-1])
+        self.assertEqual(gpio_in.read()[0], 0)
+        gpio_out.write(bytes([0x55]))
+        self.assertEqual(gpio_in.read()[0], 0x0055)
+        self.assertRaises(GpioException, gpio_out.write, [0x1, -1])
+        self.assertRaises(GpioException, gpio_out.write, [0x10000])
+        self.assertRaises(TypeError, gpio_out.write, array('L', [0]))
+        gpio_in.close()
+        gpio_out.close()
+
+    def test_capture_gpio(self):
+        """Check long sampling sequences.
+        """
+        gpio_in, gpio_out = GpioMpsseController(), GpioMpsseController()
+        gpio_in.configure(self.urls[0], direction=0x0000, frequency=10e6,
+                          debug=self.debug_mpsse)
+        gpio_out.configure(self.urls[1], direction=0xFFFF, frequency=10e6,
+                           debug=self.debug_mpsse)
+        gpio_out.write(0x8421)
+        # longer than a single MPSSE payload
+        count = 2 * gpio_in.MPSSE_PAYLOAD_MAX_LENGTH // 3
+        samples = gpio_in.capture(count)
+        self.assertEqual(samples.typecode, 'H')
+        self.assertEqual(len(samples), count)
+        self.assertEqual(samples.count(0x8421), count)
+        gpio_out.write(0x1248)
+        self.assertEqual(gpio_in.read(count), (0x1248, ) * count)
+        gpio_in.close()
+        gpio_out.close()
+
     def test_peek_gpio(self):
         """Check I/O peeking
         """
@@ -13,22 +13,32 @@
 
 
 import logging
+from asyncio import run as asyncio_run
 from collections import defaultdict
 from contextlib import redirect_stdout
 from doctest import testmod
 from io import StringIO
 from os import environ
+from select import select
 from string import ascii_letters
 from sys import modules, stdout, version_info
+from time import sleep, time as now
 from unittest import TestCase, TestSuite, makeSuite, main as ut_main
 from urllib.parse import urlsplit
+from usb.core import USBError
 from pyftdi import FtdiLogger
+from pyftdi.aio import AsyncFtdi, AsyncI2cController, AsyncSpiController
+from pyftdi.bits import BitSequence
 from pyftdi.eeprom import FtdiEeprom
-from pyftdi.ftdi import Ftdi, FtdiMpsseError
+from pyftdi.ftdi import Ftdi, FtdiError, FtdiMpsseError
 from pyftdi.gpio import GpioController
+from pyftdi.i2c import I2cController, I2cNackError
+from pyftdi.jtag import JtagChain, JtagEngine, JtagError, JtagTool
 from pyftdi.misc import to_bool
 from pyftdi.serialext import serial_for_url
-from pyftdi.usbtools import UsbTools
+from pyftdi.spi import SpiController
+from pyftdi.spiflash import SpiFlashError, SpiNorFlash
+from pyftdi.usbtools import UsbTools, UsbToolsError
 
 # MockLoader is assigned in ut_main
 MockLoader = None
@@ -90,6 +100,38 @@ class MockUsbToolsTestCase(FtdiTestCase):
         serialn = UsbTools.get_string(dev, dev.iSerialNumber)
         self.assertEqual(serialn, 'FT2DEF')
 
+    def test_enumeration_cache(self):
+        """Check that string descriptors are only retrieved once."""
+        ftdis = [(0x403, pid)
+                 for pid in (0x6001, 0x6010, 0x6011, 0x6014, 0x6015)]
+        get_string = UsbTools.get_string
+        ttl = UsbTools.CACHE_TTL
+        calls = []
+        def count_string(cls, device, stridx):
+            calls.append(stridx)
+            return get_string.__func__(cls, device, stridx)
+        UsbTools.get_string = classmethod(count_string)
+        try:
+            UsbTools.flush_cache()
+            devs = UsbTools.find_all(ftdis)
+            self.assertEqual(len(calls), 2*len(devs))
+            calls.clear()
+            self.assertEqual(set(UsbTools.find_all(ftdis)), set(devs))
+            self.assertFalse(calls)
+            # re-enumeration preserves strings of known devices
+            UsbTools.CACHE_TTL = 0
+            self.assertEqual(set(UsbTools.find_all(ftdis)), set(devs))
+            self.assertFalse(calls)
+            # only the requested devices are cached
+            UsbTools.UsbVidPids.clear()
+            UsbTools.flush_cache()
+            self.assertEqual(len(UsbTools.find_all(ftdis[:1])), 1)
+            self.assertEqual(set(UsbTools.UsbDevices), set(ftdis[:1]))
+            self.assertEqual(set(UsbTools.find_all(ftdis)), set(devs))
+        finally:
+            UsbTools.get_string = get_string
+            UsbTools.CACHE_TTL = ttl
+
     def test_list_devices(self):
         """List FTDI devices."""
         vid = 0x403
@@ -129,6 +171,63 @@ class MockUsbToolsTestCase(FtdiTestCase):
         self.assertEqual(len(devs), 1)
 
 
+class MockUsbHotplugTestCase(FtdiTestCase):
+    """Test UsbTools hotplug notifications.
+    """
+
+    def tearDown(self):
+        self.loader.unload()
+
+    def test_subscribe(self):
+        """Report device arrival and departure."""
+        ftdis = [(0x403, pid)
+                 for pid in (0x6001, 0x6010, 0x6011, 0x6014, 0x6015)]
+        with open('pyftdi/tests/resources/ft232h.yaml', 'rb') as yfp:
+            self.loader.load(yfp)
+        devs = UsbTools.find_all(ftdis)
+        self.assertEqual(len(devs), 1)
+        ft232h, _ = devs[0]
+        dev = UsbTools.get_device(ft232h)
+        events = []
+        period = UsbTools.HOTPLUG_POLL_PERIOD
+        UsbTools.HOTPLUG_POLL_PERIOD = 0.05
+        token = UsbTools.subscribe(lambda desc, arrived:
+                                   events.append((desc, arrived)), ftdis)
+        try:
+            sleep(0.2)
+            self.assertFalse(events)
+            # unplug the device, without releasing it as the loader does
+            UsbTools.find_backend().flush_devices()
+            self.wait_for(events, 1)
+            self.assertEqual(events, [(ft232h, False)])
+            # open device is flagged as stale, but is only released by its
+            # owner
+            self.assertNotIn(dev, [d for d, _ in UsbTools.Devices.values()])
+            self.assertIn([dev, 1], UsbTools.StaleDevices.values())
+            UsbTools.release_device(dev)
+            self.assertFalse(UsbTools.StaleDevices)
+            # the enumeration cache has been refreshed
+            self.assertFalse(UsbTools.find_all(ftdis))
+            events.clear()
+            with open('pyftdi/tests/resources/ftmany.yaml', 'rb') as yfp:
+                self.loader.load(yfp)
+            self.wait_for(events, 6)
+            self.assertEqual(len(events), 6)
+            self.assertTrue(all(arrived for _, arrived in events))
+            self.assertEqual({desc for desc, _ in events},
+                             {desc for desc, _ in UsbTools.find_all(ftdis)})
+        finally:
+            UsbTools.unsubscribe(token)
+            UsbTools.HOTPLUG_POLL_PERIOD = period
+        self.assertIsNone(UsbTools.HotplugWorker)
+
+    @staticmethod
+    def wait_for(events, count, timeout=2.0):
+        expire = now() + timeout
+        while len(events) < count and now() < expire:
+            sleep(0.01)
+
+
 class MockFtdiDiscoveryTestCase(FtdiTestCase):
     """Test FTDI device discovery APIs.
        These APIs are FTDI wrappers for UsbTools APIs.
@@ -315,6 +414,30 @@ class MockManyDevicesTestCase(FtdiTestCase):
                 self.assertTrue(parts[2].startswith('FT'))
             self.assertRegex(urlparts.path, r'^/\d$')
 
+    def test_open_many(self):
+        """Check concurrent opening of several FTDI devices."""
+        urls = ['ftdi://::FT1ABC1/1', 'ftdi://::FT1ABC2/1',
+                'ftdi://::FT2DEF/1', 'ftdi://::FT2DEF/2']
+        urls.extend(f'ftdi://::3:3/{port}' for port in range(1, 3))
+        ftdis = Ftdi.open_many(urls, 'mpsse', frequency=1E6)
+        self.assertEqual(len(ftdis), len(urls))
+        self.assertTrue(all(ftdi.is_connected for ftdi in ftdis))
+        self.assertEqual(len({ftdi.usb_dev for ftdi in ftdis}), 4)
+        self.assertEqual(ftdis[2].usb_dev, ftdis[3].usb_dev)
+        self.assertEqual(ftdis[4].usb_path, (3, 3, 0))
+        for ftdi in ftdis:
+            ftdi.close()
+        self.assertFalse(UsbTools.Devices)
+        # on error, no device should be left open
+        self.assertRaises(UsbToolsError, Ftdi.open_many,
+                          urls + ['ftdi://::FT0000/1'], 'mpsse')
+        self.assertFalse(UsbTools.Devices)
+        # including devices that fail once their USB device has been found
+        self.assertRaises(FtdiError, Ftdi.open_many,
+                          urls + ['ftdi://::FT1ABC1/2'], 'mpsse')
+        self.assertFalse(UsbTools.Devices)
+        self.assertFalse(UsbTools.DeviceLocks)
+
 
 class MockSimpleDirectTestCase(FtdiTestCase):
     """Test FTDI open/close APIs with a basic featured FTDI device (FT230H)
@@ -423,6 +546,600 @@ class MockSimpleGpioTestCase(FtdiTestCase):
         gpio.close()
 
 
+class SpiNorDevice:
+    """Minimal SPI NOR flash device, emulated behind the SpiPort and
+       SpiBatch APIs used by SpiNorFlash.
+
+       The device stays busy for a count of status reads after each program
+       or erase command, and ignores any other command in the meantime.
+
+       :param size: the flash capacity in bytes
+       :param program_polls: status reads during which a page program runs
+       :param fifo_size: the emulated FTDI RX FIFO size
+    """
+
+    def __init__(self, size: int, program_polls: int,
+                 fifo_size: int = 1024):
+        self.controller = self
+        self.ftdi = self
+        self.fifo_sizes = (fifo_size, fifo_size)
+        self.memory = bytearray(b'\xff' * size)
+        self.program_polls = program_polls
+        self.programs = 0
+        self.batches = 0
+        self._busy = 0
+        self._wel = False
+
+    def exchange(self, out, readlen: int = 0) -> bytes:
+        out = bytes(out)
+        cmd = out[0]
+        if cmd == SpiNorFlash.CMD_READ_STATUS:
+            busy = self._busy > 0
+            self._busy = max(0, self._busy - 1)
+            return bytes([SpiNorFlash.STATUS_WIP if busy else 0] * readlen)
+        if self._busy:
+            return bytes([0xff] * readlen)
+        if cmd == SpiNorFlash.CMD_READ_JEDEC_ID:
+            return b'\xef\x40' + bytes([len(self.memory).bit_length()-1])
+        if cmd == SpiNorFlash.CMD_WRITE_ENABLE:
+            self._wel = True
+            return b''
+        address = int.from_bytes(out[1:4], 'big')
+        if cmd == SpiNorFlash.CMD_READ:
+            return bytes(self.memory[address:address+readlen])
+        if not self._wel:
+            return b''
+        self._wel = False
+        if cmd == SpiNorFlash.CMD_PAGE_PROGRAM:
+            for pos, byte in enumerate(out[4:]):
+                self.memory[address+pos] &= byte
+            self.programs += 1
+            self._busy = self.program_polls
+        elif cmd == SpiNorFlash.CMD_SECTOR_ERASE:
+            self.memory[address:address+4096] = b'\xff' * 4096
+            self._busy = 3
+        return b''
+
+    def batch(self) -> 'SpiNorBatch':
+        return SpiNorBatch(self)
+
+
+class SpiNorBatch:
+    """SpiBatch emulation, whose transactions are executed on exit."""
+
+    def __init__(self, device: SpiNorDevice):
+        self._device = device
+        self._transactions = []
+        self.results = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._device.batches += 1
+        self.results = [self._device.exchange(out, readlen)
+                        for out, readlen in self._transactions]
+
+    def write(self, _, out) -> None:
+        self._transactions.append((out, 0))
+
+    def exchange(self, _, out, readlen: int) -> None:
+        self._transactions.append((out, readlen))
+
+
+class MockSpiTestCase(FtdiTestCase):
+    """Test SPI APIs with a MPSSE featured FTDI device (FT232H)
+
+       Virtual MPSSE engine replies with the level of the MISO pin.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        FtdiTestCase.setUpClass()
+        with open('pyftdi/tests/resources/ft232h.yaml', 'rb') as yfp:
+            cls.loader.load(yfp)
+
+    def test_batch(self):
+        """Check batched SPI transactions."""
+        spi = SpiController(cs_count=2)
+        spi.configure('ftdi:///1')
+        bus, address, _ = spi.ftdi.usb_path
+        vport = self.loader.get_virtual_ftdi(bus, address).get_port(1)
+        port0 = spi.get_port(0, freq=6E6, mode=0)
+        port1 = spi.get_port(1, freq=1E6, mode=3)
+        for miso in (False, True):
+            vport.set_io(vport[2], miso)
+            byte = 0xff if miso else 0x00
+            with spi.batch() as batch:
+                self.assertEqual(batch.exchange(port0, [0x9f], 3), 0)
+                batch.read(port1, 2)
+                batch.write(port0, b'\x01\x02')
+                batch.exchange(port1, b'\x03\x04', 4, duplex=True)
+                self.assertEqual(len(batch), 4)
+            self.assertEqual(len(batch), 0)
+            self.assertEqual(batch.results,
+                             [bytes([byte]*3), bytes([byte]*2), b'',
+                              bytes([byte]*4)])
+            # batched and regular transactions should match
+            self.assertEqual(port0.exchange([0x9f], 3), batch.results[0])
+        spi.terminate()
+
+    def test_large_exchange(self):
+        """Check SPI transfers larger than a single MPSSE command."""
+        spi = SpiController()
+        spi.configure('ftdi:///1')
+        bus, address, _ = spi.ftdi.usb_path
+        vport = self.loader.get_virtual_ftdi(bus, address).get_port(1)
+        port = spi.get_port(0, freq=6E6, mode=0)
+        size = 2*SpiController.PAYLOAD_MAX_LENGTH + 123
+        vport.set_io(vport[2], True)
+        port.write(bytes(size))
+        self.assertEqual(port.exchange(b'\x03\x00\x00\x00', size),
+                         b'\xff' * size)
+        self.assertEqual(port.exchange(bytes(size), duplex=True),
+                         b'\xff' * size)
+        buf = bytearray(size)
+        self.assertEqual(port.readinto(buf), size)
+        self.assertEqual(buf, b'\xff' * size)
+        data = port.read(size, droptail=4)
+        self.assertEqual(len(data), size)
+        self.assertEqual(data[-2:], b'\xff\xf0')
+        vport.set_io(vport[2], False)
+        self.assertEqual(port.read(size), bytes(size))
+        spi.terminate()
+
+    def test_flash(self):
+        """Check SPI NOR flash accesses.
+
+           Virtual flash content is always read as the MISO level, i.e. any
+           programmed content is lost.
+        """
+        spi = SpiController()
+        spi.configure('ftdi:///1')
+        bus, address, _ = spi.ftdi.usb_path
+        vport = self.loader.get_virtual_ftdi(bus, address).get_port(1)
+        port = spi.get_port(0, freq=6E6, mode=0)
+        vport.set_io(vport[2], False)
+        with self.assertRaises(SpiFlashError):
+            SpiNorFlash(port)
+        size = 1 << 20
+        flash = SpiNorFlash(port, size)
+        self.assertEqual(len(flash), size)
+        self.assertEqual(flash.read(0x1234, 10), bytes(10))
+        self.assertEqual(flash[-4:], bytes(4))
+        self.assertEqual(flash[0x100], 0)
+        self.assertRaises(IndexError, flash.__getitem__, size)
+        self.assertRaises(IndexError, flash.__getitem__, -size-1)
+        self.assertEqual(flash[-size], 0)
+        buf = bytearray(0x20000)
+        self.assertEqual(flash.readinto(0x10000, buf), len(buf))
+        self.assertEqual(buf, bytes(len(buf)))
+        with self.assertRaises(ValueError):
+            flash.read(size-1, 2)
+        # unchanged sectors are not updated
+        self.assertEqual(flash.write(0x800, bytes(0x2000)), 0)
+        # a set bit requires a sector erase, then a page program
+        self.assertEqual(flash.write(0x1ff0, b'\x01'*0x20), 2)
+        # a busy flash device is eventually reported
+        vport.set_io(vport[2], True)
+        flash.invalidate()
+        with self.assertRaises(SpiFlashError):
+            flash.write(0x1000, b'\x00')
+        spi.terminate()
+
+    def test_flash_program(self):
+        """Check pipelined SPI NOR flash page programming."""
+        size = 1 << 20
+        data = bytes(range(256)) * 64
+        pages = len(data) // 256
+        # a fast device accepts all the pages of a single batch
+        device = SpiNorDevice(size, program_polls=1)
+        flash = SpiNorFlash(device)
+        self.assertEqual(len(flash), size)
+        flash.write(0x10000, data)
+        self.assertEqual(flash.read(0x10000, len(data)), data)
+        self.assertEqual(device.programs, pages)
+        self.assertEqual(device.batches, 1)
+        # the flash device behaves as a sequence of bytes
+        self.assertEqual(flash[0x10000+len(data)-1], data[-1])
+        self.assertIn(0x80, flash)
+        self.assertEqual(next(reversed(flash)), 0xff)
+        self.assertEqual(flash._polls, SpiNorFlash.MIN_POLLS)
+        # pages discarded by a busy device are programmed again, the count
+        # of status reads adapting to the page program time
+        device = SpiNorDevice(size, program_polls=10)
+        flash = SpiNorFlash(device)
+        flash.write(0x10000, data)
+        self.assertEqual(flash.read(0x10000, len(data)), data)
+        self.assertGreater(device.programs, pages)
+        self.assertEqual(flash._polls, device.program_polls + 2)
+        # once adapted, no page is discarded anymore
+        device.programs = 0
+        device.batches = 0
+        flash.write(0x20000, data)
+        self.assertEqual(flash.read(0x20000, len(data)), data)
+        self.assertEqual(device.programs, pages)
+        group = device.fifo_sizes[1] // 2 // flash._polls
+        self.assertEqual(device.batches, (pages + group - 1) // group)
+        # a slow device is programmed one page per batch, the count of
+        # status reads being bounded by the FTDI RX FIFO size
+        device = SpiNorDevice(size, program_polls=50, fifo_size=64)
+        budget = device.fifo_sizes[1] // 2
+        flash = SpiNorFlash(device)
+        flash.write(0x10000, data[:4096])
+        self.assertEqual(flash.read(0x10000, 4096), data[:4096])
+        self.assertEqual(device.programs, 16)
+        self.assertEqual(flash._polls, budget)
+
+    def test_async(self):
+        """Check asyncio SPI front-end."""
+        spi = AsyncSpiController(cs_count=2)
+
+        async def exchange() -> list:
+            await spi.configure('ftdi:///1')
+            bus, address, _ = spi.controller.ftdi.usb_path
+            vport = self.loader.get_virtual_ftdi(bus, address).get_port(1)
+            port = spi.get_port(1, freq=6E6, mode=0)
+            results = []
+            for miso in (False, True):
+                vport.set_io(vport[2], miso)
+                results.append(await port.exchange([0x9f], 3))
+                results.append(await port.exchange(b'\x01\x02',
+                                                   duplex=True))
+                await port.write(b'\x03\x04')
+                results.append(await port.read(4))
+            await spi.close()
+            return results
+
+        # the controller may be configured again once closed
+        for _ in range(2):
+            self.assertEqual(asyncio_run(exchange()),
+                             [bytes(3), bytes(2), bytes(4),
+                              b'\xff' * 3, b'\xff' * 2, b'\xff' * 4])
+            self.assertFalse(spi.controller.configured)
+
+
+class MockI2cTestCase(FtdiTestCase):
+    """Test I2C APIs with a MPSSE featured FTDI device (FT232H)
+
+       Virtual MPSSE engine replies with the level of the SDA input pin, so
+       slave always ACKs when the pin is low, and NACKs when it is high.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        FtdiTestCase.setUpClass()
+        with open('pyftdi/tests/resources/ft232h.yaml', 'rb') as yfp:
+            cls.loader.load(yfp)
+
+    def test_pipelined_write(self):
+        """Check pipelined I2C writes."""
+        i2c = I2cController()
+        i2c.configure('ftdi:///1', pipeline=True)
+        bus, address, _ = i2c.ftdi.usb_path
+        vport = self.loader.get_virtual_ftdi(bus, address).get_port(1)
+        port = i2c.get_port(0x50)
+        vport.set_io(vport[2], False)
+        port.write(bytes(range(256)) * 4)
+        vport.set_io(vport[2], True)
+        with self.assertRaises(I2cNackError):
+            port.write(b'\x01\x02')
+        i2c.terminate()
+
+    def test_poll_batch(self):
+        """Check batched I2C condition polling."""
+        i2c = I2cController()
+        i2c.configure('ftdi:///1', pollbatch=True)
+        bus, address, _ = i2c.ftdi.usb_path
+        vport = self.loader.get_virtual_ftdi(bus, address).get_port(1)
+        port = i2c.get_port(0x50)
+        vport.set_io(vport[2], False)
+        self.assertEqual(port.poll_cond(1, 0x01, 0x00, 10), b'\x00')
+        self.assertEqual(port.poll_cond(2, 0x8001, 0x0000, 10), b'\x00\x00')
+        self.assertIsNone(port.poll_cond(1, 0x01, 0x01, 100))
+        self.assertEqual(port.poll_cond(1, 0x01, 0x00, 10, start=False),
+                         b'\x00')
+        vport.set_io(vport[2], True)
+        self.assertIsNone(port.poll_cond(1, 0x01, 0x01, 10))
+        i2c.terminate()
+
+    def test_scan(self):
+        """Check I2C bus scan."""
+        i2c = I2cController()
+        i2c.configure('ftdi:///1')
+        bus, address, _ = i2c.ftdi.usb_path
+        vport = self.loader.get_virtual_ftdi(bus, address).get_port(1)
+        vport.set_io(vport[2], False)
+        self.assertEqual(i2c.scan([0x50, 0x51], 'write'),
+                         {0x50: 'W', 0x51: 'W'})
+        self.assertEqual(i2c.scan([0x10], 'any'), {0x10: 'R'})
+        slaves = i2c.scan()
+        self.assertEqual(len(slaves), I2cController.HIGHEST_I2C_ADDRESS+1)
+        self.assertEqual(slaves[0x50], 'R')
+        self.assertEqual(slaves[0x60], 'W')
+        vport.set_io(vport[2], True)
+        self.assertEqual(i2c.scan(), {})
+        with self.assertRaises(ValueError):
+            i2c.scan(mode='smbus')
+        i2c.terminate()
+
+    def test_batch(self):
+        """Check batched I2C register accesses."""
+        i2c = I2cController()
+        i2c.configure('ftdi:///1')
+        bus, address, _ = i2c.ftdi.usb_path
+        vport = self.loader.get_virtual_ftdi(bus, address).get_port(1)
+        port = i2c.get_port(0x50)
+        vport.set_io(vport[2], False)
+        data = port.read_from_regs([(0x10, 2), (0x20, 4)] * 100)
+        self.assertEqual(len(data), 200)
+        self.assertEqual(data[0], bytes(2))
+        self.assertEqual(data[1], bytes(4))
+        port.write_to_regs([(0x10, b'\x01\x02'), (0x20, b'\x03')])
+        vport.set_io(vport[2], True)
+        with self.assertRaises(I2cNackError):
+            port.read_from_regs([(0x10, 2)])
+        i2c.terminate()
+
+    def test_templates(self):
+        """Check I2C command templates follow configuration changes."""
+        i2c = I2cController()
+        i2c.configure('ftdi:///1', frequency=100E3)
+        port = i2c.get_port(0x50)
+        port.read(1)
+        start = i2c._start
+        self.assertEqual(i2c._get_templates(), i2c._build_templates())
+        gpio = i2c.get_gpio()
+        gpio.set_direction(0x10, 0x10)
+        self.assertEqual(i2c._idle[2] & 0x10, 0x10)
+        self.assertEqual(i2c._get_templates(), i2c._build_templates())
+        gpio.write(0x10)
+        self.assertEqual(i2c._idle[1] & 0x10, 0x10)
+        self.assertEqual(i2c._get_templates(), i2c._build_templates())
+        i2c.close()
+        i2c.configure('ftdi:///1', frequency=400E3)
+        self.assertNotEqual(i2c._start, start)
+        self.assertEqual(i2c._get_templates(), i2c._build_templates())
+        i2c.terminate()
+
+    def test_async(self):
+        """Check asyncio I2C front-end."""
+        i2c = AsyncI2cController()
+
+        async def access() -> list:
+            await i2c.configure('ftdi:///1')
+            bus, address, _ = i2c.controller.ftdi.usb_path
+            vport = self.loader.get_virtual_ftdi(bus, address).get_port(1)
+            port = i2c.get_port(0x50)
+            vport.set_io(vport[2], False)
+            results = [await port.poll()]
+            await port.write(b'\x01\x02')
+            await port.write_to(0x10, b'\x03')
+            results.append(await port.read(2))
+            results.append(await port.read_from(0x10, 3))
+            results.append(await port.exchange(b'\x20', 1))
+            vport.set_io(vport[2], True)
+            results.append(await port.poll())
+            try:
+                await port.write(b'\x01')
+            except I2cNackError:
+                results.append(None)
+            await i2c.close()
+            return results
+
+        self.assertEqual(asyncio_run(access()),
+                         [True, bytes(2), bytes(3), bytes(1), False, None])
+        self.assertFalse(i2c.controller.configured)
+
+
+class MockJtagTestCase(FtdiTestCase):
+    """Test JTAG APIs with a MPSSE featured FTDI device (FT232H)
+
+       Virtual MPSSE engine replies with the level of the TDO pin.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        FtdiTestCase.setUpClass()
+        with open('pyftdi/tests/resources/ft232h.yaml', 'rb') as yfp:
+            cls.loader.load(yfp)
+
+    def test_shift_dr_bytes(self):
+        """Check raw byte shifting through the data register."""
+        jtag = JtagEngine(frequency=1E6)
+        jtag.configure('ftdi:///1')
+        bus, address, _ = jtag.controller.ftdi.usb_path
+        vport = self.loader.get_virtual_ftdi(bus, address).get_port(1)
+        jtag.reset()
+        data = bytes(range(256))*10
+        self.assertIsNone(jtag.shift_dr_bytes(data))
+        self.assertEqual(str(jtag.state_machine.state()), 'update_dr')
+        for tdo in (False, True):
+            vport.set_io(vport[2], tdo)
+            out = jtag.shift_dr_bytes(data, read=True)
+            self.assertEqual(out, bytes([0xff if tdo else 0x00])*len(data))
+            self.assertEqual(str(jtag.state_machine.state()), 'update_dr')
+        jtag.close()
+
+    def test_state_transitions(self):
+        """Check precomputed TAP state transitions."""
+        jtag = JtagEngine(frequency=1E6)
+        jtag.configure('ftdi:///1')
+        jtag.reset()
+        machine = jtag.state_machine
+        for source in machine.states:
+            for target in machine.states:
+                machine.reset()
+                machine.handle_events(machine.find_events(source))
+                self.assertEqual(str(machine.state()), source)
+                events = machine.find_events(target)
+                path = machine.find_path(target)
+                self.assertEqual(len(events), len(path)-1)
+                self.assertEqual(machine.get_events(path), events)
+                machine.handle_events(events)
+                self.assertEqual(str(machine.state()), target)
+        jtag.reset()
+        jtag.write_ir(BitSequence(0b1110, length=4))
+        self.assertEqual(str(machine.state()), 'update_ir')
+        jtag.go_idle()
+        jtag.go_idle()
+        self.assertEqual(str(machine.state()), 'run_test_idle')
+        jtag.close()
+
+    def test_deferred_reads(self):
+        """Check deferred JTAG reads."""
+        jtag = JtagEngine(frequency=1E6)
+        jtag.configure('ftdi:///1')
+        ftdi = jtag.controller.ftdi
+        bus, address, _ = ftdi.usb_path
+        vport = self.loader.get_virtual_ftdi(bus, address).get_port(1)
+        jtag.reset()
+        read_data_bytes = ftdi.read_data_bytes
+        reads = []
+        def count_read_data_bytes(size, attempt=1, request_gen=None):
+            reads.append(size)
+            return read_data_bytes(size, attempt, request_gen)
+        ftdi.read_data_bytes = count_read_data_bytes
+        for tdo in (False, True):
+            vport.set_io(vport[2], tdo)
+            def expect(length):
+                return BitSequence((1 << length)-1 if tdo else 0,
+                                   length=length)
+            jtag.set_deferred(True)
+            reads.clear()
+            futures = [jtag.read_dr(length) for length in range(1, 65)]
+            self.assertFalse(any(future.done() for future in futures))
+            self.assertEqual(futures[40].result(), expect(41))
+            self.assertTrue(all(future.done() for future in futures))
+            self.assertEqual(len(reads), 1)
+            for length, future in enumerate(futures, start=1):
+                self.assertEqual(future.result(), expect(length))
+            jtag.change_state('shift_dr')
+            shifted = jtag.shift_register(BitSequence(0x5a, length=12))
+            updated = jtag.shift_and_update_register(
+                BitSequence(0x5a, length=12))
+            self.assertEqual(str(jtag.state_machine.state()), 'update_dr')
+            # a blocking read resolves the reads pending before it
+            deferred = jtag.read_dr(20)
+            jtag.set_deferred(False)
+            self.assertTrue(deferred.done())
+            for future in (shifted, updated):
+                self.assertEqual(future.result(), expect(12))
+            self.assertEqual(deferred.result(), expect(20))
+            self.assertEqual(jtag.read_dr(20), expect(20))
+        # pending replies are drained before they overflow the RX FIFO
+        jtag.set_deferred(True)
+        reads.clear()
+        futures = [jtag.read_dr(64) for _ in range(256)]
+        jtag.flush()
+        self.assertGreater(len(reads), 1)
+        self.assertLessEqual(max(reads), ftdi.fifo_sizes[1]//2)
+        self.assertTrue(all(future.result() == expect(64)
+                            for future in futures))
+        # long reads are split into commands that fit into the FTDI fifo
+        stack_cmd = jtag.controller._stack_cmd
+        cmds = []
+        def record_stack_cmd(cmd):
+            cmds.append(bytes(cmd))
+            return stack_cmd(cmd)
+        jtag.controller._stack_cmd = record_stack_cmd
+        length = 8*(3*jtag.controller.FTDI_PIPE_LEN+10)+3
+        future = jtag.read_dr(length)
+        del jtag.controller._stack_cmd
+        sizes = [cmd[1]+(cmd[2] << 8)+1 for cmd in cmds
+                 if cmd[0] == Ftdi.READ_BYTES_NVE_LSB]
+        self.assertEqual(sum(sizes), length//8)
+        self.assertLessEqual(max(sizes), jtag.controller.FTDI_PIPE_LEN)
+        self.assertEqual(future.result(), expect(length))
+        # chain detection and boundary scans also work while reads are
+        # deferred
+        tool = JtagTool(jtag)
+        class Bsdl:
+            @staticmethod
+            def get_jtag_ir(_):
+                return BitSequence(0b0001, length=4)
+            @staticmethod
+            def get_boundary_length():
+                return 42
+        self.assertEqual(tool.sample(Bsdl), expect(42))
+        self.assertEqual(tool.readback(Bsdl), expect(42))
+        self.assertEqual(tool.idcodes(), [])
+        vport.set_io(vport[2], False)
+        self.assertRaises(JtagError, tool.idcodes)
+        jtag.set_deferred(False)
+        del ftdi.read_data_bytes
+        jtag.close()
+
+    def test_scan_planner(self):
+        """Check batched scans on a multi-device chain."""
+        jtag = JtagEngine(frequency=1E6)
+        jtag.configure('ftdi:///1')
+        ftdi = jtag.controller.ftdi
+        bus, address, _ = ftdi.usb_path
+        vport = self.loader.get_virtual_ftdi(bus, address).get_port(1)
+        jtag.reset()
+        jtag.sync()
+        chain = JtagChain((4, 6, 8))
+        self.assertEqual(chain.ir_length, 18)
+        planner = jtag.scan_planner(chain)
+        # the DR length of a device is only known once it has been scanned
+        planner.dr(1, BitSequence(length=8))
+        self.assertRaises(JtagError, planner.execute)
+        write_data = ftdi.write_data
+        writes = []
+        def count_write_data(data):
+            writes.append(len(data))
+            return write_data(data)
+        ftdi.write_data = count_write_data
+        for tdo in (False, True):
+            vport.set_io(vport[2], tdo)
+            writes.clear()
+            planner.ir(0, BitSequence(0b0001, length=4))
+            planner.ir(2, BitSequence(0x02, length=8))
+            idx0 = planner.read_dr(0, 32)
+            idx2 = planner.dr(2, BitSequence(0xa5, length=8), read=True)
+            planner.ir(1, BitSequence(0x3, length=6))
+            idx1 = planner.read_dr(1, 12)
+            results = planner.execute()
+            self.assertEqual(len(writes), 1)
+            self.assertEqual(len(results), 6)
+            self.assertIsNone(results[0])
+            self.assertEqual(str(jtag.state_machine.state()), 'update_dr')
+            for idx, length in ((idx0, 32), (idx2, 8), (idx1, 12)):
+                self.assertEqual(results[idx],
+                                 BitSequence((1 << length)-1 if tdo else 0,
+                                             length=length))
+        del ftdi.write_data
+        # padded devices are updated with the data last shifted in
+        streams = []
+        write = jtag.controller.write
+        def record_write(out, *args, **kwargs):
+            streams.append(BitSequence(out))
+            return write(out, *args, **kwargs)
+        jtag.controller.write = record_write
+        extest = BitSequence(0b0000, length=4)
+        cells = BitSequence(0x5a3c, length=16)
+        planner.ir(0, extest)
+        planner.dr(0, cells)
+        planner.execute()
+        planner.dr(2, BitSequence(0xc3, length=8))
+        planner.execute()
+        expected = BitSequence(cells)
+        expected.append(BitSequence(length=1))
+        expected.append(BitSequence(0xc3, length=8))
+        self.assertEqual(streams[-1], expected)
+        del jtag.controller.write
+        # changing the instruction discards the data register content
+        planner.ir(0, BitSequence(0b0010, length=4))
+        planner.dr(1, BitSequence(length=1))
+        self.assertRaises(JtagError, planner.execute)
+        tool = JtagTool(jtag)
+        self.assertEqual(tool.idcodes(), [])
+        vport.set_io(vport[2], False)
+        self.assertRaises(JtagError, tool.idcodes)
+        jtag.close()
+
+
 class MockSimpleUartTestCase(FtdiTestCase):
     """Test FTDI UART APIs
     """
@@ -467,6 +1184,186 @@ class MockSimpleUartTestCase(FtdiTestCase):
         self.assertEqual(msg, buf)
         port.close()
 
+    def test_uart_read_view(self):
+        """Check zero-copy reception."""
+        with open('pyftdi/tests/resources/ft232h.yaml', 'rb') as yfp:
+            self.loader.load(yfp)
+        port = serial_for_url('ftdi:///1')
+        bus, address, _ = port.usb_path
+        vftdi = self.loader.get_virtual_ftdi(bus, address)
+        vport = vftdi.get_port(1)
+        txd = vport[vport.UART_PINS.TXD]
+        rxd = vport[vport.UART_PINS.RXD]
+        txd.connect_to(rxd)
+        msg = ascii_letters.encode()
+        port.write(msg)
+        buf = bytearray()
+        for _ in range(10):
+            view = port.udev.read_data_view(len(msg)-len(buf))
+            self.assertIsInstance(view, memoryview)
+            buf.extend(view)
+            if len(buf) == len(msg):
+                break
+        self.assertEqual(msg, buf)
+        port.close()
+
+    def test_uart_readinto(self):
+        """Check reception into a pre-allocated buffer."""
+        with open('pyftdi/tests/resources/ft232h.yaml', 'rb') as yfp:
+            self.loader.load(yfp)
+        port = serial_for_url('ftdi:///1', timeout=1)
+        bus, address, _ = port.usb_path
+        vftdi = self.loader.get_virtual_ftdi(bus, address)
+        vport = vftdi.get_port(1)
+        txd = vport[vport.UART_PINS.TXD]
+        rxd = vport[vport.UART_PINS.RXD]
+        txd.connect_to(rxd)
+        msg = ascii_letters.encode()
+        port.write(msg)
+        buf = bytearray(len(msg))
+        view = memoryview(buf)
+        pos = 0
+        while pos < len(buf):
+            count = port.readinto(view[pos:])
+            self.assertTrue(count)
+            pos += count
+        self.assertEqual(msg, buf)
+        port.close()
+
+    def test_uart_in_waiting(self):
+        """Check host-side buffering of received data."""
+        with open('pyftdi/tests/resources/ft232h.yaml', 'rb') as yfp:
+            self.loader.load(yfp)
+        port = serial_for_url('ftdi:///1', timeout=1)
+        bus, address, _ = port.usb_path
+        vftdi = self.loader.get_virtual_ftdi(bus, address)
+        vport = vftdi.get_port(1)
+        txd = vport[vport.UART_PINS.TXD]
+        rxd = vport[vport.UART_PINS.RXD]
+        txd.connect_to(rxd)
+        self.assertEqual(port.in_waiting, 0)
+        msg = ascii_letters.encode()
+        port.write(msg)
+        expire = now() + 1.0
+        while port.in_waiting < len(msg) and now() < expire:
+            sleep(0.01)
+        self.assertEqual(port.in_waiting, len(msg))
+        self.assertEqual(port.read(len(msg)), msg)
+        self.assertEqual(port.in_waiting, 0)
+        # a read with a timeout returns as soon as some data are received
+        start = now()
+        self.assertEqual(port.read(len(msg)), b'')
+        self.assertGreaterEqual(now()-start, 0.9)
+        port.write(msg[:4])
+        start = now()
+        self.assertEqual(port.read(len(msg)), msg[:4])
+        self.assertLess(now()-start, 0.5)
+        port.close()
+
+    def test_uart_select(self):
+        """Check the readiness file descriptor."""
+        with open('pyftdi/tests/resources/ft232h.yaml', 'rb') as yfp:
+            self.loader.load(yfp)
+        port = serial_for_url('ftdi:///1', timeout=0)
+        bus, address, _ = port.usb_path
+        vftdi = self.loader.get_virtual_ftdi(bus, address)
+        vport = vftdi.get_port(1)
+        txd = vport[vport.UART_PINS.TXD]
+        rxd = vport[vport.UART_PINS.RXD]
+        txd.connect_to(rxd)
+        self.assertEqual(select([port], [], [], 0)[0], [])
+        msg = ascii_letters.encode()
+        port.write(msg)
+        self.assertEqual(select([port], [], [], 1.0)[0], [port])
+        buf = bytearray()
+        while len(buf) < len(msg):
+            self.assertEqual(select([port], [], [], 1.0)[0], [port])
+            buf.extend(port.read(len(msg)))
+        self.assertEqual(msg, buf)
+        self.assertEqual(select([port], [], [], 0)[0], [])
+        port.close()
+
+    def test_uart_stream(self):
+        """Check continuous reception."""
+        with open('pyftdi/tests/resources/ft232h.yaml', 'rb') as yfp:
+            self.loader.load(yfp)
+        port = serial_for_url('ftdi:///1')
+        bus, address, _ = port.usb_path
+        vftdi = self.loader.get_virtual_ftdi(bus, address)
+        vport = vftdi.get_port(1)
+        txd = vport[vport.UART_PINS.TXD]
+        rxd = vport[vport.UART_PINS.RXD]
+        txd.connect_to(rxd)
+        ftdi = port.ftdi
+        self.assertRaises(ValueError, ftdi.start_stream, transfers=0)
+        ftdi.start_stream()
+        msg = ascii_letters.encode()
+        buf = bytearray()
+        for _ in range(4):
+            port.write(msg)
+        for chunk in ftdi.iter_stream(1.0):
+            buf.extend(chunk)
+            if len(buf) >= 4*len(msg):
+                break
+        ftdi.stop_stream()
+        self.assertEqual(4*msg, buf)
+        self.assertIsNone(ftdi.stream_error)
+        # callback errors abort the stream and are recorded
+        chunks = []
+        def callback(chunk):
+            chunks.append(chunk)
+            if chunk:
+                raise IOError('Disk full')
+        ftdi.start_stream(callback)
+        port.write(msg)
+        expire = now() + 1.0
+        while (not chunks or chunks[-1]) and now() < expire:
+            sleep(0.01)
+        ftdi.stop_stream()
+        self.assertEqual(chunks[-1], b'')
+        self.assertIsInstance(ftdi.stream_error, IOError)
+        # USB errors are reported to the stream consumer
+        read = ftdi._read
+        def fail_read(reader=None):
+            raise USBError('Device gone')
+        ftdi._read = fail_read
+        try:
+            ftdi.start_stream()
+            self.assertRaises(USBError, ftdi.read_stream, 1.0)
+            ftdi.stop_stream()
+        finally:
+            ftdi._read = read
+        port.close()
+
+    def test_uart_async(self):
+        """Check asyncio front-end."""
+        with open('pyftdi/tests/resources/ft232h.yaml', 'rb') as yfp:
+            self.loader.load(yfp)
+        aftdi = AsyncFtdi()
+
+        async def loopback(msg: bytes) -> bytes:
+            await aftdi.open_from_url('ftdi:///1')
+            await aftdi.set_baudrate(115200)
+            bus, address, _ = aftdi.ftdi.usb_path
+            vftdi = self.loader.get_virtual_ftdi(bus, address)
+            vport = vftdi.get_port(1)
+            txd = vport[vport.UART_PINS.TXD]
+            rxd = vport[vport.UART_PINS.RXD]
+            txd.connect_to(rxd)
+            await aftdi.write_data(msg)
+            buf = bytearray()
+            for _ in range(10):
+                buf.extend(await aftdi.read_data(len(msg)-len(buf)))
+                if len(buf) == len(msg):
+                    break
+            await aftdi.close()
+            return bytes(buf)
+
+        msg = ascii_letters.encode()
+        self.assertEqual(asyncio_run(loopback(msg)), msg)
+        # the interface may be reopened once closed
+        self.assertEqual(asyncio_run(loopback(msg[::-1])), msg[::-1])
+
     def test_baudrate_fs_dev(self):
         """Check baudrate settings for full speed devices."""
         with open('pyftdi/tests/resources/ft230x.yaml', 'rb') as yfp:
@@ -817,6 +1714,7 @@ class MockCbusGpioTestCase(FtdiTestCase):
 def suite():
     suite_ = TestSuite()
     suite_.addTest(makeSuite(MockUsbToolsTestCase, 'test'))
+    suite_.addTest(makeSuite(MockUsbHotplugTestCase, 'test'))
     suite_.addTest(makeSuite(MockFtdiDiscoveryTestCase, 'test'))
     suite_.addTest(makeSuite(MockSimpleDeviceTestCase, 'test'))
     suite_.addTest(makeSuite(MockDualDeviceTestCase, 'test'))
@@ -826,6 +1724,9 @@ def suite():
     suite_.addTest(makeSuite(MockSimpleDirectTestCase, 'test'))
     suite_.addTest(makeSuite(MockSimpleMpsseTestCase, 'test'))
     suite_.addTest(makeSuite(MockSimpleGpioTestCase, 'test'))
+    suite_.addTest(makeSuite(MockSpiTestCase, 'test'))
+    suite_.addTest(makeSuite(MockI2cTestCase, 'test'))
+    suite_.addTest(makeSuite(MockJtagTestCase, 'test'))
     suite_.addTest(makeSuite(MockSimpleUartTestCase, 'test'))
     suite_.addTest(makeSuite(MockRawExtEepromTestCase, 'test'))
     suite_.addTest(makeSuite(MockRawIntEepromTestCase, 'test'))
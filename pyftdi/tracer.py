@@ -348,6 +348,68 @@ class FtdiMpsseEngine:
     def _resp_rw_bits_pve_nve_msb(self):
         return self._decode_input_mpsse_bits(currentframe().f_code.co_name)
 
+    def _cmd_rw_bytes_nve_pve_lsb(self):
+        return self._decode_output_mpsse_bytes(currentframe().f_code.co_name,
+                                               True)
+
+    def _resp_rw_bytes_nve_pve_lsb(self):
+        return self._decode_input_mpsse_bytes(currentframe().f_code.co_name)
+
+    def _cmd_rw_bytes_pve_nve_lsb(self):
+        return self._decode_output_mpsse_bytes(currentframe().f_code.co_name,
+                                               True)
+
+    def _resp_rw_bytes_pve_nve_lsb(self):
+        return self._decode_input_mpsse_bytes(currentframe().f_code.co_name)
+
+    def _cmd_rw_bits_nve_pve_lsb(self):
+        return self._decode_output_mpsse_bits(currentframe().f_code.co_name,
+                                              True)
+
+    def _resp_rw_bits_nve_pve_lsb(self):
+        return self._decode_input_mpsse_bits(currentframe().f_code.co_name)
+
+    def _cmd_rw_bits_pve_nve_lsb(self):
+        return self._decode_output_mpsse_bits(currentframe().f_code.co_name,
+                                              True)
+
+    def _resp_rw_bits_pve_nve_lsb(self):
+        return self._decode_input_mpsse_bits(currentframe().f_code.co_name)
+
+    def _cmd_write_bits_tms_pve(self):
+        return self._decode_output_mpsse_bits(currentframe().f_code.co_name)
+
+    def _cmd_write_bits_tms_nve(self):
+        return self._decode_output_mpsse_bits(currentframe().f_code.co_name)
+
+    def _cmd_rw_bits_tms_pve_pve(self):
+        return self._decode_output_mpsse_bits(currentframe().f_code.co_name,
+                                              True)
+
+    def _resp_rw_bits_tms_pve_pve(self):
+        return self._decode_input_mpsse_bits(currentframe().f_code.co_name)
+
+    def _cmd_rw_bits_tms_pve_nve(self):
+        return self._decode_output_mpsse_bits(currentframe().f_code.co_name,
+                                              True)
+
+    def _resp_rw_bits_tms_pve_nve(self):
+        return self._decode_input_mpsse_bits(currentframe().f_code.co_name)
+
+    def _cmd_rw_bits_tms_nve_pve(self):
+        return self._decode_output_mpsse_bits(currentframe().f_code.co_name,
+                                              True)
+
+    def _resp_rw_bits_tms_nve_pve(self):
+        return self._decode_input_mpsse_bits(currentframe().f_code.co_name)
+
+    def _cmd_rw_bits_tms_nve_nve(self):
+        return self._decode_output_mpsse_bits(currentframe().f_code.co_name,
+                                              True)
+
+    def _resp_rw_bits_tms_nve_nve(self):
+        return self._decode_input_mpsse_bits(currentframe().f_code.co_name)
+
     def _resp_get_bits_low(self):
         if self._trace_rx:
             return False
@@ -370,7 +432,7 @@ class FtdiMpsseEngine:
         if len(self._trace_tx) < 4:
             return False
         length = sunpack('<H', self._trace_tx[1:3])[0] + 1
-        if len(self._trace_tx) < 4 + length:
+        if len(self._trace_tx) < 3 + length:
             return False
         if expect_rx:
             self._expect_resp.append(length)
@@ -7,16 +7,24 @@
 """USB Helpers"""
 
 import sys
+from collections import deque
+from ctypes import (CFUNCTYPE, POINTER, Structure, addressof, byref, c_int,
+                    c_long, c_ubyte, c_uint, c_void_p, string_at)
+from errno import ENODEV
 from fnmatch import fnmatchcase
 from importlib import import_module
+from itertools import count
+from logging import getLogger
 from string import printable as printablechars
-from threading import RLock
-from typing import (Any, Dict, List, NamedTuple, Optional, Sequence, Set,
-                    TextIO, Type, Tuple, Union)
+from threading import Event, Lock, RLock, Thread, current_thread
+from time import monotonic, sleep
+from typing import (Any, Callable, Dict, List, NamedTuple, Optional, Sequence,
+                    Set, TextIO, Type, Tuple, Union)
 from urllib.parse import SplitResult, urlsplit, urlunsplit
 from usb.backend import IBackend
-from usb.core import Device as UsbDevice, USBError
-from usb.util import dispose_resources, get_string as usb_get_string
+from usb.core import Device as UsbDevice, Interface as UsbInterface, USBError
+from usb.util import (claim_interface, dispose_resources,
+                      get_string as usb_get_string)
 from .misc import to_int
 
 #pylint: disable-msg=broad-except
@@ -58,10 +66,313 @@ UsbDeviceKey = Union[Tuple[int, int, int, int], Tuple[int, int]]
    it may be degraded to (vid, pid) 2-uple.
 """
 
+UsbHotplugCallback = Callable[[UsbDeviceDescriptor, bool], None]
+"""USB hotplug notification handler.
+
+   It receives the descriptor of the device that has been connected to or
+   disconnected from the host, and whether the device has arrived (True) or
+   left (False).
+"""
+
+
 class UsbToolsError(Exception):
     """UsbTools error."""
 
 
+class _LibUsbHotplug:
+    """Libusb 1.0 hotplug notifications, if supported by the PyUSB backend.
+
+       PyUSB does not expose the libusb hotplug API, so it is directly called
+       from the libusb library loaded by the PyUSB backend.
+    """
+
+    CAP_HAS_HOTPLUG = 0x0001
+    EVENT_ARRIVED = 0x01
+    EVENT_LEFT = 0x02
+    MATCH_ANY = -1
+
+    CALLBACK = CFUNCTYPE(c_int, c_void_p, c_void_p, c_int, c_void_p)
+
+    class Timeval(Structure):
+        """POSIX struct timeval"""
+        _fields_ = [('tv_sec', c_long), ('tv_usec', c_long)]
+
+    def __init__(self, lib: Any, ctx: c_void_p):
+        self._lib = lib
+        self._ctx = ctx
+        self._handle = c_int()
+        self._changed = False
+        # keep a reference on the ctypes callback, as long as it is in use
+        self._callback = self.CALLBACK(self._notify)
+
+    @classmethod
+    def create(cls, backend: IBackend) -> Optional['_LibUsbHotplug']:
+        """Register for hotplug notifications.
+
+           :param backend: the PyUSB backend
+           :return: the hotplug notifier, or None if the backend does not
+                    support hotplug notifications
+        """
+        lib = getattr(backend, 'lib', None)
+        ctx = getattr(backend, 'ctx', None)
+        if lib is None or not ctx:
+            return None
+        try:
+            lib.libusb_has_capability.argtypes = [c_int]
+            lib.libusb_has_capability.restype = c_int
+            lib.libusb_hotplug_register_callback.argtypes = [
+                c_void_p, c_int, c_int, c_int, c_int, c_int,
+                cls.CALLBACK, c_void_p, POINTER(c_int)]
+            lib.libusb_hotplug_register_callback.restype = c_int
+            lib.libusb_hotplug_deregister_callback.argtypes = [c_void_p,
+                                                               c_int]
+            lib.libusb_hotplug_deregister_callback.restype = None
+            lib.libusb_handle_events_timeout_completed.argtypes = [
+                c_void_p, POINTER(cls.Timeval), POINTER(c_int)]
+            lib.libusb_handle_events_timeout_completed.restype = c_int
+        except AttributeError:
+            return None
+        if not lib.libusb_has_capability(cls.CAP_HAS_HOTPLUG):
+            return None
+        hotplug = cls(lib, ctx)
+        if lib.libusb_hotplug_register_callback(
+                ctx, cls.EVENT_ARRIVED | cls.EVENT_LEFT, 0,
+                cls.MATCH_ANY, cls.MATCH_ANY, cls.MATCH_ANY,
+                hotplug._callback, None, byref(hotplug._handle)):
+            return None
+        return hotplug
+
+    def wait(self, timeout: float) -> bool:
+        """Wait for hotplug events.
+
+           :param timeout: maximum time to wait, in seconds
+           :return: True if a device has been connected or disconnected
+        """
+        self._changed = False
+        tv = self.Timeval(int(timeout), int((timeout % 1) * 1E6))
+        self._lib.libusb_handle_events_timeout_completed(self._ctx,
+                                                          byref(tv), None)
+        return self._changed
+
+    def close(self) -> None:
+        """Stop hotplug notifications."""
+        self._lib.libusb_hotplug_deregister_callback(self._ctx, self._handle)
+
+    def _notify(self, ctx, device, event, user_data) -> int:
+        #pylint: disable-msg=unused-argument
+        # libusb API cannot be called from the callback: only flag the
+        # event, the device list is rebuilt once the callback returns
+        self._changed = True
+        return 0
+
+
+class _LibUsbTransfer(Structure):
+    """libusb 1.0 transfer, isochronous packet descriptors excluded."""
+
+
+_LibUsbTransferCallback = CFUNCTYPE(None, POINTER(_LibUsbTransfer))
+
+_LibUsbTransfer._fields_ = [
+    ('dev_handle', c_void_p),
+    ('flags', c_ubyte),
+    ('endpoint', c_ubyte),
+    ('type', c_ubyte),
+    ('timeout', c_uint),
+    ('status', c_int),
+    ('length', c_int),
+    ('actual_length', c_int),
+    ('callback', _LibUsbTransferCallback),
+    ('user_data', c_void_p),
+    ('buffer', c_void_p),
+    ('num_iso_packets', c_int)]
+
+
+class _LibUsbBulkReader:
+    """Libusb 1.0 bulk-IN reader, which keeps several asynchronous transfers
+       in flight, so that the host never leaves the bus idle while a
+       completed transfer is processed.
+
+       PyUSB does not expose the libusb asynchronous API, so it is directly
+       called from the libusb library loaded by the PyUSB backend. As the
+       transfers of an endpoint complete in submission order, completed
+       transfers are consumed then resubmitted in turn.
+
+       :param ctx: the libusb context
+       :param functions: the libusb asynchronous API
+    """
+
+    TRANSFER_TYPE_BULK = 2
+    TRANSFER_COMPLETED = 0
+    TRANSFER_TIMED_OUT = 2
+    TRANSFER_NO_DEVICE = 5
+    TRANSFER_STATUSES = ('completed', 'error', 'timed out', 'cancelled',
+                         'stalled', 'no device', 'overflow')
+    ERROR_NO_DEVICE = -4
+    ERROR_INTERRUPTED = -10
+
+    EVENT_TIMEOUT = 0.1
+    """Maximum time to wait for libusb events at once, in seconds."""
+
+    CLOSE_TIMEOUT = 1.0
+    """Maximum time to wait for cancelled transfers, in seconds."""
+
+    PROTOTYPES = {
+        'libusb_alloc_transfer':
+            CFUNCTYPE(POINTER(_LibUsbTransfer), c_int),
+        'libusb_free_transfer':
+            CFUNCTYPE(None, POINTER(_LibUsbTransfer)),
+        'libusb_submit_transfer':
+            CFUNCTYPE(c_int, POINTER(_LibUsbTransfer)),
+        'libusb_cancel_transfer':
+            CFUNCTYPE(c_int, POINTER(_LibUsbTransfer)),
+        'libusb_handle_events_timeout_completed':
+            CFUNCTYPE(c_int, c_void_p, POINTER(_LibUsbHotplug.Timeval),
+                      POINTER(c_int))}
+    """Prototypes of the libusb asynchronous API, which are bound to their
+       own function pointers, so that the prototypes PyUSB may define for
+       the same functions are left untouched."""
+
+    def __init__(self, ctx: c_void_p, functions: Dict[str, Any]):
+        self._ctx = ctx
+        self._alloc = functions['libusb_alloc_transfer']
+        self._free = functions['libusb_free_transfer']
+        self._submit = functions['libusb_submit_transfer']
+        self._cancel = functions['libusb_cancel_transfer']
+        self._handle_events = \
+            functions['libusb_handle_events_timeout_completed']
+        # keep a reference on the ctypes callback, as long as it is in use
+        self._callback = _LibUsbTransferCallback(self._complete)
+        self._transfers: List[Any] = []
+        self._buffers: List[Any] = []
+        self._busy: Dict[int, bool] = {}
+        self._queue = deque()
+
+    @classmethod
+    def create(cls, device: UsbDevice, interface: UsbInterface,
+               endpoint: int, size: int, count: int,
+               timeout: int) -> Optional['_LibUsbBulkReader']:
+        """Start reading a bulk-IN endpoint.
+
+           :param device: the USB device
+           :param interface: the USB interface of the endpoint
+           :param endpoint: the bulk-IN endpoint address
+           :param size: the size of each USB request, in bytes
+           :param count: how many USB requests to keep in flight
+           :param timeout: the timeout of each USB request, in ms
+           :return: the reader, or None if the PyUSB backend does not
+                    support libusb asynchronous transfers
+        """
+        #pylint: disable-msg=protected-access
+        backend = device._ctx.backend
+        lib = getattr(backend, 'lib', None)
+        ctx = getattr(backend, 'ctx', None)
+        if lib is None or not ctx:
+            return None
+        try:
+            functions = {name: proto((name, lib))
+                         for name, proto in cls.PROTOTYPES.items()}
+        except AttributeError:
+            return None
+        handle = getattr(device._ctx.managed_open(), 'handle', None)
+        if not handle:
+            return None
+        # asynchronous transfers bypass PyUSB, which only claims an interface
+        # on its first synchronous transfer
+        claim_interface(device, interface)
+        reader = cls(ctx, functions)
+        try:
+            for _ in range(count):
+                reader._add(handle, endpoint, size, timeout)
+        except Exception:
+            reader.close()
+            raise
+        return reader
+
+    def read(self) -> bytes:
+        """Retrieve the content of the oldest transfer, and resubmit it.
+
+           :return: the received bytes
+        """
+        transfer = self._queue[0]
+        key = addressof(transfer.contents)
+        while self._busy[key]:
+            self._wait(self.EVENT_TIMEOUT)
+        self._queue.rotate(-1)
+        status = transfer.contents.status
+        data = string_at(transfer.contents.buffer,
+                         transfer.contents.actual_length)
+        if status not in (self.TRANSFER_COMPLETED, self.TRANSFER_TIMED_OUT):
+            raise USBError('Bulk transfer %s' % self._status_name(status),
+                           None, ENODEV if status == self.TRANSFER_NO_DEVICE
+                           else None)
+        self._submit_transfer(transfer)
+        return data
+
+    def close(self) -> None:
+        """Cancel the transfers in flight, and release all the transfers."""
+        for transfer in self._transfers:
+            if self._busy[addressof(transfer.contents)]:
+                self._cancel(transfer)
+        expire = monotonic() + self.CLOSE_TIMEOUT
+        while any(self._busy.values()) and monotonic() < expire:
+            try:
+                self._wait(self.EVENT_TIMEOUT)
+            except USBError:
+                sleep(self.EVENT_TIMEOUT)
+        for transfer in self._transfers:
+            # a transfer still in flight cannot be released
+            if not self._busy[addressof(transfer.contents)]:
+                self._free(transfer)
+        self._transfers.clear()
+        self._queue.clear()
+
+    def _add(self, handle: c_void_p, endpoint: int, size: int,
+             timeout: int) -> None:
+        transfer = self._alloc(0)
+        if not transfer:
+            raise USBError('Cannot allocate transfer')
+        buffer = (c_ubyte * size)()
+        self._buffers.append(buffer)
+        self._transfers.append(transfer)
+        self._busy[addressof(transfer.contents)] = False
+        xfer = transfer.contents
+        xfer.dev_handle = handle
+        xfer.endpoint = endpoint
+        xfer.type = self.TRANSFER_TYPE_BULK
+        xfer.timeout = timeout
+        xfer.length = size
+        xfer.buffer = addressof(buffer)
+        xfer.callback = self._callback
+        self._submit_transfer(transfer)
+        self._queue.append(transfer)
+
+    def _submit_transfer(self, transfer: Any) -> None:
+        key = addressof(transfer.contents)
+        self._busy[key] = True
+        err = self._submit(transfer)
+        if err:
+            self._busy[key] = False
+            raise USBError('Cannot submit transfer', err,
+                           ENODEV if err == self.ERROR_NO_DEVICE else None)
+
+    def _wait(self, timeout: float) -> None:
+        tv = _LibUsbHotplug.Timeval(int(timeout), int((timeout % 1) * 1E6))
+        err = self._handle_events(self._ctx, byref(tv), None)
+        if err and err != self.ERROR_INTERRUPTED:
+            raise USBError('Cannot handle USB events', err)
+
+    def _complete(self, transfer) -> None:
+        # may be called from any thread handling libusb events
+        self._busy[addressof(transfer.contents)] = False
+
+    @classmethod
+    def _status_name(cls, status: int) -> str:
+        try:
+            return cls.TRANSFER_STATUSES[status]
+        except IndexError:
+            return 'failed (%d)' % status
+
+
 class UsbTools:
     """Helpers to obtain information about connected USB devices."""
 
@@ -74,9 +385,32 @@ class UsbTools:
     # to track (device, refcount) pairs
     Lock = RLock()
     Devices = {}  # (bus, address, vid, pid): (usb.core.Device, refcount)
+    # disconnected devices that are still in use
+    StaleDevices = {}  # (bus, address, vid, pid): (usb.core.Device, refcount)
+    DeviceLocks = {}  # (bus, address, vid, pid): Lock
     UsbDevices = {}  # (vid, pid): {usb.core.Device}
+    UsbStrings = {}  # (bus, address, vid, pid, string index): str
+    UsbDescriptors = {}  # usb.core.Device: (UsbDeviceDescriptor, ifcount)
+    UsbCacheTime = None  # Optional[float], last enumeration time
+    UsbVidPids = set()  # {(vid, pid)}, pairs of the cached devices
     UsbApi = None
 
+    CACHE_TTL: Optional[float] = 5.0
+    """Lifetime of the USB enumeration cache, in seconds. The cache is never
+       discarded if set to None, see :py:meth:`flush_cache`. While hotplug
+       events are subscribed to, see :py:meth:`subscribe`, the cache is also
+       refreshed as soon as a device arrives or leaves."""
+
+    HOTPLUG_POLL_PERIOD = 1.0
+    """Delay between USB enumerations, in seconds, to detect hotplug events
+       when the USB backend does not support hotplug notifications."""
+
+    # token: (callback, vps, {(bus, address, vid, pid): UsbDeviceDescriptor})
+    HotplugSubscribers = {}
+    HotplugWorker = None  # Optional[Tuple[Thread, Event]]
+    HotplugTokens = count(1)
+    log = getLogger('pyftdi.usbtools')
+
     @classmethod
     def find_all(cls, vps: Sequence[Tuple[int, int]],
                  nocache: bool = False) -> \
@@ -90,20 +424,11 @@ class UsbTools:
         """
         cls.Lock.acquire()
         try:
-            devs = set()
-            for vid, pid in vps:
-                # TODO optimize useless loops
-                devs.update(UsbTools._find_devices(vid, pid, nocache))
+            cls._enumerate_devices(set(vps), nocache)
             devices = set()
-            for dev in devs:
-                ifcount = max([cfg.bNumInterfaces for cfg in dev])
-                # TODO: handle / is serial number strings
-                sernum = UsbTools.get_string(dev, dev.iSerialNumber)
-                description = UsbTools.get_string(dev, dev.iProduct)
-                descriptor = UsbDeviceDescriptor(dev.idVendor, dev.idProduct,
-                                                 dev.bus, dev.address,
-                                                 sernum, None, description)
-                devices.add((descriptor, ifcount))
+            for vid, pid in vps:
+                for dev in cls.UsbDevices.get((vid, pid), set()):
+                    devices.add(cls._get_descriptor(dev))
             return list(devices)
         finally:
             cls.Lock.release()
@@ -119,11 +444,72 @@ class UsbTools:
 
            Failing to clear out the cache may lead to USB Error 19:
            ``Device may have been disconnected``.
+
+           The cache is also automatically discarded once it is older than
+           :py:attr:`CACHE_TTL`.
         """
         cls.Lock.acquire()
         cls.UsbDevices.clear()
+        cls.UsbStrings.clear()
+        cls.UsbDescriptors.clear()
+        cls.UsbCacheTime = None
         cls.Lock.release()
 
+    @classmethod
+    def subscribe(cls, callback: UsbHotplugCallback,
+                  vps: Sequence[Tuple[int, int]]) -> int:
+        """Subscribe to connection and disconnection of USB devices.
+
+           Hotplug events are detected from libusb notifications when the
+           USB backend supports them, or from a periodic enumeration of the
+           USB devices otherwise, see :py:attr:`HOTPLUG_POLL_PERIOD`.
+
+           The callback is called from a dedicated thread. Open devices that
+           are disconnected are flagged as stale: they are released once
+           their owners have closed them, see :py:meth:`release_device`.
+
+           :param callback: the handler to call whenever a matching device
+                            arrives or leaves
+           :param vps: a sequence of 2-tuple (vid, pid) pairs
+           :return: a subscription token, see :py:meth:`unsubscribe`
+        """
+        cls.Lock.acquire()
+        try:
+            vps = set(vps)
+            cls._enumerate_devices(vps)
+            token = next(cls.HotplugTokens)
+            cls.HotplugSubscribers[token] = (callback, vps,
+                                             cls._get_hotplug_devices(vps))
+            if not cls.HotplugWorker:
+                stop = Event()
+                thread = Thread(target=cls._hotplug_worker, args=(stop,),
+                                name='UsbTools-Hotplug', daemon=True)
+                cls.HotplugWorker = (thread, stop)
+                thread.start()
+            return token
+        finally:
+            cls.Lock.release()
+
+    @classmethod
+    def unsubscribe(cls, token: int) -> None:
+        """Cancel a subscription to USB hotplug events.
+
+           :param token: the token returned by :py:meth:`subscribe`
+        """
+        cls.Lock.acquire()
+        try:
+            if cls.HotplugSubscribers.pop(token, None) is None:
+                raise ValueError('Unknown subscription')
+            if cls.HotplugSubscribers or not cls.HotplugWorker:
+                return
+            thread, stop = cls.HotplugWorker
+            cls.HotplugWorker = None
+            stop.set()
+        finally:
+            cls.Lock.release()
+        if thread != current_thread():
+            thread.join()
+
     @classmethod
     def get_device(cls, devdesc: UsbDeviceDescriptor) -> UsbDevice:
         """Find a previously open device with the same vendor/product
@@ -145,65 +531,67 @@ class UsbTools:
                            constraints.
            :return: PyUSB device instance
         """
-        cls.Lock.acquire()
-        try:
-            if devdesc.index or devdesc.sn or devdesc.description:
-                dev = None
-                if not devdesc.vid:
-                    raise ValueError('Vendor identifier is required')
-                devs = cls._find_devices(devdesc.vid, devdesc.pid)
-                if devdesc.description:
-                    devs = [dev for dev in devs if
-                            UsbTools.get_string(dev, dev.iProduct) ==
-                            devdesc.description]
-                if devdesc.sn:
-                    devs = [dev for dev in devs if
-                            UsbTools.get_string(dev, dev.iSerialNumber) ==
-                            devdesc.sn]
-                if devdesc.bus is not None and devdesc.address is not None:
-                    devs = [dev for dev in devs if
-                            (devdesc.bus == dev.bus and
-                             devdesc.address == dev.address)]
-                if isinstance(devs, set):
-                    # there is no guarantee the same index with lead to the
-                    # same device. Indexing should be reworked
-                    devs = list(devs)
+        while True:
+            cls.Lock.acquire()
+            try:
+                dev = cls._select_device(devdesc)
                 try:
-                    dev = devs[devdesc.index or 0]
-                except IndexError as exc:
-                    raise IOError("No such device") from exc
-            else:
-                devs = cls._find_devices(devdesc.vid, devdesc.pid)
-                dev = list(devs)[0] if devs else None
-            if not dev:
-                raise IOError('Device not found')
+                    devkey = (dev.bus, dev.address, devdesc.vid, devdesc.pid)
+                    if None in devkey[0:2]:
+                        raise AttributeError('USB backend does not support '
+                                             'bus enumeration')
+                except AttributeError:
+                    devkey = (devdesc.vid, devdesc.pid)
+                if devkey in cls.Devices:
+                    cls.Devices[devkey][1] += 1
+                    return cls.Devices[devkey][0]
+                devlock = cls.DeviceLocks.setdefault(devkey, Lock())
+            finally:
+                cls.Lock.release()
+            # the device configuration may be slow: only serialize the
+            # requests that target the same device, so that several devices
+            # can be set up concurrently
+            devlock.acquire()
+            cls.Lock.acquire()
             try:
-                devkey = (dev.bus, dev.address, devdesc.vid, devdesc.pid)
-                if None in devkey[0:2]:
-                    raise AttributeError('USB backend does not support bus '
-                                         'enumeration')
-            except AttributeError:
-                devkey = (devdesc.vid, devdesc.pid)
-            if devkey not in cls.Devices:
-                # only change the active configuration if the active one is
-                # not the first. This allows other libusb sessions running
-                # with the same device to run seamlessly.
+                if cls.DeviceLocks.get(devkey) is devlock:
+                    break
+                # the lock has been discarded by a concurrent release
+            finally:
+                cls.Lock.release()
+            devlock.release()
+        try:
+            cls.Lock.acquire()
+            try:
+                if devkey in cls.Devices:
+                    # configured by a concurrent request
+                    cls.Devices[devkey][1] += 1
+                    return cls.Devices[devkey][0]
+            finally:
+                cls.Lock.release()
+            # only change the active configuration if the active one is
+            # not the first. This allows other libusb sessions running
+            # with the same device to run seamlessly.
+            try:
+                config = dev.get_active_configuration()
+                setconf = config.bConfigurationValue != 1
+            except USBError:
+                setconf = True
+            if setconf:
                 try:
-                    config = dev.get_active_configuration()
-                    setconf = config.bConfigurationValue != 1
+                    dev.set_configuration()
                 except USBError:
-                    setconf = True
-                if setconf:
-                    try:
-                        dev.set_configuration()
-                    except USBError:
-                        pass
+                    pass
+            cls.Lock.acquire()
+            try:
                 cls.Devices[devkey] = [dev, 1]
-            else:
-                cls.Devices[devkey][1] += 1
-            return cls.Devices[devkey][0]
+                return dev
+            finally:
+                cls.Lock.release()
         finally:
-            cls.Lock.release()
+            # the device may have failed to be set up
+            cls._discard_device_lock(devkey, devlock)
+            devlock.release()
 
     @classmethod
     def release_device(cls, usb_dev: UsbDevice):
@@ -211,23 +599,33 @@ class UsbTools:
 
            :param usb_dev: a previously instanciated USB device instance
         """
-        # Lookup for ourselves in the class dictionary
+        # Lookup for ourselves in the class dictionaries
         cls.Lock.acquire()
         try:
-            for devkey in cls.Devices:
-                dev, refcount = cls.Devices[devkey]
-                if dev == usb_dev:
-                    # found
-                    if refcount > 1:
-                        # another interface is open, decrement
-                        cls.Devices[devkey][1] -= 1
-                    else:
-                        # last interface in use, release
-                        dispose_resources(cls.Devices[devkey][0])
-                        del cls.Devices[devkey]
+            for devices in (cls.Devices, cls.StaleDevices):
+                devkey = next((key for key, (dev, _) in devices.items()
+                               if dev == usb_dev), None)
+                if devkey is not None:
                     break
+            else:
+                return
+            if devices[devkey][1] > 1:
+                # another interface is open, decrement
+                devices[devkey][1] -= 1
+                return
+            # last interface in use, release
+            del devices[devkey]
+            devlock = cls.DeviceLocks.get(devkey)
         finally:
             cls.Lock.release()
+        if not devlock:
+            dispose_resources(usb_dev)
+            return
+        # do not release the device while it is being set up by a concurrent
+        # request
+        with devlock:
+            dispose_resources(usb_dev)
+            cls._discard_device_lock(devkey, devlock)
 
     @classmethod
     def release_all_devices(cls, devclass: Optional[Type] = None) -> int:
@@ -238,17 +636,20 @@ class UsbTools:
         """
         cls.Lock.acquire()
         try:
-            remove_devs = set()
-            for devkey in cls.Devices:
-                if devclass:
-                    dev = cls._get_backend_device(cls.Devices[devkey][0])
-                    if dev is None or not isinstance(dev, devclass):
-                        continue
-                dispose_resources(cls.Devices[devkey][0])
-                remove_devs.add(devkey)
-            for devkey in remove_devs:
-                del cls.Devices[devkey]
-            return len(remove_devs)
+            released = 0
+            for devices in (cls.Devices, cls.StaleDevices):
+                remove_devs = set()
+                for devkey in devices:
+                    if devclass:
+                        dev = cls._get_backend_device(devices[devkey][0])
+                        if dev is None or not isinstance(dev, devclass):
+                            continue
+                    dispose_resources(devices[devkey][0])
+                    remove_devs.add(devkey)
+                for devkey in remove_devs:
+                    del devices[devkey]
+                released += len(remove_devs)
+            return released
         finally:
             cls.Lock.release()
 
@@ -424,7 +825,7 @@ class UsbTools:
                 continue
             if product and product != desc.pid:
                 continue
-            if sernum and not fnmatchcase(desc.sn, sernum):
+            if sernum and not (desc.sn and fnmatchcase(desc.sn, sernum)):
                 continue
             if bus is not None:
                 if bus != desc.bus or address != desc.address:
@@ -595,37 +996,114 @@ class UsbTools:
            :return: a set of USB device matching the vendor/product identifier
                     pair
         """
+        cls._enumerate_devices({(vendor, product)}, nocache)
+        return cls.UsbDevices.get((vendor, product), set())
+
+    @classmethod
+    def _discard_device_lock(cls, devkey: UsbDeviceKey, devlock: Lock) \
+            -> None:
+        """Discard the lock of a device that is not in use anymore, so that
+           the lock table does not grow with each device ever seen.
+
+           The caller should hold the device lock. Requests waiting for the
+           discarded lock detect it and retry with a new lock.
+
+           :param devkey: the device key
+           :param devlock: the device lock
+        """
+        cls.Lock.acquire()
+        try:
+            if devkey not in cls.Devices and \
+                    cls.DeviceLocks.get(devkey) is devlock:
+                del cls.DeviceLocks[devkey]
+        finally:
+            cls.Lock.release()
+
+    @classmethod
+    def _select_device(cls, devdesc: UsbDeviceDescriptor) -> UsbDevice:
+        """Find the enumerated device that matches a device descriptor.
+
+           :param devdesc: Device descriptor that identifies the device by
+                           constraints.
+           :return: PyUSB device instance
+        """
+        if devdesc.index or devdesc.sn or devdesc.description:
+            dev = None
+            if not devdesc.vid:
+                raise ValueError('Vendor identifier is required')
+            devs = cls._find_devices(devdesc.vid, devdesc.pid)
+            if devdesc.description:
+                devs = [dev for dev in devs if
+                        cls._get_cached_string(dev, dev.iProduct) ==
+                        devdesc.description]
+            if devdesc.sn:
+                devs = [dev for dev in devs if
+                        cls._get_cached_string(dev, dev.iSerialNumber) ==
+                        devdesc.sn]
+            if devdesc.bus is not None and devdesc.address is not None:
+                devs = [dev for dev in devs if
+                        (devdesc.bus == dev.bus and
+                         devdesc.address == dev.address)]
+            if isinstance(devs, set):
+                # there is no guarantee the same index with lead to the
+                # same device. Indexing should be reworked
+                devs = list(devs)
+            try:
+                dev = devs[devdesc.index or 0]
+            except IndexError as exc:
+                raise IOError("No such device") from exc
+        else:
+            devs = cls._find_devices(devdesc.vid, devdesc.pid)
+            dev = list(devs)[0] if devs else None
+        if not dev:
+            raise IOError('Device not found')
+        return dev
+
+    @classmethod
+    def _enumerate_devices(cls, vps: Set[Tuple[int, int]],
+                           nocache: bool = False) -> None:
+        """Enumerate the USB devices connected to the host, unless the
+           enumeration cache is still valid.
+
+           The host is walked once for all the vendor/product pairs that have
+           been requested so far, and the matching devices are kept in the
+           cache until it expires, see :py:attr:`CACHE_TTL`, or it is
+           flushed. To save memory, other devices are not cached.
+
+           :param vps: a set of 2-tuple (vid, pid) pairs to enumerate
+           :param bool nocache: bypass cache to re-enumerate USB devices on
+                                the host
+        """
+        if not vps <= cls.UsbVidPids:
+            # devices of new vendor/product pairs have not been enumerated
+            cls.UsbVidPids.update(vps)
+            nocache = True
+        if not nocache and cls.UsbCacheTime is not None:
+            if cls.CACHE_TTL is None:
+                return
+            if monotonic() - cls.UsbCacheTime < cls.CACHE_TTL:
+                return
         backend = cls._load_backend()
-        vidpid = (vendor, product)
-        if nocache or (vidpid not in cls.UsbDevices):
-            # not freed until Python runtime completion
-            # enumerate_devices returns a generator, so back up the
-            # generated device into a list. To save memory, we only
-            # back up the supported devices
-            devs = set()
-            vpdict = {}  # Dict[int, List[int]]
-            vpdict.setdefault(vendor, [])
-            vpdict[vendor].append(product)
-            for dev in backend.enumerate_devices():
-                device = UsbDevice(dev, backend)
-                if device.idVendor in vpdict:
-                    products = vpdict[device.idVendor]
-                    if products and (device.idProduct not in products):
-                        continue
-                    devs.add(device)
-            if sys.platform == 'win32':
-                # ugly kludge for a boring OS:
-                # on Windows, the USB stack may enumerate the very same
-                # devices several times: a real device with N interface
-                # appears also as N device with as single interface.
-                # We only keep the "device" that declares the most
-                # interface count and discard the "virtual" ones.
+        # enumerate_devices returns a generator, so back up the
+        # generated device into a list.
+        vpdevs = {}  # Dict[Tuple[int, int], Set[UsbDevice]]
+        for dev in backend.enumerate_devices():
+            device = UsbDevice(dev, backend)
+            vidpid = (device.idVendor, device.idProduct)
+            if vidpid in cls.UsbVidPids:
+                vpdevs.setdefault(vidpid, set()).add(device)
+        if sys.platform == 'win32':
+            # ugly kludge for a boring OS:
+            # on Windows, the USB stack may enumerate the very same
+            # devices several times: a real device with N interface
+            # appears also as N device with as single interface.
+            # We only keep the "device" that declares the most
+            # interface count and discard the "virtual" ones.
+            for vidpid, devs in vpdevs.items():
                 filtered_devs = dict()
                 for dev in devs:
-                    vid = dev.idVendor
-                    pid = dev.idProduct
                     ifc = max([cfg.bNumInterfaces for cfg in dev])
-                    k = (vid, pid, dev.bus, dev.address)
+                    k = (dev.bus, dev.address)
                     if k not in filtered_devs:
                         filtered_devs[k] = dev
                     else:
@@ -633,9 +1111,150 @@ class UsbTools:
                         fifc = max([cfg.bNumInterfaces for cfg in fdev])
                         if fifc < ifc:
                             filtered_devs[k] = dev
-                devs = set(filtered_devs.values())
-            cls.UsbDevices[vidpid] = devs
-        return cls.UsbDevices[vidpid]
+                vpdevs[vidpid] = set(filtered_devs.values())
+        # devices that are still connected at the same location keep their
+        # string and descriptor entries
+        locations = {cls._get_location(dev)
+                     for devs in vpdevs.values() for dev in devs}
+        for key in list(cls.UsbStrings):
+            if key[:4] not in locations:
+                del cls.UsbStrings[key]
+        cls.UsbDescriptors.clear()
+        cls.UsbDevices = vpdevs
+        cls.UsbCacheTime = monotonic()
+
+    @classmethod
+    def _get_descriptor(cls, dev: UsbDevice) -> Tuple[UsbDeviceDescriptor,
+                                                      int]:
+        """Build or retrieve from the cache the descriptor of a device.
+
+           :param dev: USB device instance
+           :return: a 2-tuple (UsbDeviceDescriptor, interface count)
+        """
+        try:
+            return cls.UsbDescriptors[dev]
+        except KeyError:
+            pass
+        ifcount = max([cfg.bNumInterfaces for cfg in dev])
+        # TODO: handle / is serial number strings
+        sernum = cls._get_cached_string(dev, dev.iSerialNumber)
+        description = cls._get_cached_string(dev, dev.iProduct)
+        descriptor = UsbDeviceDescriptor(dev.idVendor, dev.idProduct,
+                                         dev.bus, dev.address,
+                                         sernum, None, description)
+        cls.UsbDescriptors[dev] = (descriptor, ifcount)
+        return descriptor, ifcount
+
+    @classmethod
+    def _get_cached_string(cls, dev: UsbDevice, stridx: int) -> str:
+        """Retrieve a string from the USB device, or from the cache if it
+           has already been read from the same device.
+
+           :param device: USB device instance
+           :param stridx: the string identifier
+           :return: the device string
+        """
+        location = cls._get_location(dev)
+        if None in location[:2]:
+            # backend does not support bus enumeration, do not cache
+            return cls.get_string(dev, stridx)
+        key = (*location, stridx)
+        try:
+            return cls.UsbStrings[key]
+        except KeyError:
+            pass
+        string = cls.get_string(dev, stridx)
+        cls.UsbStrings[key] = string
+        return string
+
+    @classmethod
+    def _get_location(cls, dev: UsbDevice) -> \
+            Tuple[Optional[int], Optional[int], int, int]:
+        """Return the location and identifiers of a device.
+
+           :param dev: USB device instance
+           :return: a 4-tuple (bus, address, vid, pid)
+        """
+        return (getattr(dev, 'bus', None), getattr(dev, 'address', None),
+                dev.idVendor, dev.idProduct)
+
+    @classmethod
+    def _hotplug_worker(cls, stop: Event) -> None:
+        """Detect USB hotplug events until the last subscription is
+           cancelled.
+
+           :param stop: event to stop the worker
+        """
+        hotplug = _LibUsbHotplug.create(cls._load_backend())
+        if not hotplug:
+            cls.log.debug('No hotplug support, polling USB devices')
+        try:
+            while not stop.is_set():
+                if hotplug:
+                    if not hotplug.wait(cls.HOTPLUG_POLL_PERIOD):
+                        continue
+                    # a device has arrived or left: the strings of a device
+                    # may not be trusted anymore
+                    cls.flush_cache()
+                elif stop.wait(cls.HOTPLUG_POLL_PERIOD):
+                    break
+                try:
+                    cls._check_hotplug()
+                except Exception as exc:
+                    cls.log.error('Hotplug event handling error: %s', exc)
+        finally:
+            if hotplug:
+                hotplug.close()
+
+    @classmethod
+    def _check_hotplug(cls) -> None:
+        """Re-enumerate USB devices, flag the open devices that have been
+           disconnected as stale and notify the subscribers.
+        """
+        events = []  # List[Tuple[UsbHotplugCallback, UsbDeviceDescriptor,
+                     #            bool]]
+        cls.Lock.acquire()
+        try:
+            vps = set()
+            for _, subvps, _ in cls.HotplugSubscribers.values():
+                vps.update(subvps)
+            cls._enumerate_devices(vps, True)
+            locations = {cls._get_location(dev)
+                         for devs in cls.UsbDevices.values() for dev in devs}
+            for devkey in list(cls.Devices):
+                if len(devkey) == 4 and devkey not in locations:
+                    # the device is still used by its owners, which release
+                    # it on close, so that ongoing requests are not aborted
+                    cls.log.info('USB device %s disconnected', devkey)
+                    cls.StaleDevices[devkey] = cls.Devices.pop(devkey)
+            for token, (callback, vps, known) in \
+                    list(cls.HotplugSubscribers.items()):
+                current = cls._get_hotplug_devices(vps)
+                events.extend((callback, known[loc], False)
+                              for loc in known if loc not in current)
+                events.extend((callback, current[loc], True)
+                              for loc in current if loc not in known)
+                cls.HotplugSubscribers[token] = (callback, vps, current)
+        finally:
+            cls.Lock.release()
+        for callback, descriptor, arrived in events:
+            callback(descriptor, arrived)
+
+    @classmethod
+    def _get_hotplug_devices(cls, vps: Set[Tuple[int, int]]) -> \
+            Dict[Tuple[Optional[int], Optional[int], int, int],
+                 UsbDeviceDescriptor]:
+        """Build the map of the cached devices that match vendor/product
+           pairs.
+
+           :param vps: a set of 2-tuple (vid, pid) pairs
+           :return: a map of devices descriptors indexed by device location
+        """
+        devices = {}
+        for vidpid in vps:
+            for dev in cls.UsbDevices.get(vidpid, set()):
+                devices[cls._get_location(dev)] = cls._get_descriptor(dev)[0]
+        return devices
 
     @classmethod
     def _get_backend_device(cls, device: UsbDevice) -> Any: